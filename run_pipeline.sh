@@ -1,13 +1,4 @@
 #!/bin/bash
 
-# Run the first Python command
-python src/stages/data_prep.py --config=params.yaml
-
-# Run the second Python command
-python src/stages/data_split.py --config=params.yaml
-
-# Run the third Python command
-python src/stages/train_model.py --config=params.yaml
-
-# Run the fourth Python command
-python src/stages/evaluate.py --config=params.yaml
\ No newline at end of file
+# Run all stages in one process, handing data between them in memory
+python -m src.pipeline --config=params.yaml
@@ -0,0 +1,181 @@
+import argparse
+import copy
+import json
+import os
+from pathlib import Path
+import platform
+import subprocess
+import sys
+import time
+from typing import Dict, List, Text
+import yaml
+
+from src.bench.generate import write_loans
+from src.utils.logs import get_logger
+
+# Stage modules timed by the benchmark, in pipeline order
+BENCH_STAGES = {
+    'data_process': 'src.stages.data_prep',
+    'data_split': 'src.stages.data_split',
+    'train_model': 'src.stages.train_model',
+    'evaluate': 'src.stages.evaluate',
+}
+
+# Output paths of each config section, redirected to the benchmark run directory
+OUTPUT_PATHS = {
+    'data_process': ['save_path', 'artifact_path', 'memory_report'],
+    'data_split': ['trainset_path', 'testset_path'],
+    'train': ['model_path', 'search_report', 'forest_path'],
+    'evaluate': ['metrics_file', 'confusion_matrix_data', 'confusion_matrix_image'],
+    'monitor': ['reference_path'],
+}
+
+
+class Benchmark:
+    """
+    Benchmark class for timing and memory-profiling the pipeline stages on synthetic data.
+
+    For each size, synthetic raw data is generated and every stage runs in its own
+    process with the configuration file, its paths redirected to a run directory,
+    so that the peak resident memory of each stage is measured separately.
+
+    Parameters:
+    - config_path (str): The file path to the configuration file.
+
+    Attributes:
+    - config (dict): Configuration settings loaded from the specified file.
+    - logger: Logger object for recording log messages.
+    - results (list): Timing and memory of each stage at each size.
+
+    Methods:
+    - stage_config(): Write the configuration of a benchmark run.
+    - run_stage(): Run one stage in a subprocess and measure it.
+    - run(): Benchmark every stage at every size.
+    - save_report(): Save the results with the commit and machine they were measured on.
+    """
+
+    def __init__(self, config_path: Text):
+        """
+        Initialize Benchmark instance.
+
+        Parameters:
+        - config_path (str): The file path to the configuration file.
+        """
+        with open(config_path) as conf_file:
+            self.config = yaml.safe_load(conf_file)
+
+        self.logger = get_logger('BENCHMARK', log_level=self.config['base']['log_level'])
+        self.results = []
+
+    def stage_config(self, run_dir: Path) -> Path:
+        """
+        Write the configuration of a benchmark run, with every path inside run_dir.
+
+        Parameters:
+        - run_dir (Path): Directory holding the data and outputs of the run.
+
+        Returns:
+        - Path: The configuration file path.
+        """
+        config = copy.deepcopy(self.config)
+        config['base']['log_level'] = 'WARNING'
+        config['data_process']['load_path'] = str(run_dir / 'raw_data.csv')
+        for section, keys in OUTPUT_PATHS.items():
+            for key in keys:
+                config[section][key] = str(run_dir / Path(config[section][key]).name)
+        sweep = config['evaluate']['threshold_sweep']
+        sweep['metrics_file'] = str(run_dir / Path(sweep['metrics_file']).name)
+        tournament = config['train']['tournament']
+        tournament['leaderboard'] = str(run_dir / Path(tournament['leaderboard']).name)
+        config['train']['search']['results_store'] = None
+        config['instrument']['dir'] = str(run_dir / 'performance')
+        config['instrument']['events'] = str(run_dir / 'performance' / 'events.jsonl')
+        bench = config['bench']
+        if bench['param_grid']:
+            config['train']['estimators'][config['train']['estimator_name']]['param_grid'] = bench['param_grid']
+
+        config_path = run_dir / 'params.yaml'
+        config_path.write_text(yaml.safe_dump(config))
+        return config_path
+
+    def run_stage(self, stage: Text, config_path: Path) -> Dict:
+        """
+        Run one stage in a subprocess and measure its wall time and peak memory.
+
+        Parameters:
+        - stage (str): The stage name, a key of BENCH_STAGES.
+        - config_path (Path): The configuration file of the run.
+
+        Returns:
+        - dict: 'seconds' and 'peak_rss_mb' of the stage.
+        """
+        started = time.perf_counter()
+        process = subprocess.Popen([sys.executable, '-m', BENCH_STAGES[stage], f'--config={config_path}'],
+                                   stdout=subprocess.DEVNULL)
+        # wait4 reports the resource usage of this child alone
+        _, status, usage = os.wait4(process.pid, 0)
+        seconds = time.perf_counter() - started
+        if os.waitstatus_to_exitcode(status) != 0:
+            raise RuntimeError(f'Stage {stage} failed with {config_path}')
+        return {'seconds': seconds, 'peak_rss_mb': usage.ru_maxrss / 1024}
+
+    def run(self, sizes: List[int]):
+        """
+        Benchmark every stage at every size.
+
+        Parameters:
+        - sizes (list): Numbers of raw rows to generate.
+        """
+        bench = self.config['bench']
+        for rows in sizes:
+            run_dir = Path(bench['work_dir']) / str(rows)
+            run_dir.mkdir(parents=True, exist_ok=True)
+            self.logger.info(f'Generate {rows} rows')
+            started = time.perf_counter()
+            write_loans(run_dir / 'raw_data.csv', rows, seed=bench['seed'])
+            self.logger.info(f'Generated in {time.perf_counter() - started:.1f}s')
+
+            config_path = self.stage_config(run_dir)
+            for stage in BENCH_STAGES:
+                result = {'rows': rows, 'stage': stage, **self.run_stage(stage, config_path)}
+                result['rows_per_second'] = rows / result['seconds']
+                self.logger.info(f"{rows} rows, {stage}: {result['seconds']:.2f}s, "
+                                 f"peak {result['peak_rss_mb']:.0f} MB")
+                self.results.append(result)
+
+    def save_report(self):
+        """
+        Save the results with the commit and machine they were measured on.
+        """
+        self.logger.info('Save benchmark report')
+        try:
+            commit = subprocess.run(['git', 'rev-parse', 'HEAD'], capture_output=True, text=True,
+                                    check=True).stdout.strip()
+        except (OSError, subprocess.CalledProcessError):
+            commit = None
+        report = {
+            'commit': commit,
+            'created': time.strftime('%Y-%m-%dT%H:%M:%S%z'),
+            'python': platform.python_version(),
+            'platform': platform.platform(),
+            'cpu_count': os.cpu_count(),
+            'results': self.results,
+        }
+        with open(self.config['bench']['report'], 'w') as report_file:
+            json.dump(report, report_file, indent=2)
+
+
+if __name__ == '__main__':
+    args_parser = argparse.ArgumentParser()
+    args_parser.add_argument('--config', dest='config', required=True)
+    args_parser.add_argument('--sizes', dest='sizes', type=int, nargs='+', default=None)
+    args = args_parser.parse_args()
+
+    # Create an instance of Benchmark
+    benchmark = Benchmark(config_path=args.config)
+
+    # Time and profile every stage at every size
+    benchmark.run(args.sizes or benchmark.config['bench']['sizes'])
+
+    # Save the report
+    benchmark.save_report()
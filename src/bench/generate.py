@@ -0,0 +1,110 @@
+"""Provides a generator of synthetic loan applications matching the raw data schema."""
+
+import argparse
+import numpy as np
+import pandas as pd
+from typing import Iterator, Text
+
+# Category frequencies and missing rates of the raw credit risk data
+HOME_OWNERSHIP = {'RENT': 0.505, 'MORTGAGE': 0.413, 'OWN': 0.079, 'OTHER': 0.003}
+LOAN_INTENT = {'EDUCATION': 0.198, 'MEDICAL': 0.186, 'VENTURE': 0.175, 'PERSONAL': 0.170,
+               'DEBTCONSOLIDATION': 0.160, 'HOMEIMPROVEMENT': 0.111}
+LOAN_GRADE = {'A': 0.331, 'B': 0.321, 'C': 0.198, 'D': 0.111, 'E': 0.030, 'F': 0.007, 'G': 0.002}
+GRADE_RATE = [7.3, 11.0, 13.5, 15.4, 17.0, 18.6, 20.3]  # mean interest rate of each grade
+DEFAULT_ON_FILE = {'N': 0.824, 'Y': 0.176}
+EMP_LENGTH_MISSING = 0.027
+INT_RATE_MISSING = 0.096
+DEFAULT_RATE = 0.218
+
+
+def default_logit(grade: np.ndarray, percent_income: np.ndarray, renting: np.ndarray,
+                  default_on_file: np.ndarray) -> np.ndarray:
+    """Log-odds of default, before the intercept that sets the overall default rate.
+    Args:
+        grade {np.ndarray}: grade index, 0 for A
+        percent_income {np.ndarray}: loan amount over income
+        renting {np.ndarray}: whether the applicant rents
+        default_on_file {np.ndarray}: whether the applicant defaulted before
+    Returns:
+        np.ndarray of log-odds
+    """
+    return 0.55 * grade + 6.0 * percent_income + 0.9 * renting + 0.3 * default_on_file
+
+
+def generate_loans(n_rows: int, seed: int = 0, chunk_rows: int = 1_000_000) -> Iterator[pd.DataFrame]:
+    """Generate synthetic loan applications in chunks.
+    Args:
+        n_rows {int}: total rows
+        seed {int}: random seed; the same seed and chunk_rows give the same rows
+        chunk_rows {int}: rows per chunk
+    Returns:
+        iterator of pd.DataFrame chunks with the raw data columns
+    """
+    rng = np.random.default_rng(seed)
+    intercept = None
+    for start in range(0, n_rows, chunk_rows):
+        n = min(chunk_rows, n_rows - start)
+        age = np.clip(20 + rng.gamma(2.0, 4.0, n), 20, 94).astype('int64')
+        income = np.round(np.exp(rng.normal(10.9, 0.55, n))).astype('int64')
+        home = rng.choice(list(HOME_OWNERSHIP), n, p=list(HOME_OWNERSHIP.values()))
+        emp_length = np.minimum(rng.poisson(4.8, n), age - 16).astype('float64')
+        emp_length[rng.random(n) < EMP_LENGTH_MISSING] = np.nan
+        intent = rng.choice(list(LOAN_INTENT), n, p=list(LOAN_INTENT.values()))
+        grade = rng.choice(len(LOAN_GRADE), n, p=list(LOAN_GRADE.values()))
+        # Loans rarely exceed 80% of income
+        amount = np.clip(np.minimum(np.round(rng.gamma(2.2, 4300, n), -2), 0.8 * income // 100 * 100),
+                         500, 35000).astype('int64')
+        int_rate = np.round(np.take(GRADE_RATE, grade) + rng.normal(0, 1.2, n), 2)
+        int_rate[rng.random(n) < INT_RATE_MISSING] = np.nan
+        percent_income = np.round(amount / income, 2)
+        # Past defaults are more frequent in lower grades; the factor averages 1 over grades
+        on_file = rng.random(n) < DEFAULT_ON_FILE['Y'] * (0.45 + 0.46 * grade)
+        cred_hist = np.clip(rng.integers(2, 31, n), 2, age - 18).astype('int64')
+
+        logit = default_logit(grade, percent_income, home == 'RENT', on_file)
+        if intercept is None:
+            # Set the overall default rate on the first chunk, then keep it fixed
+            low, high = -20.0, 20.0
+            for _ in range(50):
+                intercept = (low + high) / 2
+                rate = (1 / (1 + np.exp(-(logit + intercept)))).mean()
+                low, high = (intercept, high) if rate < DEFAULT_RATE else (low, intercept)
+        status = (rng.random(n) < 1 / (1 + np.exp(-(logit + intercept)))).astype('int64')
+
+        yield pd.DataFrame({
+            'person_age': age,
+            'person_income': income,
+            'person_home_ownership': home,
+            'person_emp_length': emp_length,
+            'loan_intent': intent,
+            'loan_grade': np.take(list(LOAN_GRADE), grade),
+            'loan_amnt': amount,
+            'loan_int_rate': int_rate,
+            'loan_status': status,
+            'loan_percent_income': percent_income,
+            'cb_person_default_on_file': np.where(on_file, 'Y', 'N'),
+            'cb_person_cred_hist_length': cred_hist,
+        })
+
+
+def write_loans(path: Text, n_rows: int, seed: int = 0, chunk_rows: int = 1_000_000) -> None:
+    """Write synthetic loan applications to a CSV file, one chunk at a time.
+    Args:
+        path {Text}: CSV file path
+        n_rows {int}: total rows
+        seed {int}: random seed
+        chunk_rows {int}: rows generated and written at a time
+    """
+    for i, chunk in enumerate(generate_loans(n_rows, seed, chunk_rows)):
+        chunk.to_csv(path, mode='a' if i else 'w', header=not i, index=False)
+
+
+if __name__ == '__main__':
+    args_parser = argparse.ArgumentParser()
+    args_parser.add_argument('--rows', dest='rows', type=int, required=True)
+    args_parser.add_argument('--output', dest='output', required=True)
+    args_parser.add_argument('--seed', dest='seed', type=int, default=0)
+    args = args_parser.parse_args()
+
+    # Write the synthetic applications chunk by chunk
+    write_loans(args.output, args.rows, seed=args.seed)
@@ -0,0 +1,160 @@
+import argparse
+import json
+import subprocess
+import sys
+from typing import Dict, List, Text
+import yaml
+
+from src.bench.benchmark import BENCH_STAGES
+from src.utils.logs import get_logger
+
+# Entry points timed by the import benchmark: the stages, scoring and the model server
+IMPORT_MODULES = {
+    **BENCH_STAGES,
+    'monitor': 'src.stages.monitor',
+    'score': 'src.stages.score',
+    'serve': 'src.serve.server',
+    'pipeline': 'src.pipeline',
+}
+
+# Packages that no entry point may import at load time, only in the code path using them
+LAZY_PACKAGES = ['matplotlib', 'seaborn', 'sklearn', 'xgboost']
+
+
+def parse_importtime(stderr: Text) -> List[Dict]:
+    """Parse the report printed by python -X importtime.
+    Args:
+        stderr {Text}: standard error of the interpreter
+    Returns:
+        list of {'module', 'depth', 'self_us', 'cumulative_us'}, in the printed order
+    """
+    imports = []
+    for line in stderr.splitlines():
+        if not line.startswith('import time:') or 'self [us]' in line:
+            continue
+        self_us, cumulative_us, name = line[len('import time:'):].split('|')
+        module = name.strip()
+        imports.append({'module': module,
+                        # Nested imports are indented by two spaces per level
+                        'depth': (len(name) - len(name.lstrip()) - 1) // 2,
+                        'self_us': int(self_us),
+                        'cumulative_us': int(cumulative_us)})
+    return imports
+
+
+def measure_import(module: Text) -> Dict:
+    """Import a module in a fresh interpreter and measure it.
+    Args:
+        module {Text}: dotted module name
+    Returns:
+        dict with the total import time in ms, the packages taking most of it and
+        the lazy packages that were imported
+    """
+    result = subprocess.run([sys.executable, '-X', 'importtime', '-c', f'import {module}'],
+                            capture_output=True, text=True, check=True)
+    imports = parse_importtime(result.stderr)
+    # Self time of each top-level package, summed over its submodules
+    packages = {}
+    for entry in imports:
+        package = entry['module'].split('.')[0]
+        packages[package] = packages.get(package, 0) + entry['self_us']
+    heaviest = sorted(packages, key=packages.get, reverse=True)[:5]
+    return {
+        # Top-level entries already include the time of the imports nested under them
+        'import_ms': round(sum(entry['cumulative_us'] for entry in imports if entry['depth'] == 0) / 1000, 1),
+        'heaviest_packages_ms': {package: round(packages[package] / 1000, 1) for package in heaviest},
+        'lazy_packages': sorted(set(packages) & set(LAZY_PACKAGES)),
+    }
+
+
+class ImportBenchmark:
+    """
+    ImportBenchmark class for keeping the startup time of the entry points from regressing.
+
+    Each entry point is imported in a fresh interpreter with python -X importtime and the
+    best of several runs is reported. Wall-clock times depend on the machine, so what is
+    checked is which packages get imported: no entry point may import the packages that
+    are only needed by some of its code paths.
+
+    Parameters:
+    - config_path (str): The file path to the configuration file.
+
+    Attributes:
+    - config (dict): Configuration settings loaded from the specified file.
+    - logger: Logger object for recording log messages.
+    - results (dict): Import time and packages of each entry point.
+
+    Methods:
+    - run(): Measure every entry point.
+    - failures(): Entry points importing lazy packages.
+    - save_report(): Save the results and failures.
+    """
+
+    def __init__(self, config_path: Text):
+        """
+        Initialize ImportBenchmark instance.
+
+        Parameters:
+        - config_path (str): The file path to the configuration file.
+        """
+        with open(config_path) as conf_file:
+            self.config = yaml.safe_load(conf_file)
+
+        self.logger = get_logger('IMPORT_BENCHMARK', log_level=self.config['base']['log_level'])
+        self.results = {}
+
+    def run(self, repeats: int = None):
+        """
+        Measure every entry point, keeping the fastest of several runs.
+
+        Parameters:
+        - repeats (int): Imports of each entry point; defaults to bench.import_repeats.
+        """
+        repeats = repeats or self.config['bench']['import_repeats']
+        for name, module in IMPORT_MODULES.items():
+            runs = [measure_import(module) for _ in range(repeats)]
+            self.results[name] = min(runs, key=lambda run: run['import_ms'])
+            self.logger.info(f"{module}: {self.results[name]['import_ms']:.0f} ms")
+
+    def failures(self) -> List[Text]:
+        """
+        Entry points importing lazy packages.
+
+        Returns:
+        - list: One message per failure.
+        """
+        failures = []
+        for name, result in self.results.items():
+            if result['lazy_packages']:
+                failures.append(f"{name} imports {', '.join(result['lazy_packages'])} at load time")
+        return failures
+
+    def save_report(self):
+        """
+        Save the results and failures.
+        """
+        self.logger.info('Save import benchmark report')
+        report = {'python': sys.version.split()[0], 'results': self.results,
+                  'failures': self.failures()}
+        with open(self.config['bench']['import_report'], 'w') as report_file:
+            json.dump(report, report_file, indent=2)
+
+
+if __name__ == '__main__':
+    args_parser = argparse.ArgumentParser()
+    args_parser.add_argument('--config', dest='config', required=True)
+    args_parser.add_argument('--repeats', dest='repeats', type=int, default=None)
+    args = args_parser.parse_args()
+
+    # Create an instance of ImportBenchmark
+    benchmark = ImportBenchmark(config_path=args.config)
+
+    # Import every entry point in a fresh interpreter
+    benchmark.run(args.repeats)
+
+    # Save the report and fail on regressions
+    benchmark.save_report()
+    failures = benchmark.failures()
+    for failure in failures:
+        benchmark.logger.error(failure)
+    sys.exit(1 if failures else 0)
@@ -0,0 +1,337 @@
+import argparse
+from pathlib import Path
+import time
+from typing import Dict, List, Text
+import yaml
+
+from src.stages.data_prep import DataPrep
+from src.stages.data_split import DataSplit
+from src.stages.evaluate import EvaluateModel
+from src.stages.monitor import DriftMonitor
+from src.stages.train_model import TrainModel
+from src.serve.forest import exports_forest, meta_path
+from src.train.model_io import model_meta_path
+from src.utils.cache import StageCache
+from src.utils.logs import get_logger
+
+STAGES = ['data_process', 'data_split', 'train_model', 'evaluate', 'monitor']
+
+# Source files each stage depends on, mirroring the code deps in dvc.yaml
+SRC_DIR = Path(__file__).parent
+STAGE_SOURCES = {
+    'data_process': ['stages/data_prep.py', 'utils/encoding.py', 'utils/data_io.py'],
+    'data_split': ['stages/data_split.py', 'utils/data_io.py'],
+    'train_model': ['stages/train_model.py', 'train/train.py', 'train/search.py',
+                    'train/tournament.py', 'train/incremental.py', 'train/model_io.py', 'serve/forest.py',
+                    'stages/monitor.py', 'report/drift.py', 'utils/data_io.py'],
+    'evaluate': ['stages/evaluate.py', 'report/metrics.py', 'report/visualize.py',
+                 'report/reasons.py', 'train/model_io.py', 'serve/forest.py', 'utils/data_io.py'],
+    'monitor': ['stages/monitor.py', 'report/drift.py', 'train/model_io.py',
+                'serve/forest.py', 'utils/data_io.py'],
+}
+
+# Attributes holding the in-memory result of each stage
+STAGE_RESULTS = {
+    'data_process': ['dataset'],
+    'data_split': ['train_dataset', 'test_dataset'],
+    'train_model': ['model', 'drift_reference'],
+    'evaluate': [],
+    'monitor': [],
+}
+
+
+class Pipeline:
+    """
+    Pipeline class for running the DVC stages in a single process.
+
+    Each stage hands its result to the next one in memory; a stage only reads its
+    input from disk when it is the first stage run or its predecessor did not keep
+    the result in memory (streaming data preparation or a cache hit).
+
+    When outputs are persisted and the cache is enabled, a stage whose input data,
+    params and source files are unchanged restores its outputs from the stage cache
+    instead of running.
+
+    Parameters:
+    - config_path (str): The file path to the configuration file.
+    - persist (bool): Whether to save the stage outputs declared in dvc.yaml.
+    - use_cache (bool): Whether to use the stage cache configured in the cache section.
+
+    Attributes:
+    - config (dict): Configuration settings loaded from the specified file.
+    - logger: Logger object for recording log messages.
+    - timings (dict): Wall-clock seconds spent in each stage that ran.
+
+    Methods:
+    - run(): Run the stages between two stage names, both included.
+    - stage_spec(): Get the input data, params, sources and outputs of a stage.
+    - data_process(): Prepare the raw data.
+    - data_split(): Split the prepared data into training and test sets.
+    - train_model(): Train the model on the training set.
+    - evaluate(): Evaluate the model on the test set and write the reports.
+    - monitor(): Compare the new data with the training data and write the drift reports.
+    """
+
+    def __init__(self, config_path: Text, persist: bool = True, use_cache: bool = True):
+        """
+        Initialize Pipeline instance.
+
+        Parameters:
+        - config_path (str): The file path to the configuration file.
+        - persist (bool): Whether to save the stage outputs declared in dvc.yaml.
+        - use_cache (bool): Whether to use the stage cache configured in the cache section.
+        """
+        with open(config_path) as conf_file:
+            self.config = yaml.safe_load(conf_file)
+
+        self.config_path = config_path
+        self.persist = persist
+        self.logger = get_logger('PIPELINE', log_level=self.config['base']['log_level'])
+        self.dataset = None
+        self.train_dataset = None
+        self.test_dataset = None
+        self.model = None
+        self.drift_reference = None
+        self.timings = {}
+
+        self.cache = None
+        cache_config = self.config.get('cache', {})
+        if persist and use_cache and cache_config.get('enabled'):
+            self.cache = StageCache(cache_dir=cache_config['dir'],
+                                    max_size_mb=cache_config['max_size_mb'],
+                                    log_level=self.config['base']['log_level'])
+
+    def run(self, start: Text = STAGES[0], end: Text = STAGES[-1]):
+        """
+        Run the stages between start and end, both included.
+
+        Parameters:
+        - start (str): Name of the first stage to run.
+        - end (str): Name of the last stage to run.
+        """
+        stages = STAGES[STAGES.index(start):STAGES.index(end) + 1]
+        for stage in stages:
+            self.logger.info(f'Run stage {stage}')
+            started = time.perf_counter()
+            self.run_stage(stage)
+            self.timings[stage] = time.perf_counter() - started
+            self.logger.info(f'Stage {stage} took {self.timings[stage]:.2f}s')
+
+        self.logger.info(f'Pipeline took {sum(self.timings.values()):.2f}s')
+
+    def run_stage(self, stage: Text):
+        """
+        Run a stage, or restore its outputs from the stage cache.
+
+        Parameters:
+        - stage (str): Name of the stage.
+        """
+        if self.cache is None:
+            getattr(self, stage)()
+            return
+
+        spec = self.stage_spec(stage)
+        key = self.cache.key(spec['deps'], spec['params'], spec['sources'])
+        if self.cache.restore(stage, key, spec['outs']):
+            # Later stages read the restored outputs from disk
+            for attribute in STAGE_RESULTS[stage]:
+                setattr(self, attribute, None)
+            return
+
+        getattr(self, stage)()
+        self.cache.store(stage, key, spec['outs'])
+
+    def stage_spec(self, stage: Text) -> Dict[Text, List]:
+        """
+        Get the input data, params, sources and outputs of a stage, as declared in dvc.yaml.
+
+        Parameters:
+        - stage (str): Name of the stage.
+
+        Returns:
+        - dict: Lists of 'deps', 'sources' and 'outs' paths and the 'params' subtree.
+        """
+        base = self.config['base']
+        process = self.config['data_process']
+        split = self.config['data_split']
+        train = self.config['train']
+        evaluate = self.config['evaluate']
+        monitor = self.config['monitor']
+        # Only XGBoost models trained outside a tournament have a forest
+        forest = [train['forest_path'], meta_path(train['forest_path'])] if exports_forest(self.config) else []
+        specs = {
+            'data_process': {
+                'deps': [process['load_path']],
+                'params': {'base.data_format': base['data_format'], 'data_process': process,
+                           'train.target': train['target']},
+                'outs': [process['save_path'], process['artifact_path']],
+            },
+            'data_split': {
+                'deps': [process['save_path']],
+                'params': {'base': base, 'data_split': split, 'train.target': train['target']},
+                'outs': [split['trainset_path'], split['testset_path']],
+            },
+            'train_model': {
+                'deps': [split['trainset_path']],
+                'params': {'base': base, 'train': train, 'monitor.n_bins': monitor['n_bins'],
+                           'monitor.reference_path': monitor['reference_path']},
+                'outs': [train['model_path'], model_meta_path(train['model_path']),
+                         train['search_report'], monitor['reference_path']] + forest,
+            },
+            'evaluate': {
+                'deps': [split['testset_path'], train['model_path'],
+                         model_meta_path(train['model_path'])] + forest,
+                'params': {'base': base, 'evaluate': evaluate, 'reasons': self.config['reasons'],
+                           'train.target': train['target']},
+                'outs': [evaluate['metrics_file'], evaluate['confusion_matrix_data']],
+            },
+            'monitor': {
+                'deps': [monitor['data_path'], monitor['reference_path'], train['model_path'],
+                         model_meta_path(train['model_path'])] + forest,
+                'params': {'base': base, 'monitor': monitor, 'train.target': train['target']},
+                'outs': [monitor['metrics_file'], monitor['features_file']],
+            },
+        }
+        if process.get('compact_dtypes'):
+            specs['data_process']['outs'].append(process['memory_report'])
+        if train['tournament']['enabled']:
+            specs['train_model']['outs'].append(train['tournament']['leaderboard'])
+        if evaluate['render_confusion_matrix']:
+            specs['evaluate']['outs'].append(evaluate['confusion_matrix_image'])
+        if evaluate['threshold_sweep']['enabled']:
+            specs['evaluate']['outs'].append(evaluate['threshold_sweep']['metrics_file'])
+        if evaluate['reason_codes_file']:
+            specs['evaluate']['outs'].append(evaluate['reason_codes_file'])
+        spec = specs[stage]
+        spec['sources'] = [str(SRC_DIR / source) for source in STAGE_SOURCES[stage]]
+        return spec
+
+    def data_process(self):
+        """
+        Prepare the raw data, keeping it in memory unless streaming is configured.
+        """
+        data_preparer = DataPrep(config_path=self.config_path)
+        if self.config['data_process'].get('chunksize'):
+            # Streaming never holds the whole prepared dataset, so it is always saved
+            data_preparer.fit_vocabularies()
+            data_preparer.stream_prepdata()
+            data_preparer.save_artifact()
+            if self.config['data_process'].get('compact_dtypes'):
+                data_preparer.save_memory_report()
+            self.dataset = None
+            return
+
+        data_preparer.load_data()
+        data_preparer.encoder()
+        data_preparer.loan_grade_prep()
+        data_preparer.default_onfile_prep()
+        if self.config['data_process'].get('compact_dtypes'):
+            data_preparer.apply_schema()
+        data_preparer.subs_char_names()
+        if self.persist:
+            data_preparer.save_prepdata()
+            data_preparer.save_artifact()
+            if self.config['data_process'].get('compact_dtypes'):
+                data_preparer.save_memory_report()
+        self.dataset = data_preparer.get_prepdata()
+
+    def data_split(self):
+        """
+        Split the prepared data into training and test sets.
+        """
+        data_spliter = DataSplit(config_path=self.config_path)
+        split_config = self.config['data_split']
+        if self.dataset is None and split_config['method'] == 'hash' and split_config['chunksize']:
+            # Streaming never holds the whole dataset, so both sets are always saved
+            data_spliter.stream_split()
+            self.train_dataset = self.test_dataset = None
+            return
+        if self.dataset is None:
+            data_spliter.load_data()
+        else:
+            data_spliter.dataset = self.dataset
+        data_spliter.data_split()
+        if self.persist:
+            data_spliter.save_sets()
+        self.train_dataset = data_spliter.train_dataset
+        self.test_dataset = data_spliter.test_dataset
+
+    def train_model(self):
+        """
+        Train the model on the training set.
+        """
+        trainer = TrainModel(config_path=self.config_path)
+        trainer.get_estimator()
+        if self.train_dataset is None:
+            trainer.load_traindata()
+        else:
+            trainer.train_df = self.train_dataset
+        tournament = self.config['train']['tournament']['enabled']
+        if tournament:
+            trainer.run_tournament()
+        else:
+            trainer.train_model()
+        trainer.sketch_traindata()
+        if self.persist:
+            trainer.save_model()
+            trainer.save_search_report()
+            if tournament:
+                trainer.save_leaderboard()
+            trainer.save_forest()
+            trainer.save_drift_reference()
+        self.model = trainer.model
+        self.drift_reference = trainer.drift_reference
+
+    def evaluate(self):
+        """
+        Evaluate the model on the test set and write the reports.
+        """
+        evaluater = EvaluateModel(config_path=self.config_path)
+        if self.test_dataset is None or self.model is None:
+            evaluater.load_model_data()
+        if self.test_dataset is not None:
+            evaluater.test_df = self.test_dataset
+        if self.model is not None:
+            evaluater.model = self.model
+        evaluater.run_model()
+        evaluater.get_scores()
+        evaluater.write_threshold_metrics()
+        evaluater.write_reason_codes()
+        evaluater.write_confusion_matrix_data()
+        evaluater.save_confusion_matrix()
+
+    def monitor(self):
+        """
+        Compare the new data with the training data and write the drift reports.
+        """
+        drift_monitor = DriftMonitor(config_path=self.config_path)
+        if self.drift_reference is None:
+            drift_monitor.load_reference()
+        else:
+            drift_monitor.reference = self.drift_reference
+        # The test set stands in for new data when it is the configured data path
+        data = None
+        if self.config['monitor']['data_path'] == self.config['data_split']['testset_path']:
+            data = self.test_dataset
+        drift_monitor.sketch_data(model=self.model, data=data)
+        drift_monitor.save_metrics()
+
+
+if __name__ == '__main__':
+    args_parser = argparse.ArgumentParser()
+    args_parser.add_argument('--config', dest='config', required=True)
+    args_parser.add_argument('--from', dest='start', choices=STAGES, default=STAGES[0])
+    args_parser.add_argument('--to', dest='end', choices=STAGES, default=STAGES[-1])
+    args_parser.add_argument('--no-persist', dest='persist', action='store_false',
+                             help='keep intermediate results in memory only')
+    args_parser.add_argument('--no-cache', dest='use_cache', action='store_false',
+                             help='run every stage even if the stage cache has its outputs')
+    args = args_parser.parse_args()
+    if STAGES.index(args.start) > STAGES.index(args.end):
+        args_parser.error(f'--from {args.start} comes after --to {args.end}')
+
+    # Create an instance of Pipeline
+    pipeline = Pipeline(config_path=args.config, persist=args.persist, use_cache=args.use_cache)
+
+    # Run the selected stages
+    pipeline.run(start=args.start, end=args.end)
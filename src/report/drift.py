@@ -0,0 +1,198 @@
+"""Provides mergeable histogram sketches of feature distributions and drift statistics."""
+
+import json
+import numpy as np
+import pandas as pd
+from pathlib import Path
+from typing import Dict, Text
+
+
+class HistogramSketch:
+    """
+    Fixed-bin histograms of several columns, mergeable by adding their counts.
+
+    The bins of a column are set by its sorted cut points c_0 < ... < c_k-1: bin 0 holds
+    values up to c_0, bin i values in (c_i-1, c_i], bin k values above c_k-1 and a last
+    bin missing values. Cut points are the distinct reference values of columns with
+    few of them, and reference quantiles otherwise. Sketches sharing cut points can be
+    built on any chunks of data, in any process, and merged into the sketch of all of them.
+
+    Parameters:
+    - cuts (Dict[str, np.ndarray]): Cut points of each column.
+
+    Attributes:
+    - cuts (Dict[str, np.ndarray]): Cut points of each column.
+    - counts (Dict[str, np.ndarray]): Count of each bin, the missing values last.
+
+    Methods:
+    - from_data(): Sketch a DataFrame with cut points taken from it.
+    - update(): Add the values of a chunk to the counts.
+    - same_bins(): Whether another sketch has the same columns and cut points.
+    - merge(): Sketch of the data of two sketches.
+    - save(): Save the sketch as JSON.
+    - load(): Load a sketch saved by save().
+    """
+
+    def __init__(self, cuts: Dict):
+        self.cuts = {column: np.asarray(column_cuts, dtype='float64') for column, column_cuts in cuts.items()}
+        self.counts = {column: np.zeros(len(column_cuts) + 2, dtype='int64')
+                       for column, column_cuts in self.cuts.items()}
+
+    @classmethod
+    def from_data(cls, df: pd.DataFrame, n_bins: int) -> 'HistogramSketch':
+        """
+        Sketch a DataFrame with cut points taken from it.
+
+        Args:
+        - df (pd.DataFrame): Reference data; every column is sketched.
+        - n_bins (int): Bins of continuous columns, between quantiles of equal mass.
+
+        Returns:
+        - HistogramSketch: The sketch of df.
+        """
+        cuts = {}
+        for column in df.columns:
+            values = df[column].to_numpy(dtype='float64')
+            values = values[~np.isnan(values)]
+            distinct = np.unique(values)
+            if len(distinct) <= n_bins:
+                cuts[column] = distinct
+            else:
+                cuts[column] = np.unique(np.quantile(values, np.linspace(0, 1, n_bins + 1)[1:-1]))
+        sketch = cls(cuts)
+        sketch.update(df)
+        return sketch
+
+    def update(self, df: pd.DataFrame):
+        """
+        Add the values of a chunk to the counts.
+
+        Args:
+        - df (pd.DataFrame): Chunk holding every sketched column.
+        """
+        for column, cuts in self.cuts.items():
+            values = df[column].to_numpy(dtype='float64')
+            bins = np.searchsorted(cuts, values, side='left')
+            bins[np.isnan(values)] = len(cuts) + 1
+            self.counts[column] += np.bincount(bins, minlength=len(cuts) + 2)
+
+    def same_bins(self, other: 'HistogramSketch') -> bool:
+        """
+        Whether another sketch has the same columns and cut points.
+
+        Args:
+        - other (HistogramSketch): The sketch to compare with.
+
+        Returns:
+        - bool: True when the counts of both sketches refer to the same bins.
+        """
+        return self.cuts.keys() == other.cuts.keys() and all(
+            np.array_equal(cuts, other.cuts[column]) for column, cuts in self.cuts.items())
+
+    def merge(self, other: 'HistogramSketch') -> 'HistogramSketch':
+        """
+        Sketch of the data of two sketches with the same cut points.
+
+        Args:
+        - other (HistogramSketch): The sketch to merge with.
+
+        Returns:
+        - HistogramSketch: A new sketch with the counts of both.
+        """
+        if not self.same_bins(other):
+            raise ValueError('Only sketches with the same columns and cut points can be merged')
+        merged = HistogramSketch(self.cuts)
+        for column in self.cuts:
+            merged.counts[column] = self.counts[column] + other.counts[column]
+        return merged
+
+    def save(self, path: Text):
+        """
+        Save the sketch as JSON.
+
+        Args:
+        - path (str): The JSON file path.
+        """
+        sketch = {column: {'cuts': self.cuts[column].tolist(), 'counts': self.counts[column].tolist()}
+                  for column in self.cuts}
+        Path(path).write_text(json.dumps(sketch))
+
+    @classmethod
+    def load(cls, path: Text) -> 'HistogramSketch':
+        """
+        Load a sketch saved by save().
+
+        Args:
+        - path (str): The JSON file path.
+
+        Returns:
+        - HistogramSketch: The sketch.
+        """
+        columns = json.loads(Path(path).read_text())
+        sketch = cls({column: values['cuts'] for column, values in columns.items()})
+        for column, values in columns.items():
+            sketch.counts[column] = np.asarray(values['counts'], dtype='int64')
+        return sketch
+
+
+def psi(expected: np.ndarray, actual: np.ndarray, epsilon: float = 1e-4) -> float:
+    """
+    Population stability index between two histograms with the same bins.
+
+    Args:
+    - expected (np.ndarray): Bin counts of the reference population.
+    - actual (np.ndarray): Bin counts of the new population.
+    - epsilon (float): Smallest bin share, so that empty bins give a finite index.
+
+    Returns:
+    - float: Sum over bins of (actual share - expected share) * ln(actual / expected share).
+    """
+    p = np.maximum(expected / max(expected.sum(), 1), epsilon)
+    q = np.maximum(actual / max(actual.sum(), 1), epsilon)
+    return float(np.sum((q - p) * np.log(q / p)))
+
+
+def ks(expected: np.ndarray, actual: np.ndarray) -> float:
+    """
+    Kolmogorov-Smirnov statistic between two histograms of non-missing values.
+
+    Distribution functions are only compared at the bin edges, so this is a lower bound
+    of the statistic on the raw values, exact for columns binned by their distinct values.
+
+    Args:
+    - expected (np.ndarray): Bin counts of the reference population, missing values last.
+    - actual (np.ndarray): Bin counts of the new population, missing values last.
+
+    Returns:
+    - float: Largest distance between the cumulative shares; NaN without values.
+    """
+    expected, actual = expected[:-1], actual[:-1]
+    if not expected.sum() or not actual.sum():
+        return float('nan')
+    return float(np.max(np.abs(np.cumsum(expected) / expected.sum() - np.cumsum(actual) / actual.sum())))
+
+
+def drift_statistics(reference: HistogramSketch, sketch: HistogramSketch) -> pd.DataFrame:
+    """
+    PSI, KS and missing rates of every column of a sketch against its reference.
+
+    Args:
+    - reference (HistogramSketch): Sketch of the reference population.
+    - sketch (HistogramSketch): Sketch of the new population, with the same cut points.
+
+    Returns:
+    - pd.DataFrame: One row per column with column, psi, ks, rows, missing_rate and
+      reference_missing_rate, by decreasing psi.
+    """
+    if not reference.same_bins(sketch):
+        raise ValueError('The sketch was not built with the cut points of the reference')
+    rows = []
+    for column, expected in reference.counts.items():
+        actual = sketch.counts[column]
+        rows.append({'column': column,
+                     'psi': psi(expected, actual),
+                     'ks': ks(expected, actual),
+                     'rows': int(actual.sum()),
+                     'missing_rate': actual[-1] / max(actual.sum(), 1),
+                     'reference_missing_rate': expected[-1] / max(expected.sum(), 1)})
+    return pd.DataFrame(rows).sort_values('psi', ascending=False, ignore_index=True)
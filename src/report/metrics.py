@@ -0,0 +1,108 @@
+import numpy as np
+import pandas as pd
+
+
+def macro_f1(cm: np.ndarray) -> float:
+    """
+    Macro-averaged F1 score from a confusion matrix, as sklearn's f1_score(average='macro').
+
+    Args:
+    - cm (np.ndarray): Confusion matrix, actual classes in rows and predicted in columns.
+
+    Returns:
+    - float: The unweighted mean of the F1 score of each class present in the actual or
+      predicted classes.
+    """
+    tp = np.diag(cm)
+    # 2 tp + fp + fn, the predicted plus actual count of each class
+    total = cm.sum(axis=0) + cm.sum(axis=1)
+    present = total > 0
+    return float(np.mean(2 * tp[present] / total[present]))
+
+
+def ranking_metrics(y_true: np.ndarray, probability: np.ndarray) -> dict:
+    """
+    ROC-AUC, PR-AUC, KS and Gini from a single sort of the scores.
+
+    Args:
+    - y_true (np.ndarray): Actual classes, 1 for default.
+    - probability (np.ndarray): Predicted probability of default.
+
+    Returns:
+    - dict: 'roc_auc', 'pr_auc' (average precision), 'ks' and 'gini', all NaN when
+      y_true holds a single class.
+    """
+    # Cumulative sums of unsigned labels would turn the counts below into floats
+    y_true = np.asarray(y_true, dtype='int64')
+    if len(np.unique(y_true)) < 2:
+        return {'roc_auc': np.nan, 'pr_auc': np.nan, 'ks': np.nan, 'gini': np.nan}
+    order = np.argsort(-probability, kind='mergesort')
+    scores, y_sorted = probability[order], y_true[order]
+    # Last position of each distinct score: cutoffs predicting default for score >= it
+    last = np.r_[np.flatnonzero(np.diff(scores)), len(scores) - 1]
+    tp = np.cumsum(y_sorted)[last]
+    fp = last + 1 - tp
+    positives, negatives = tp[-1], fp[-1]
+
+    tpr = np.r_[0, tp / positives]
+    fpr = np.r_[0, fp / negatives]
+    precision = tp / (tp + fp)
+    roc_auc = float(np.sum(np.diff(fpr) * (tpr[1:] + tpr[:-1]) / 2))
+    return {
+        'roc_auc': roc_auc,
+        'pr_auc': float(np.sum(np.diff(tpr) * precision)),
+        'ks': float(np.max(tpr - fpr)),
+        'gini': 2 * roc_auc - 1,
+    }
+
+
+def threshold_sweep(y_true: np.ndarray, probability: np.ndarray, thresholds: np.ndarray,
+                    exposure: np.ndarray = None, loss_given_default: float = 1.0) -> pd.DataFrame:
+    """
+    Confusion matrix and credit policy metrics at every threshold from a single sort.
+
+    Applications with a probability above the threshold are predicted to default and
+    declined, the rest are approved. Counts at each threshold are read from cumulative
+    sums of the sorted labels, so the cost is O(n log n + k log n) for k thresholds.
+
+    Args:
+    - y_true (np.ndarray): Actual classes, 1 for default.
+    - probability (np.ndarray): Predicted probability of default.
+    - thresholds (np.ndarray): Cutoffs to report.
+    - exposure (np.ndarray): Amount lent to each application; None counts applications.
+    - loss_given_default (float): Share of the exposure lost when a loan defaults.
+
+    Returns:
+    - pd.DataFrame: One row per threshold with tp, fp, tn, fn, precision, recall, f1,
+      approval_rate and expected_loss, the loss on approved applications that default.
+    """
+    # Cumulative sums of unsigned labels would turn the counts below into floats
+    y_true = np.asarray(y_true, dtype='int64')
+    order = np.argsort(probability, kind='mergesort')
+    scores, y_sorted = probability[order], y_true[order]
+    exposure = np.ones(len(scores)) if exposure is None else np.asarray(exposure, dtype='float64')[order]
+    cum_defaults = np.r_[0, np.cumsum(y_sorted)]
+    cum_loss = np.r_[0, np.cumsum(y_sorted * exposure)]
+
+    approved = np.searchsorted(scores, thresholds, side='right')
+    fn = cum_defaults[approved]
+    tn = approved - fn
+    tp = cum_defaults[-1] - fn
+    fp = len(scores) - approved - tp
+    with np.errstate(divide='ignore', invalid='ignore'):
+        precision = np.where(tp + fp > 0, tp / (tp + fp), 0.0)
+        recall = np.where(tp + fn > 0, tp / (tp + fn), 0.0)
+        f1 = np.where(precision + recall > 0, 2 * precision * recall / (precision + recall), 0.0)
+
+    return pd.DataFrame({
+        'threshold': thresholds,
+        'tp': tp,
+        'fp': fp,
+        'tn': tn,
+        'fn': fn,
+        'precision': precision,
+        'recall': recall,
+        'f1': f1,
+        'approval_rate': approved / len(scores),
+        'expected_loss': loss_given_default * cum_loss[approved],
+    })
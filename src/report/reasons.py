@@ -0,0 +1,148 @@
+"""Provides batch reason codes from the per-feature contributions of a booster."""
+
+import numpy as np
+import pandas as pd
+from typing import Dict, List, Text, Tuple
+
+from src.stages.data_prep import source_variables
+from src.train.model_io import load_model
+
+
+class ReasonCoder:
+    """
+    ReasonCoder class for finding the top reasons behind the default score of each row.
+
+    Contributions are the booster's native per-feature contributions to the margin
+    (exact TreeSHAP, or Saabas with approximate), computed batch by batch and summed
+    over the columns of each source variable with one matrix product, so that every
+    one-hot indicator of a categorical variable counts as that variable. Reasons are the
+    source variables with the largest positive contributions, i.e. those pushing the
+    row towards default the most.
+
+    Parameters:
+    - booster (xgb.Booster): The trained booster.
+    - feature_names (List[str]): The model's input columns, in order.
+    - sources (List[str]): Source variable of each input column; None leaves a column
+      out of the reasons.
+    - top_k (int): Reasons per row.
+    - batch_size (int): Rows per contribution batch.
+    - approximate (bool): Use the faster Saabas contributions instead of TreeSHAP.
+
+    Attributes:
+    - reasons (List[str]): Source variable names, the categories of the reason columns.
+
+    Methods:
+    - contributions(): Contribution of each source variable to the margin of each row.
+    - top_reasons(): Codes and contributions of the top reasons of each row.
+    - reasons_frame(): Top reasons as reason_i and contribution_i columns.
+    """
+
+    def __init__(self, booster, feature_names: List[Text], sources: List[Text], top_k: int,
+                 batch_size: int = 100000, approximate: bool = False):
+        self.booster = booster
+        self.top_k = top_k
+        self.batch_size = batch_size
+        self.approximate = approximate
+        self.reasons = list(dict.fromkeys(source for source in sources if source is not None))
+        # Sums contribution columns by source variable; the last row, the bias, maps to none
+        self.grouping = np.zeros((len(feature_names) + 1, len(self.reasons)), dtype='float32')
+        for i, source in enumerate(sources):
+            if source is not None:
+                self.grouping[i, self.reasons.index(source)] = 1
+
+    def contributions(self, X: np.ndarray) -> np.ndarray:
+        """
+        Contribution of each source variable to the margin of each row.
+
+        Args:
+        - X (np.ndarray): Features, in the order of feature_names.
+
+        Returns:
+        - np.ndarray: (rows, len(reasons)) float32 contributions.
+        """
+        import xgboost as xgb
+
+        contributions = np.empty((len(X), len(self.reasons)), dtype='float32')
+        for start in range(0, len(X), self.batch_size):
+            batch = xgb.DMatrix(np.asarray(X[start:start + self.batch_size], dtype='float32'))
+            features = self.booster.predict(batch, pred_contribs=True, approx_contribs=self.approximate)
+            contributions[start:start + self.batch_size] = features @ self.grouping
+        return contributions
+
+    def top_reasons(self, X: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        Codes and contributions of the top reasons of each row, by decreasing contribution.
+
+        Args:
+        - X (np.ndarray): Features, in the order of feature_names.
+
+        Returns:
+        - Tuple[np.ndarray, np.ndarray]: (rows, top_k) indices into reasons, -1 where a row
+          has fewer positive contributions, and the float32 contributions, NaN there.
+        """
+        contributions = self.contributions(X)
+        k = min(self.top_k, len(self.reasons))
+        # Unordered top k of each row in linear time, then only those k are sorted
+        top = np.argpartition(-contributions, k - 1, axis=1)[:, :k]
+        values = np.take_along_axis(contributions, top, axis=1)
+        order = np.argsort(-values, axis=1, kind='stable')
+        codes = np.take_along_axis(top, order, axis=1)
+        values = np.take_along_axis(values, order, axis=1)
+
+        positive = values > 0
+        codes = np.where(positive, codes, -1)
+        values = np.where(positive, values, np.nan).astype('float32')
+        if k < self.top_k:
+            codes = np.pad(codes, ((0, 0), (0, self.top_k - k)), constant_values=-1)
+            values = np.pad(values, ((0, 0), (0, self.top_k - k)), constant_values=np.nan)
+        return codes, values
+
+    def reasons_frame(self, X: np.ndarray, rows: np.ndarray = None) -> pd.DataFrame:
+        """
+        Top reasons as categorical reason_i and float32 contribution_i columns.
+
+        Args:
+        - X (np.ndarray): Features, in the order of feature_names.
+        - rows (np.ndarray): Boolean mask of the rows to explain, e.g. declined
+          applications; the others get no reasons. None explains every row.
+
+        Returns:
+        - pd.DataFrame: One row per row of X, reason_1 being the strongest.
+        """
+        codes = np.full((len(X), self.top_k), -1, dtype='int64')
+        values = np.full((len(X), self.top_k), np.nan, dtype='float32')
+        if rows is None:
+            codes, values = self.top_reasons(X)
+        elif rows.any():
+            codes[rows], values[rows] = self.top_reasons(X[rows])
+
+        columns = {}
+        for i in range(self.top_k):
+            columns[f'reason_{i + 1}'] = pd.Categorical.from_codes(codes[:, i], categories=self.reasons)
+            columns[f'contribution_{i + 1}'] = values[:, i]
+        return pd.DataFrame(columns)
+
+
+def reason_coder_from_config(config: Dict, model, feature_columns: List[Text]) -> ReasonCoder:
+    """
+    Reason coder of a model, configured by the reasons section of the config.
+
+    The NumPy forest has no contributions, so a model without a booster is replaced by
+    the booster saved at train.model_path.
+
+    Args:
+    - config (Dict): The configuration.
+    - model: The model in use, a booster wrapper or the NumPy forest.
+    - feature_columns (List[str]): The model's input columns, in order.
+
+    Returns:
+    - ReasonCoder: The reason coder of the booster.
+    """
+    if not hasattr(model, 'get_booster'):
+        model = load_model(config['train']['model_path'])
+    if not hasattr(model, 'get_booster'):
+        raise ValueError('Reason codes need an XGBoost model')
+    reasons = config['reasons']
+    return ReasonCoder(model.get_booster(), list(feature_columns), source_variables(feature_columns),
+                       top_k=reasons['top_k'], batch_size=reasons['batch_size'],
+                       approximate=reasons['approximate'])
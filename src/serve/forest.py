@@ -0,0 +1,252 @@
+"""Provides a pure-NumPy predictor for trained XGBoost binary classifiers.
+
+Importing this module only needs numpy, so scoring with an exported forest starts
+without importing xgboost or sklearn or loading the saved booster.
+"""
+
+import argparse
+import json
+import numpy as np
+from pathlib import Path
+from typing import Dict, Text
+import yaml
+
+NODE_DTYPE = np.dtype([
+    ('feature', 'int32'),       # split feature, -1 for leaves
+    ('threshold', 'float32'),   # go left when x < threshold
+    ('left', 'int32'),
+    ('right', 'int32'),
+    ('default_left', 'bool'),   # branch taken by missing values
+    ('value', 'float32'),       # leaf value
+])
+
+
+def get_booster(model):
+    """
+    Get the XGBoost booster of a trained model.
+
+    Args:
+    - model: A search object with best_estimator_, an XGBClassifier or a Booster.
+
+    Returns:
+    - xgboost.Booster: The booster.
+    """
+    model = getattr(model, 'best_estimator_', model)
+    return model.get_booster() if hasattr(model, 'get_booster') else model
+
+
+def export_forest(model, path: Text):
+    """
+    Flatten the trees of a trained XGBoost binary classifier into a node table.
+
+    Writes a (n_trees, max_nodes) structured array of NODE_DTYPE to path (.npy) and the
+    base margin and depth to the JSON file given by meta_path().
+
+    Args:
+    - model: Trained model accepted by get_booster().
+    - path (str): The .npy file path.
+    """
+    booster = get_booster(model)
+    learner = json.loads(booster.save_raw(raw_format='json'))['learner']
+    if learner['objective']['name'] != 'binary:logistic':
+        raise ValueError(f"Unsupported objective {learner['objective']['name']}")
+
+    trees = learner['gradient_booster']['model']['trees']
+    max_nodes = max(len(tree['left_children']) for tree in trees)
+    nodes = np.zeros((len(trees), max_nodes), dtype=NODE_DTYPE)
+    max_depth = 0
+    for t, tree in enumerate(trees):
+        left = np.array(tree['left_children'], dtype='int32')
+        n = len(left)
+        is_leaf = left == -1
+        conditions = np.array(tree['split_conditions'], dtype='float32')
+        nodes['feature'][t, :n] = np.where(is_leaf, -1, tree['split_indices'])
+        nodes['threshold'][t, :n] = np.where(is_leaf, 0, conditions)
+        nodes['left'][t, :n] = left
+        nodes['right'][t, :n] = tree['right_children']
+        nodes['default_left'][t, :n] = np.array(tree['default_left'], dtype=bool)
+        nodes['value'][t, :n] = np.where(is_leaf, conditions, 0)
+        max_depth = max(max_depth, tree_depth(left, tree['right_children']))
+
+    # The base score is stored as a probability, e.g. '[2.175E-1]'
+    base_score = float(learner['learner_model_param']['base_score'].strip('[]'))
+    np.save(path, nodes)
+    meta = {
+        'base_margin': float(np.log(base_score / (1 - base_score))),
+        'n_features': int(learner['learner_model_param']['num_feature']),
+        'max_depth': max_depth,
+    }
+    Path(meta_path(path)).write_text(json.dumps(meta, indent=2))
+
+
+def meta_path(path: Text) -> Text:
+    """
+    Path of the JSON file written next to an exported node table.
+
+    Args:
+    - path (str): The .npy file path.
+
+    Returns:
+    - str: The same path with a .json suffix.
+    """
+    return str(Path(path).with_suffix('.json'))
+
+
+def exports_forest(config: Dict) -> bool:
+    """
+    Whether the training stage exports the trained model as a NumPy forest.
+
+    Only XGBoost models have trees to export, and the winner of a tournament is only
+    known once trained, so tournaments export no forest.
+
+    Args:
+    - config (dict): The configuration.
+
+    Returns:
+    - bool: True when train.forest_path is written by the training stage.
+    """
+    train = config['train']
+    return train['estimator_name'] == 'xgb' and not train['tournament']['enabled']
+
+
+def load_forest(config: Dict) -> 'NumpyForest':
+    """
+    Load the forest exported by the training stage.
+
+    Args:
+    - config (dict): The configuration.
+
+    Returns:
+    - NumpyForest: The forest at train.forest_path.
+    """
+    if not exports_forest(config):
+        raise ValueError('use_forest needs an xgb model trained outside a tournament')
+    return NumpyForest.load(config['train']['forest_path'])
+
+
+def tree_depth(left, right) -> int:
+    """
+    Depth of a tree given its child arrays.
+
+    Args:
+    - left (list): Left child of each node, -1 for leaves.
+    - right (list): Right child of each node, -1 for leaves.
+
+    Returns:
+    - int: Number of splits on the longest root-to-leaf path.
+    """
+    depth = np.zeros(len(left), dtype='int32')
+    for node in range(len(left)):
+        if left[node] != -1:
+            depth[left[node]] = depth[right[node]] = depth[node] + 1
+    return int(depth.max())
+
+
+class NumpyForest:
+    """
+    NumpyForest class for predicting with an exported XGBoost binary classifier.
+
+    All rows descend all trees together, one level per step, using vectorized
+    lookups into the node table; rows are processed in batches to bound memory.
+
+    Parameters:
+    - nodes (np.ndarray): Node table of NODE_DTYPE, one row per tree.
+    - base_margin (float): Margin added to the sum of leaf values.
+    - max_depth (int): Depth of the deepest tree.
+    - batch_size (int): Rows predicted at a time.
+
+    Methods:
+    - load(): Load an exported forest, memory-mapping the node table.
+    - predict_margin(): Predict raw margins.
+    - predict_proba(): Predict class probabilities, like XGBClassifier.
+    - predict(): Predict classes, like XGBClassifier.
+    """
+
+    def __init__(self, nodes: np.ndarray, base_margin: float, max_depth: int, batch_size: int = 10000):
+        self.nodes = nodes
+        self.base_margin = base_margin
+        self.max_depth = max_depth
+        self.batch_size = batch_size
+
+    @classmethod
+    def load(cls, path: Text, batch_size: int = 10000):
+        """
+        Load an exported forest, memory-mapping the node table.
+
+        Args:
+        - path (str): The .npy file written by export_forest().
+        - batch_size (int): Rows predicted at a time.
+
+        Returns:
+        - NumpyForest: The loaded forest.
+        """
+        meta = json.loads(Path(meta_path(path)).read_text())
+        return cls(np.load(path, mmap_mode='r'), meta['base_margin'], meta['max_depth'], batch_size)
+
+    def _margin(self, X: np.ndarray) -> np.ndarray:
+        n_trees = self.nodes.shape[0]
+        feature, threshold = self.nodes['feature'], self.nodes['threshold']
+        left, right, default_left = self.nodes['left'], self.nodes['right'], self.nodes['default_left']
+        trees = np.arange(n_trees)[None, :]
+        rows = np.arange(len(X))[:, None]
+        node = np.zeros((len(X), n_trees), dtype='int32')
+        for _ in range(self.max_depth):
+            split = feature[trees, node]
+            value = X[rows, np.maximum(split, 0)]
+            go_left = np.where(np.isnan(value), default_left[trees, node], value < threshold[trees, node])
+            child = np.where(go_left, left[trees, node], right[trees, node])
+            # Leaves stay where they are
+            node = np.where(split < 0, node, child)
+        return self.nodes['value'][trees, node].sum(axis=1, dtype='float32') + np.float32(self.base_margin)
+
+    def predict_margin(self, X: np.ndarray) -> np.ndarray:
+        """
+        Predict raw margins.
+
+        Args:
+        - X (np.ndarray): Features, in the column order the model was trained on.
+
+        Returns:
+        - np.ndarray: Margin of each row.
+        """
+        X = np.asarray(X, dtype='float32')
+        return np.concatenate([self._margin(X[start:start + self.batch_size])
+                               for start in range(0, len(X), self.batch_size)] or [np.zeros(0, 'float32')])
+
+    def predict_proba(self, X: np.ndarray) -> np.ndarray:
+        """
+        Predict class probabilities.
+
+        Args:
+        - X (np.ndarray): Features, in the column order the model was trained on.
+
+        Returns:
+        - np.ndarray: Probabilities of both classes, one row per sample.
+        """
+        positive = 1 / (1 + np.exp(-self.predict_margin(X)))
+        return np.column_stack([1 - positive, positive])
+
+    def predict(self, X: np.ndarray) -> np.ndarray:
+        """
+        Predict classes.
+
+        Args:
+        - X (np.ndarray): Features, in the column order the model was trained on.
+
+        Returns:
+        - np.ndarray: Predicted class of each sample.
+        """
+        return (self.predict_proba(X)[:, 1] > 0.5).astype('int64')
+
+
+if __name__ == '__main__':
+    args_parser = argparse.ArgumentParser()
+    args_parser.add_argument('--config', dest='config', required=True)
+    args = args_parser.parse_args()
+
+    with open(args.config) as conf_file:
+        config = yaml.safe_load(conf_file)
+
+    # Export the trained model's trees
+    from src.train.model_io import load_model
+    export_forest(load_model(config['train']['model_path']), config['train']['forest_path'])
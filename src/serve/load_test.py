@@ -0,0 +1,100 @@
+import argparse
+from concurrent.futures import ThreadPoolExecutor
+import http.client
+import json
+import numpy as np
+import pandas as pd
+import time
+from typing import Dict, List, Text
+from urllib.parse import urlparse
+
+
+def load_records(path: Text, n_records: int) -> List[Dict]:
+    """
+    Load raw applications to send, as JSON-ready records.
+
+    Args:
+    - path (str): CSV file of raw applications.
+    - n_records (int): Maximum number of distinct applications to load.
+
+    Returns:
+    - List[Dict]: Applications keyed by raw column name, missing values as None.
+    """
+    df = pd.read_csv(path, nrows=n_records)
+    return json.loads(df.to_json(orient='records'))
+
+
+def run_client(url: Text, records: List[Dict], n_requests: int) -> List[float]:
+    """
+    Send scoring requests over one keep-alive connection.
+
+    Args:
+    - url (str): Base URL of the scoring server.
+    - records (List[Dict]): Applications to send, cycled through.
+    - n_requests (int): Number of requests to send.
+
+    Returns:
+    - List[float]: Latency of each request in seconds.
+    """
+    parsed = urlparse(url)
+    connection = http.client.HTTPConnection(parsed.hostname, parsed.port)
+    latencies = []
+    for i in range(n_requests):
+        # Bytes let http.client send headers and body in one packet
+        body = json.dumps(records[i % len(records)]).encode()
+        started = time.perf_counter()
+        connection.request('POST', '/score', body=body, headers={'Content-Type': 'application/json'})
+        response = connection.getresponse()
+        response.read()
+        latencies.append(time.perf_counter() - started)
+        if response.status != 200:
+            raise RuntimeError(f'Request failed with status {response.status}')
+    connection.close()
+    return latencies
+
+
+def load_test(url: Text, records: List[Dict], n_requests: int, concurrency: int) -> Dict:
+    """
+    Drive the scoring server with concurrent clients and measure client-side latency.
+
+    Args:
+    - url (str): Base URL of the scoring server.
+    - records (List[Dict]): Applications to send.
+    - n_requests (int): Total number of requests.
+    - concurrency (int): Number of concurrent clients.
+
+    Returns:
+    - Dict: Client-side throughput and latency percentiles, and the server metrics.
+    """
+    per_client = [n_requests // concurrency + (i < n_requests % concurrency) for i in range(concurrency)]
+    started = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=concurrency) as executor:
+        results = list(executor.map(lambda n: run_client(url, records, n), per_client))
+    elapsed = time.perf_counter() - started
+
+    latencies = np.concatenate([np.array(result) for result in results]) * 1000
+    parsed = urlparse(url)
+    connection = http.client.HTTPConnection(parsed.hostname, parsed.port)
+    connection.request('GET', '/metrics')
+    server_metrics = json.loads(connection.getresponse().read())
+    return {
+        'requests': len(latencies),
+        'concurrency': concurrency,
+        'throughput_rps': len(latencies) / elapsed,
+        'p50_ms': float(np.percentile(latencies, 50)),
+        'p99_ms': float(np.percentile(latencies, 99)),
+        'server': server_metrics,
+    }
+
+
+if __name__ == '__main__':
+    args_parser = argparse.ArgumentParser()
+    args_parser.add_argument('--url', dest='url', default='http://127.0.0.1:8080')
+    args_parser.add_argument('--data', dest='data', required=True,
+                             help='CSV file of raw applications to send')
+    args_parser.add_argument('--requests', dest='requests', type=int, default=10000)
+    args_parser.add_argument('--concurrency', dest='concurrency', type=int, default=32)
+    args = args_parser.parse_args()
+
+    records = load_records(args.data, n_records=1000)
+    print(json.dumps(load_test(args.url, records, args.requests, args.concurrency), indent=2))
@@ -0,0 +1,319 @@
+import argparse
+from collections import deque
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+import json
+import numpy as np
+import queue
+import threading
+import time
+from typing import Dict, List, Text
+import yaml
+
+from src.serve.forest import load_forest
+from src.train.model_io import load_model
+from src.utils.logs import get_logger
+
+
+class RecordEncoder:
+    """
+    RecordEncoder class for encoding one raw application into a feature vector without pandas.
+
+    It applies the same one-hot encoding, value mappings and column order as DataPrep,
+    reading them from the saved preprocessing artifact. Unseen categories encode as all
+    zeros and unmapped values as missing, as in DataPrep.
+
+    Parameters:
+    - artifact (dict): The preprocessing artifact saved by DataPrep.save_artifact().
+    - target (str): The name of the target column, left out of the features.
+
+    Methods:
+    - encode(): Encode one application.
+    """
+
+    def __init__(self, artifact: Dict, target: Text):
+        self.columns = [column for column in artifact['prepared_columns'] if column != target]
+        position = {column: i for i, column in enumerate(self.columns)}
+        mappings = artifact['mappings']
+        encoded = {column: values for column, values in artifact['vocabularies'].items()
+                   if column not in mappings}
+
+        self.numeric = []
+        self.mapped = []
+        self.one_hot = []
+        for column in artifact['dtypes']:
+            name = column.replace('_', '')
+            if column in encoded:
+                # One-hot columns are named column_value, then stripped of underscores
+                positions = {value: position[f'{column}_{"nan" if value is None else value}'.replace('_', '')]
+                             for value in encoded[column]}
+                self.one_hot.append((column, positions))
+            elif name not in position:
+                continue
+            elif column in mappings:
+                self.mapped.append((column, mappings[column], position[name]))
+            else:
+                self.numeric.append((column, position[name]))
+
+    def encode(self, record: Dict) -> np.ndarray:
+        """
+        Encode one application.
+
+        Parameters:
+        - record (dict): Raw application keyed by raw column name.
+
+        Returns:
+        - np.ndarray: Feature vector in the column order the model was trained on.
+        """
+        features = np.zeros(len(self.columns), dtype='float32')
+        for column, i in self.numeric:
+            value = record.get(column)
+            features[i] = np.nan if value is None else float(value)
+        for column, mapping, i in self.mapped:
+            features[i] = mapping.get(record.get(column), np.nan)
+        for column, positions in self.one_hot:
+            i = positions.get(record.get(column))
+            if i is not None:
+                features[i] = 1.0
+        # INDEX_COLUMN, present in models trained on CSV data, stays 0 as in batch scoring
+        return features
+
+
+class MicroBatcher:
+    """
+    MicroBatcher class for coalescing concurrent scoring requests into batches.
+
+    A single worker thread waits for a request, then keeps collecting requests until the
+    batch is full or the oldest request has waited max_wait_ms, and scores them with one
+    predict_proba call.
+
+    Parameters:
+    - model: Trained model with a predict_proba method.
+    - max_batch_size (int): Maximum requests scored together.
+    - max_wait_ms (float): Maximum time the first request of a batch waits for others.
+
+    Methods:
+    - start(): Start the worker thread.
+    - score(): Score one feature vector, blocking until its batch is scored.
+    - metrics(): Latency, throughput and batch size statistics.
+    """
+
+    def __init__(self, model, max_batch_size: int, max_wait_ms: float):
+        self.model = model
+        self.max_batch_size = max_batch_size
+        self.max_wait = max_wait_ms / 1000
+        self.requests = queue.Queue()
+        self.latencies = deque(maxlen=10000)
+        self.batch_sizes = deque(maxlen=10000)
+        self.scored = 0
+        self.started = time.perf_counter()
+        self.lock = threading.Lock()
+
+    def start(self):
+        """
+        Start the worker thread.
+        """
+        threading.Thread(target=self._run, daemon=True).start()
+
+    def _collect(self) -> List[Dict]:
+        batch = [self.requests.get()]
+        deadline = time.perf_counter() + self.max_wait
+        while len(batch) < self.max_batch_size:
+            remaining = deadline - time.perf_counter()
+            if remaining <= 0:
+                break
+            try:
+                batch.append(self.requests.get(timeout=remaining))
+            except queue.Empty:
+                break
+        return batch
+
+    def _run(self):
+        while True:
+            batch = self._collect()
+            try:
+                probabilities = self.model.predict_proba(np.stack([item['features'] for item in batch]))[:, 1]
+            except Exception as error:
+                probabilities = [error] * len(batch)
+            done = time.perf_counter()
+            with self.lock:
+                self.batch_sizes.append(len(batch))
+                self.scored += len(batch)
+                for item, probability in zip(batch, probabilities):
+                    self.latencies.append(done - item['received'])
+            for item, probability in zip(batch, probabilities):
+                item['result'] = probability
+                item['done'].set()
+
+    def score(self, features: np.ndarray, received: float) -> float:
+        """
+        Score one feature vector, blocking until its batch is scored.
+
+        Parameters:
+        - features (np.ndarray): Encoded application.
+        - received (float): time.perf_counter() when the request arrived.
+
+        Returns:
+        - float: Probability of default.
+        """
+        item = {'features': features, 'received': received, 'done': threading.Event()}
+        self.requests.put(item)
+        item['done'].wait()
+        if isinstance(item['result'], Exception):
+            raise item['result']
+        return float(item['result'])
+
+    def metrics(self) -> Dict:
+        """
+        Latency, throughput and batch size statistics.
+
+        Returns:
+        - dict: Requests scored, throughput since start, p50/p99 latency over the last
+          10000 requests and mean batch size over the last 10000 batches.
+        """
+        with self.lock:
+            latencies = np.array(self.latencies) * 1000
+            batch_sizes = np.array(self.batch_sizes)
+            scored = self.scored
+        return {
+            'requests': scored,
+            'throughput_rps': scored / (time.perf_counter() - self.started),
+            'p50_ms': float(np.percentile(latencies, 50)) if len(latencies) else None,
+            'p99_ms': float(np.percentile(latencies, 99)) if len(latencies) else None,
+            'mean_batch_size': float(batch_sizes.mean()) if len(batch_sizes) else None,
+        }
+
+
+class ScoreServer:
+    """
+    ScoreServer class for serving single-application credit decisions over HTTP.
+
+    Endpoints:
+    - POST /score: JSON application keyed by raw column name; returns its probability
+      of default and prediction.
+    - GET /metrics: Latency, throughput and batch size statistics.
+    - GET /health: Liveness check.
+
+    Parameters:
+    - config_path (str): The file path to the configuration file.
+
+    Methods:
+    - load_artifacts(): Load the preprocessing artifact and keep the model in memory.
+    - make_server(): Create the HTTP server and start the micro-batching worker.
+    - serve(): Serve requests until interrupted.
+    """
+
+    def __init__(self, config_path: Text):
+        """
+        Initialize ScoreServer instance.
+
+        Parameters:
+        - config_path (str): The file path to the configuration file.
+        """
+        with open(config_path) as conf_file:
+            self.config = yaml.safe_load(conf_file)
+
+        self.logger = get_logger('SERVE', log_level=self.config['base']['log_level'])
+
+    def load_artifacts(self):
+        """
+        Load the preprocessing artifact and keep the model in memory.
+        """
+        self.logger.info('Load preprocessing artifact and model')
+        with open(self.config['data_process']['artifact_path']) as artifact_file:
+            self.encoder = RecordEncoder(json.load(artifact_file), target=self.config['train']['target'])
+        if self.config['score']['use_forest']:
+            model = load_forest(self.config)
+        else:
+            model = load_model(self.config['train']['model_path'])
+        serve_config = self.config['serve']
+        self.batcher = MicroBatcher(model=model,
+                                    max_batch_size=serve_config['max_batch_size'],
+                                    max_wait_ms=serve_config['max_wait_ms'])
+
+    def make_server(self) -> ThreadingHTTPServer:
+        """
+        Create the HTTP server and start the micro-batching worker.
+
+        Returns:
+        - ThreadingHTTPServer: The server, bound to serve.host and serve.port.
+        """
+        encoder, batcher, logger = self.encoder, self.batcher, self.logger
+        threshold = self.config['score']['threshold']
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = 'HTTP/1.1'
+            # Headers and body go out as separate writes; avoid waiting on delayed ACKs
+            disable_nagle_algorithm = True
+
+            def _reply(self, status: int, body: Dict):
+                payload = json.dumps(body).encode()
+                self.send_response(status)
+                self.send_header('Content-Type', 'application/json')
+                self.send_header('Content-Length', str(len(payload)))
+                self.end_headers()
+                self.wfile.write(payload)
+
+            def do_GET(self):
+                if self.path == '/metrics':
+                    self._reply(200, batcher.metrics())
+                elif self.path == '/health':
+                    self._reply(200, {'status': 'ok'})
+                else:
+                    self._reply(404, {'error': f'Unknown path {self.path}'})
+
+            def do_POST(self):
+                received = time.perf_counter()
+                if self.path != '/score':
+                    self._reply(404, {'error': f'Unknown path {self.path}'})
+                    return
+                try:
+                    record = json.loads(self.rfile.read(int(self.headers['Content-Length'])))
+                    if not isinstance(record, dict):
+                        raise TypeError(f'Expected a JSON object, got {type(record).__name__}')
+                    probability = batcher.score(encoder.encode(record), received)
+                except (ValueError, TypeError, KeyError) as error:
+                    self._reply(400, {'error': str(error)})
+                    return
+                except Exception as error:
+                    logger.exception('Scoring failed')
+                    self._reply(500, {'error': f'Scoring failed: {error}'})
+                    return
+                self._reply(200, {'probability': probability, 'prediction': int(probability > threshold)})
+
+            def log_message(self, format, *args):
+                pass
+
+        serve_config = self.config['serve']
+        server = ThreadingHTTPServer((serve_config['host'], serve_config['port']), Handler)
+        server.daemon_threads = True
+        batcher.start()
+        return server
+
+    def serve(self):
+        """
+        Serve requests until interrupted.
+        """
+        server = self.make_server()
+        serve_config = self.config['serve']
+        self.logger.info(f"Serving on http://{serve_config['host']}:{server.server_port}")
+        try:
+            server.serve_forever()
+        except KeyboardInterrupt:
+            self.logger.info(f'Stopped serving: {self.batcher.metrics()}')
+        finally:
+            server.server_close()
+
+
+if __name__ == '__main__':
+    args_parser = argparse.ArgumentParser()
+    args_parser.add_argument('--config', dest='config', required=True)
+    args = args_parser.parse_args()
+
+    # Create an instance of ScoreServer
+    server = ScoreServer(config_path=args.config)
+
+    # Load the preprocessing artifact and the model
+    server.load_artifacts()
+
+    # Serve requests until interrupted
+    server.serve()
@@ -1,9 +1,59 @@
+import numpy as np
 import pandas as pd
-from category_encoders       import OneHotEncoder
 import argparse
+import json
 import yaml
-from typing import Text
-from src.utils.logs import get_logger
+from typing import List, Text
+from src.utils.data_io import DatasetWriter, write_dataset
+from src.utils.encoding import OneHotEncoder, map_categories
+from src.utils.logs import get_logger, instrument
+
+ENCODED_COLUMNS = ['person_home_ownership', 'loan_intent']
+GRADE_MAPPING = {'A': 1, 'B': 2, 'C': 3, 'D': 4, 'E': 5, 'F': 6, 'G': 7}
+DEFAULT_ONFILE_MAPPING = {'N': 0, 'Y': 1}
+MAPPED_COLUMNS = {'loan_grade': GRADE_MAPPING, 'cb_person_default_on_file': DEFAULT_ONFILE_MAPPING}
+# Name pandas gives the unnamed leading index column of CSV files
+INDEX_COLUMN = 'Unnamed: 0'
+# Feature schema: narrowest dtype holding each kind of prepared column. Models see
+# float32 inputs, so continuous columns lose nothing by being stored as float32.
+INDICATOR_DTYPE = 'uint8'  # one-hot columns and the target
+MAPPED_DTYPE = 'int8'  # fully mapped columns, e.g. loan grade 1-7
+CONTINUOUS_DTYPE = 'float32'  # everything else, and mapped columns with missing values
+
+
+def common_dtype(left, right):
+    """
+    Return the dtype pandas would infer for a column whose chunks have the given dtypes.
+
+    Args:
+    - left (np.dtype): Dtype seen so far.
+    - right (np.dtype): Dtype of the next chunk.
+
+    Returns:
+    - np.dtype: The common dtype.
+    """
+    if left == right:
+        return left
+    if pd.api.types.is_numeric_dtype(left) and pd.api.types.is_numeric_dtype(right):
+        return np.result_type(left, right)
+    return np.dtype(object)
+
+
+def source_variables(columns: List[Text]) -> List[Text]:
+    """
+    Return the source variable of each prepared column, as named after subs_char_names().
+
+    Args:
+    - columns (List[str]): Prepared column names.
+
+    Returns:
+    - List[str]: The encoded variable of one-hot indicator columns, the column itself
+      for other columns, and None for the CSV row position, which describes no applicant.
+    """
+    prefixes = [column.replace('_', '') for column in ENCODED_COLUMNS]
+    return [None if column == INDEX_COLUMN
+            else next((prefix for prefix in prefixes if column.startswith(prefix)), column)
+            for column in columns]
 
 class DataPrep:
     """
@@ -19,11 +69,20 @@ class DataPrep:
 
     Methods:
     - load_data(): Load raw data from the specified file.
+    - update_vocabularies(): Add the categories and dtypes of a chunk to the vocabularies.
+    - fit_vocabularies(): Learn category vocabularies and column dtypes in a first pass over the raw data.
+    - set_encoder(): Fit the encoder on the learned vocabularies.
+    - stream_prepdata(): Prepare and save the raw data chunk by chunk.
     - encoder(): Perform one-hot encoding on specified categorical columns.
     - loan_grade_prep(): Map loan grade categories to numeric values.
     - def default_onfile_prep(): Map default on file categories to numeric values.
+    - apply_schema(): Cast the prepared columns to the feature schema dtypes.
     - subs_char_names(): Substitute underscores in column names with empty strings.
+    - get_prepdata(): Return the prepared data as the next stage reads it back.
     - save_prepdata(): Save the prepared data after transformations.
+    - save_memory_report(): Save the bytes per row before and after applying the schema.
+    - save_artifact(): Save the fitted preprocessing so new data can be prepared the same way.
+    - load_artifact(): Load a saved preprocessing artifact.
     """
     
     def __init__(self, config_path: Text):
@@ -37,7 +96,13 @@ class DataPrep:
             self.config = yaml.safe_load(conf_file)
 
         self.logger = get_logger('DATA_PREP', log_level=self.config['base']['log_level'])
+        self.enc = None
+        self.vocabularies = {}
+        self.dtypes = {}
+        self.mappings = MAPPED_COLUMNS
+        self.memory_report = None
     
+    @instrument(rows='raw_data')
     def load_data(self):
         """
         Load raw data from the specified file.
@@ -45,32 +110,111 @@ class DataPrep:
         self.logger.info('Get dataset path')
         self.raw_data = pd.read_csv(self.config['data_process']['load_path'])
 
-    
+    def update_vocabularies(self, chunk: pd.DataFrame):
+        """
+        Add the categories and dtypes of a chunk to the vocabularies, keeping first-appearance order.
+
+        Parameters:
+        - chunk (pd.DataFrame): Raw data chunk.
+        """
+        for column, dtype in chunk.dtypes.items():
+            self.dtypes[column] = common_dtype(self.dtypes.get(column, dtype), dtype)
+        for column in ENCODED_COLUMNS + list(self.mappings):
+            seen = self.vocabularies.get(column, pd.Index([], dtype=object))
+            values = pd.Index(chunk[column].unique())
+            self.vocabularies[column] = seen.append(values[~values.isin(seen)])
+
+    @instrument()
+    def fit_vocabularies(self):
+        """
+        Learn category vocabularies and column dtypes in a first pass over the raw data.
+        """
+        self.logger.info('Learn category vocabularies')
+        chunks = pd.read_csv(self.config['data_process']['load_path'],
+                             chunksize=self.config['data_process']['chunksize'])
+        for chunk in chunks:
+            self.update_vocabularies(chunk)
+        self.set_encoder()
+
+    def set_encoder(self):
+        """
+        Fit the encoder on the learned vocabularies.
+
+        The vocabularies keep categories in order of first appearance, so the encoder is
+        identical to one fitted on all the data they were learned from.
+        """
+        self.enc = OneHotEncoder(cols=ENCODED_COLUMNS, vocabularies=self.vocabularies)
+
+        # Mapping yields integers only when every value of the whole column is mapped
+        self.mapped_dtypes = {
+            column: 'int64' if self.vocabularies[column].isin(list(mapping)).all() else 'float64'
+            for column, mapping in self.mappings.items()
+        }
+
+    @instrument(rows='prepared_data')
     def encoder(self):
         """
         Perform one-hot encoding on specified categorical columns.
         """
         self.logger.info('Encode variables')
-        columns = ['person_home_ownership','loan_intent']
-        enc = OneHotEncoder(cols=columns, use_cat_names=True)
-        self.prepared_data = enc.fit_transform(self.raw_data)
+        if self.enc is None:
+            enc = OneHotEncoder(cols=ENCODED_COLUMNS)
+            self.prepared_data = enc.fit_transform(self.raw_data)
+        else:
+            self.prepared_data = self.enc.transform(self.raw_data)
     
+    @instrument(rows='prepared_data')
     def loan_grade_prep(self):
         """
         Map loan grade categories to numeric values.
         """
         self.logger.info('Prepare "loan grade" variable')
-        grade_mapping = {'A': 1, 'B': 2, 'C': 3, 'D': 4, 'E': 5, 'F': 6, 'G': 7}
-        self.prepared_data['loan_grade'] = self.prepared_data['loan_grade'].map(grade_mapping)
+        self.prepared_data['loan_grade'] = map_categories(self.prepared_data['loan_grade'], self.mappings['loan_grade'])
     
+    @instrument(rows='prepared_data')
     def default_onfile_prep(self):
         """
         Map default on file categories to numeric values.
         """
         self.logger.info('Prepare "default on file" variable')
-        grade_mapping = {'N': 0, 'Y': 1}
-        self.prepared_data['cb_person_default_on_file'] = self.prepared_data['cb_person_default_on_file'].map(grade_mapping)
+        self.prepared_data['cb_person_default_on_file'] = map_categories(self.prepared_data['cb_person_default_on_file'], self.mappings['cb_person_default_on_file'])
 
+    @instrument(rows='prepared_data')
+    def apply_schema(self):
+        """
+        Cast the prepared columns to the narrowest dtype of their role in the feature schema.
+
+        One-hot columns and the target become INDICATOR_DTYPE, mapped columns without
+        missing values MAPPED_DTYPE and every other numeric column CONTINUOUS_DTYPE.
+        The first call records the memory used per row before and after.
+        """
+        self.logger.info('Apply feature schema')
+        raw_columns = set(self.raw_data.columns)
+        target = self.config['train']['target']
+        schema = {}
+        for column, dtype in self.prepared_data.dtypes.items():
+            if not pd.api.types.is_numeric_dtype(dtype):
+                continue
+            if column not in raw_columns or column.replace('_', '') == target:
+                schema[column] = INDICATOR_DTYPE
+            elif column in self.mappings and pd.api.types.is_integer_dtype(dtype):
+                schema[column] = MAPPED_DTYPE
+            else:
+                schema[column] = CONTINUOUS_DTYPE
+        compact = self.prepared_data.astype(schema)
+
+        if self.memory_report is None:
+            rows = max(len(compact), 1)
+            self.memory_report = {
+                'bytes_per_row_before': float(self.prepared_data.memory_usage(index=False, deep=True).sum() / rows),
+                'bytes_per_row_after': float(compact.memory_usage(index=False, deep=True).sum() / rows),
+                'dtypes': {column.replace('_', ''): str(dtype) for column, dtype in compact.dtypes.items()},
+            }
+            self.logger.info(f"Bytes per row: {self.memory_report['bytes_per_row_before']:.0f} before, "
+                             f"{self.memory_report['bytes_per_row_after']:.0f} after")
+        self.prepared_data = compact
+
+    @instrument(rows='prepared_data')
     def subs_char_names(self):
         """
         Substitute underscores in column names with empty strings.
@@ -79,12 +223,108 @@ class DataPrep:
         new_names = [string.replace("_", "") for string in self.prepared_data.columns.values]
         self.prepared_data.columns = new_names
     
+    def get_prepdata(self) -> pd.DataFrame:
+        """
+        Return the prepared data as the next stage reads it back from the saved file.
+
+        Returns:
+        - pd.DataFrame: The prepared data, with the leading index column CSV files carry.
+        """
+        if self.config['base']['data_format'] == 'csv':
+            return self.prepared_data.rename_axis(INDEX_COLUMN).reset_index()
+        return self.prepared_data.reset_index(drop=True)
+
+    @instrument(rows='prepared_data')
     def save_prepdata(self):
         """
         Save the prepared data after transformations.
         """
         self.logger.info('Save prepared data')
-        self.prepared_data.to_csv(self.config['data_process']['save_path']) 
+        data_format = self.config['base']['data_format']
+        # CSV keeps its legacy leading index column
+        write_dataset(self.prepared_data, self.config['data_process']['save_path'],
+                      data_format, index=data_format == 'csv')
+
+    def save_memory_report(self):
+        """
+        Save the bytes per row before and after applying the schema, and the schema dtypes.
+        """
+        self.logger.info('Save memory report')
+        with open(self.config['data_process']['memory_report'], 'w') as report_file:
+            json.dump(self.memory_report, report_file, indent=2)
+
+    @instrument()
+    def stream_prepdata(self):
+        """
+        Prepare and save the raw data chunk by chunk, appending each chunk to the output.
+
+        Requires fit_vocabularies() to have been called first.
+        """
+        self.logger.info('Stream raw data through preparation')
+        chunks = pd.read_csv(self.config['data_process']['load_path'],
+                             chunksize=self.config['data_process']['chunksize'],
+                             dtype=self.dtypes)
+        data_format = self.config['base']['data_format']
+        rows = 0
+        with DatasetWriter(self.config['data_process']['save_path'], data_format,
+                           index=data_format == 'csv') as writer:
+            for chunk in chunks:
+                self.raw_data = chunk
+                self.encoder()
+                self.loan_grade_prep()
+                self.default_onfile_prep()
+                self.prepared_data = self.prepared_data.astype(self.mapped_dtypes)
+                if self.config['data_process'].get('compact_dtypes'):
+                    self.apply_schema()
+                self.subs_char_names()
+                writer.write(self.prepared_data)
+                rows += len(chunk)
+        self.logger.info(f'Prepared {rows} rows')
+
+    @instrument()
+    def save_artifact(self):
+        """
+        Save the fitted preprocessing so new data can be prepared the same way.
+
+        The artifact holds the raw column dtypes, the category vocabularies, the
+        value mappings and the prepared column order, including the leading index
+        column models trained on CSV files expect.
+        """
+        self.logger.info('Save preprocessing artifact')
+        if not self.vocabularies:
+            self.update_vocabularies(self.raw_data)
+
+        columns = list(self.prepared_data.columns)
+        if self.config['base']['data_format'] == 'csv':
+            columns = [INDEX_COLUMN] + columns
+        artifact = {
+            'dtypes': {column: str(dtype) for column, dtype in self.dtypes.items()},
+            'vocabularies': {column: [None if pd.isna(value) else value for value in values]
+                             for column, values in self.vocabularies.items()},
+            'mappings': self.mappings,
+            'prepared_columns': columns,
+        }
+        with open(self.config['data_process']['artifact_path'], 'w') as artifact_file:
+            json.dump(artifact, artifact_file, indent=2)
+
+    def load_artifact(self, artifact_path: Text):
+        """
+        Load a saved preprocessing artifact and fit the encoder on its vocabularies.
+
+        Parameters:
+        - artifact_path (str): The file path to the preprocessing artifact.
+        """
+        self.logger.info('Load preprocessing artifact')
+        with open(artifact_path) as artifact_file:
+            artifact = json.load(artifact_file)
+
+        self.dtypes = {column: np.dtype(dtype) for column, dtype in artifact['dtypes'].items()}
+        self.vocabularies = {column: pd.Index([np.nan if value is None else value for value in values],
+                                              dtype=object)
+                             for column, values in artifact['vocabularies'].items()}
+        self.mappings = artifact['mappings']
+        self.prepared_columns = artifact['prepared_columns']
+        self.set_encoder()
 
 if __name__ == "__main__":
     args_parser = argparse.ArgumentParser()
@@ -94,20 +334,41 @@ if __name__ == "__main__":
     # Create an instance of DataPrep
     data_preparer = DataPrep(config_path = args.config)
 
-    # Load raw data
-    data_preparer.load_data()
+    if data_preparer.config['data_process'].get('chunksize'):
+        # Learn category vocabularies in a first pass
+        data_preparer.fit_vocabularies()
+
+        # Encode, map, rename and save the raw data chunk by chunk
+        data_preparer.stream_prepdata()
+
+        # Save preprocessing artifact
+        data_preparer.save_artifact()
+    else:
+        # Load raw data
+        data_preparer.load_data()
+
+        # Perform one-hot encoding on specified categorical columns
+        data_preparer.encoder()
+
+        # Map loan grade categories to numeric values
+        data_preparer.loan_grade_prep()
+
+        # Map default on file categories to numeric values
+        data_preparer.default_onfile_prep()
 
-    # Perform one-hot encoding on specified categorical columns
-    data_preparer.encoder()
+        # Cast the columns to the narrowest dtype of their role
+        if data_preparer.config['data_process'].get('compact_dtypes'):
+            data_preparer.apply_schema()
 
-    # Map loan grade categories to numeric values
-    data_preparer.loan_grade_prep()
+        # Substitute underscores in column names with empty strings
+        data_preparer.subs_char_names()
 
-    # Map loan grade categories to numeric values
-    data_preparer.default_onfile_prep()
+        # Save prepared dataset
+        data_preparer.save_prepdata()
 
-    # Substitute underscores in column names with empty strings
-    data_preparer.subs_char_names()
+        # Save preprocessing artifact
+        data_preparer.save_artifact()
 
-    # Save prepared dataset
-    data_preparer.save_prepdata()
+    # Save bytes per row before and after the feature schema
+    if data_preparer.config['data_process'].get('compact_dtypes'):
+        data_preparer.save_memory_report()
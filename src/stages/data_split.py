@@ -1,9 +1,15 @@
 import argparse
+import numpy as np
 import pandas as pd
-from sklearn.model_selection import train_test_split
 from typing import Text
 import yaml
-from src.utils.logs import get_logger
+from src.stages.data_prep import INDEX_COLUMN
+from src.utils.data_io import DatasetWriter, iter_dataset, read_dataset, write_dataset
+from src.utils.logs import get_logger, instrument
+
+# Rows are placed in one of HASH_BUCKETS buckets by the top bits of their hash
+HASH_BITS = 16
+HASH_BUCKETS = 1 << HASH_BITS
 
 class DataSplit:
     """
@@ -19,7 +25,11 @@ class DataSplit:
     Methods:
     - load_data(): Load the processed data from the specified file.
     - data_split(): Split features into training and test sets based on the provided configuration.
-    - save_sets(): Save the resulting training and test sets to separate CSV files.
+    - hash_buckets(): Hash bucket of each row, from its key columns.
+    - fit_cutoffs(): Learn the bucket below which rows go to the test set.
+    - test_mask(): Whether each row belongs to the test set.
+    - stream_split(): Split the processed data chunk by chunk, writing both sets incrementally.
+    - save_sets(): Save the resulting training and test sets to separate files.
     """
 
     def __init__(self, config_path: Text):
@@ -34,31 +44,148 @@ class DataSplit:
 
         self.logger = get_logger('DATA_SPLIT', log_level=self.config['base']['log_level'])
     
+    @instrument(rows='dataset')
     def load_data(self):
         """
         Load processed data from the specified file.
         """
         self.logger.info('Load processed data')
-        self.dataset = pd.read_csv(self.config['data_process']['save_path'])
+        self.dataset = read_dataset(self.config['data_process']['save_path'],
+                                    self.config['base']['data_format'],
+                                    memory_map=self.config['base']['memory_map'])
 
+    @instrument(rows='dataset')
     def data_split(self):
         """
         Split features into training and test sets based on configuration.
         """
         self.logger.info('Split features into train and test sets')
+        if self.config['data_split']['method'] == 'hash':
+            self.fit_cutoffs([self.dataset])
+            test = self.test_mask(self.dataset)
+            self.train_dataset, self.test_dataset = self.dataset[~test], self.dataset[test]
+            return
+
+        from sklearn.model_selection import train_test_split
+
         self.train_dataset, self.test_dataset = train_test_split(
             self.dataset,
             test_size=self.config['data_split']['test_size'],
             random_state=self.config['base']['random_state']
         )
 
+    def hash_buckets(self, chunk: pd.DataFrame) -> np.ndarray:
+        """
+        Hash bucket of each row, from its key columns.
+
+        The hash only depends on the row's key values and the random state, so a row
+        keeps its bucket when rows are added, removed or reordered. Numeric keys are
+        hashed as float64, non-integral values first rounded to float32 precision, so
+        that a value stored as float32 or read back from CSV text hashes the same.
+
+        Parameters:
+        - chunk (pd.DataFrame): Rows to hash.
+
+        Returns:
+        - np.ndarray: Bucket of each row, in [0, HASH_BUCKETS).
+        """
+        key_columns = self.config['data_split']['key_columns'] or \
+            [column for column in chunk.columns if column != INDEX_COLUMN]
+        keys = chunk[key_columns]
+        keys = keys.astype({column: 'float64' for column, dtype in keys.dtypes.items()
+                            if pd.api.types.is_numeric_dtype(dtype)})
+        for column, dtype in keys.dtypes.items():
+            if dtype == 'float64':
+                values = keys[column].to_numpy()
+                # Integral values are exact in float64, others are only as precise as float32
+                rounded = values.astype('float32').astype('float64')
+                keys[column] = np.where(values == np.round(values), values, rounded)
+        hash_key = str(self.config['base']['random_state'] or 0).zfill(16)[-16:]
+        hashes = pd.util.hash_pandas_object(keys, index=False, hash_key=hash_key).to_numpy()
+        return (hashes >> np.uint64(64 - HASH_BITS)).astype('int64')
+
+    def fit_cutoffs(self, chunks):
+        """
+        Learn the bucket below which rows go to the test set.
+
+        Hashes are uniform, so without stratification the cutoff is test_size of the
+        buckets and does not depend on the data. With stratification a histogram of
+        buckets is counted for each target class and each class gets the cutoff closest
+        to test_size of its rows. These cutoffs move a little as rows are added, so a
+        stratified split is only approximately stable: rows whose bucket lies between
+        a class's old and new cutoff change sets.
+
+        Parameters:
+        - chunks: Iterable of DataFrames holding all the rows to split.
+        """
+        split_config = self.config['data_split']
+        self.cutoffs = {None: round(split_config['test_size'] * HASH_BUCKETS)}
+        if not split_config['stratify']:
+            return
+
+        target = self.config['train']['target']
+        histograms = {}
+        for chunk in chunks:
+            buckets = self.hash_buckets(chunk)
+            for label in pd.unique(chunk[target]):
+                counts = np.bincount(buckets[(chunk[target] == label).to_numpy()], minlength=HASH_BUCKETS)
+                histograms[label] = histograms.get(label, 0) + counts
+        for label, histogram in histograms.items():
+            cumulative = np.r_[0, np.cumsum(histogram)]
+            wanted = split_config['test_size'] * cumulative[-1]
+            self.cutoffs[label] = int(np.abs(cumulative - wanted).argmin())
+
+    def test_mask(self, chunk: pd.DataFrame) -> np.ndarray:
+        """
+        Whether each row belongs to the test set, given the cutoffs from fit_cutoffs().
+
+        Parameters:
+        - chunk (pd.DataFrame): Rows to assign.
+
+        Returns:
+        - np.ndarray: True for test rows.
+        """
+        buckets = self.hash_buckets(chunk)
+        if not self.config['data_split']['stratify']:
+            return buckets < self.cutoffs[None]
+        labels = chunk[self.config['train']['target']].to_numpy()
+        cutoffs = pd.Series(labels).map(self.cutoffs).to_numpy(dtype='int64')
+        return buckets < cutoffs
+
+    @instrument()
+    def stream_split(self):
+        """
+        Split the processed data chunk by chunk, writing both sets incrementally.
+
+        With stratification the data is read twice, first to count the bucket histograms.
+        """
+        self.logger.info('Stream processed data into train and test sets')
+        data_format = self.config['base']['data_format']
+        chunksize = self.config['data_split']['chunksize']
+        save_path = self.config['data_process']['save_path']
+        self.fit_cutoffs(iter_dataset(save_path, data_format, chunksize))
+
+        rows = {'train': 0, 'test': 0}
+        with DatasetWriter(self.config['data_split']['trainset_path'], data_format) as train_writer, \
+                DatasetWriter(self.config['data_split']['testset_path'], data_format) as test_writer:
+            for chunk in iter_dataset(save_path, data_format, chunksize):
+                test = self.test_mask(chunk)
+                train_writer.write(chunk[~test])
+                test_writer.write(chunk[test])
+                rows['train'] += int((~test).sum())
+                rows['test'] += int(test.sum())
+        self.logger.info(f"Split {rows['train']} train and {rows['test']} test rows")
+        self.train_dataset = self.test_dataset = None
+
+    @instrument()
     def save_sets(self):
         """
-        Save training and test sets to separate CSV files.
+        Save training and test sets to separate files.
         """
         self.logger.info('Save train and test sets')
-        self.train_dataset.to_csv(self.config['data_split']['trainset_path'], index=False)
-        self.test_dataset.to_csv(self.config['data_split']['testset_path'], index=False)    
+        data_format = self.config['base']['data_format']
+        write_dataset(self.train_dataset, self.config['data_split']['trainset_path'], data_format)
+        write_dataset(self.test_dataset, self.config['data_split']['testset_path'], data_format)
 
 if __name__ == '__main__':
     #Set config file
@@ -69,11 +196,16 @@ if __name__ == '__main__':
     # Create an instance of DataSplit
     data_spliter = DataSplit(config_path = args.config)
 
-    # Load processed data
-    data_spliter.load_data()
+    split_config = data_spliter.config['data_split']
+    if split_config['method'] == 'hash' and split_config['chunksize']:
+        # Assign rows by hash and write both sets chunk by chunk
+        data_spliter.stream_split()
+    else:
+        # Load processed data
+        data_spliter.load_data()
 
-    # Perform split in the processed data
-    data_spliter.data_split()
+        # Perform split in the processed data
+        data_spliter.data_split()
 
-    # Save train and test sets
-    data_spliter.save_sets()
\ No newline at end of file
+        # Save train and test sets
+        data_spliter.save_sets()
@@ -1,14 +1,17 @@
 import argparse
-import joblib
 import json
+import numpy as np
 import pandas as pd
 from pathlib import Path
-from sklearn.metrics import confusion_matrix, f1_score
 from typing import Text, Dict
 import yaml
 
-from src.report.visualize import plot_confusion_matrix
-from src.utils.logs import get_logger
+from src.report.metrics import macro_f1, ranking_metrics, threshold_sweep
+from src.report.reasons import reason_coder_from_config
+from src.serve.forest import load_forest
+from src.train.model_io import load_model
+from src.utils.data_io import format_from_path, read_dataset, write_dataset
+from src.utils.logs import get_logger, instrument
 
 class EvaluateModel:
     def __init__(self, config_path: Text):
@@ -23,52 +26,107 @@ class EvaluateModel:
 
         self.logger = get_logger('EVALUATE', log_level=self.config['base']['log_level'])
 
+    @instrument(rows='test_df')
     def load_model_data(self):
         self.logger.info('Load model and test dataset')
-        self.test_df = pd.read_csv(self.config['data_split']['testset_path'])
-        model_path = self.config['train']['model_path']
-        self.model = joblib.load(model_path)
+        self.test_df = read_dataset(self.config['data_split']['testset_path'],
+                                    self.config['base']['data_format'],
+                                    memory_map=self.config['base']['memory_map'])
+        if self.config['evaluate']['use_forest']:
+            self.model = load_forest(self.config)
+        else:
+            model_path = self.config['train']['model_path']
+            self.model = load_model(model_path)
         
+    @instrument(rows='y_test')
     def run_model(self):
         self.logger.info('Run model on test dataset')
         target_column=self.config['train']['target']
         self.y_test = self.test_df.loc[:, target_column].values
         X_test = self.test_df.drop(target_column, axis=1).values
-        self.prediction = self.model.predict(X_test)
+        # One predict_proba call serves the 0.5 predictions and the threshold sweep
+        self.probability = self.model.predict_proba(X_test)[:, 1]
+        self.prediction = (self.probability > 0.5).astype('int64')
 
+    @instrument(rows='y_test')
     def get_scores(self):
         self.logger.info('Get prediction score')
-        f1 = f1_score(y_true=self.y_test, y_pred=self.prediction, average='macro')
-        cm = confusion_matrix(self.y_test, self.prediction)
+        # Cell counts indexed by 2 * actual + predicted, reshaped as [[tn, fp], [fn, tp]]
+        cm = np.bincount(2 * self.y_test.astype('int64') + self.prediction, minlength=4).reshape(2, 2)
+        f1 = macro_f1(cm)
         self.report = {
             'f1': f1,
             'cm': cm,
             'actual': self.y_test,
             'predicted': self.prediction
         }
+        metrics = {'f1_score': self.report['f1']}
+        if self.config['evaluate']['threshold_sweep']['enabled']:
+            metrics.update(ranking_metrics(self.y_test, self.probability))
         self.logger.info('Save score in reports')
         json.dump(
-            obj={'f1_score': self.report['f1']},
+            obj=metrics,
             fp=open(self.config['evaluate']['metrics_file'], 'w')
         )
 
+    @instrument(rows='y_test')
+    def write_threshold_metrics(self):
+        sweep = self.config['evaluate']['threshold_sweep']
+        if not sweep['enabled']:
+            return
+        self.logger.info('Write threshold sweep metrics in reports')
+        exposure = self.test_df[sweep['exposure_column']].values if sweep['exposure_column'] else None
+        metrics = threshold_sweep(self.y_test, self.probability,
+                                  thresholds=np.linspace(0, 1, sweep['thresholds']),
+                                  exposure=exposure,
+                                  loss_given_default=sweep['loss_given_default'])
+        metrics.to_csv(sweep['metrics_file'], index=False)
+
+    @instrument(rows='y_test')
+    def write_reason_codes(self):
+        path = self.config['evaluate']['reason_codes_file']
+        if not path:
+            return
+        self.logger.info('Write reason codes in reports')
+        X_test = self.test_df.drop(self.config['train']['target'], axis=1)
+        coder = reason_coder_from_config(self.config, self.model, X_test.columns)
+        declined = self.prediction == 1 if self.config['reasons']['declined_only'] else None
+        codes = coder.reasons_frame(X_test.to_numpy(dtype='float32'), rows=declined)
+        codes.insert(0, 'probability', self.probability)
+        codes.insert(0, 'y_true', self.y_test)
+        write_dataset(codes, path, format_from_path(path))
+
+    @instrument(rows='y_test')
     def write_confusion_matrix_data(self):
-        def convert_to_labels(indexes, labels):
-            result = []
-            for i in indexes:
-                result.append(labels[i])
-            return result
         self.logger.info('Write confusion matrix data in reports')
         self.labels = ['Not Default', 'Default']
         assert len(self.prediction) == len(self.y_test)
-        predicted_labels = convert_to_labels(self.prediction, self.labels)
-        true_labels = convert_to_labels(self.y_test, self.labels)
-        cf = pd.DataFrame(list(zip(true_labels, predicted_labels)), columns=["y_true", "predicted"])
+        rows = self.config['evaluate']['confusion_matrix_rows']
+        if rows == 'aggregate':
+            # One row per cell, with its count
+            cm = self.report['cm']
+            cf = pd.DataFrame({'y_true': np.repeat(self.labels, 2),
+                               'predicted': np.tile(self.labels, 2),
+                               'count': cm.ravel()})
+        else:
+            y_true, predicted = self.y_test, self.prediction
+            if rows == 'sample' and len(y_true) > self.config['evaluate']['confusion_matrix_sample']:
+                rng = np.random.default_rng(self.config['base']['random_state'])
+                keep = np.sort(rng.choice(len(y_true), self.config['evaluate']['confusion_matrix_sample'],
+                                          replace=False))
+                y_true, predicted = y_true[keep], predicted[keep]
+            cf = pd.DataFrame({'y_true': pd.Categorical.from_codes(y_true, categories=self.labels),
+                               'predicted': pd.Categorical.from_codes(predicted, categories=self.labels)})
         cf.to_csv(self.config['evaluate']['confusion_matrix_data'], index=False)
 
+    @instrument()
     def save_confusion_matrix(self):
+        if not self.config['evaluate']['render_confusion_matrix']:
+            return
         self.logger.info('Save confusion matrix image in reports')
-        
+        # matplotlib and seaborn are only imported when the image is rendered
+        from src.report.visualize import plot_confusion_matrix
+
         plt = plot_confusion_matrix(cm=self.report['cm'],
                                     target_names=self.labels)
         
@@ -89,6 +147,10 @@ if __name__ == '__main__':
 
     evaluater.get_scores()
 
+    evaluater.write_threshold_metrics()
+
+    evaluater.write_reason_codes()
+
     evaluater.write_confusion_matrix_data()
 
     evaluater.save_confusion_matrix()
@@ -0,0 +1,169 @@
+import argparse
+from functools import reduce
+import json
+import numpy as np
+import pandas as pd
+from typing import List, Text
+import yaml
+
+from src.report.drift import HistogramSketch, drift_statistics
+from src.serve.forest import load_forest
+from src.stages.data_prep import INDEX_COLUMN
+from src.train.model_io import load_model
+from src.utils.data_io import iter_dataset
+from src.utils.logs import get_logger, instrument
+
+# Column of the sketches holding the predicted probability of default
+SCORE_COLUMN = 'score'
+
+
+def drift_frame(features: pd.DataFrame, probability: np.ndarray) -> pd.DataFrame:
+    """
+    Columns tracked for drift: the model features and the model score.
+
+    Features are binned as the float32 values the model sees, whatever their stored
+    dtype, so that the training data, monitored data and scored batches agree.
+
+    Args:
+    - features (pd.DataFrame): Prepared features, without the target.
+    - probability (np.ndarray): Predicted probability of default of each row.
+
+    Returns:
+    - pd.DataFrame: The float32 features, without the row position used by CSV models,
+      and the score.
+    """
+    # The row position of CSV data always differs between populations
+    features = features.drop(columns=[INDEX_COLUMN], errors='ignore')
+    frame = pd.DataFrame(features.to_numpy(dtype='float32'), columns=features.columns)
+    return frame.assign(**{SCORE_COLUMN: probability})
+
+
+class DriftMonitor:
+    """
+    DriftMonitor class for comparing new data with the training data the model was fitted on.
+
+    The training stage saves a sketch of every prepared feature and of the model score.
+    New data is sketched with the same bins in one streaming pass, or sketches saved by
+    separate scoring runs are merged, and each column is compared with the reference.
+
+    Parameters:
+    - config_path (str): The file path to the configuration file.
+
+    Attributes:
+    - config (dict): Configuration settings loaded from the specified file.
+    - logger: Logger object for recording log messages.
+    - reference (HistogramSketch): Sketch of the training data.
+    - sketch (HistogramSketch): Sketch of the new data.
+
+    Methods:
+    - load_reference(): Load the training data sketch saved next to the model.
+    - sketch_data(): Sketch new prepared data chunk by chunk, scoring it with the model.
+    - merge_sketches(): Merge sketches saved by scoring runs.
+    - save_metrics(): Save the drift of every column and its summary in reports.
+    """
+
+    def __init__(self, config_path: Text):
+        """
+        Initialize DriftMonitor instance.
+
+        Parameters:
+        - config_path (str): The file path to the configuration file.
+        """
+        with open(config_path) as conf_file:
+            self.config = yaml.safe_load(conf_file)
+
+        self.logger = get_logger('MONITOR', log_level=self.config['base']['log_level'])
+
+    def load_reference(self):
+        """
+        Load the training data sketch saved next to the model.
+        """
+        self.logger.info('Load reference sketch')
+        self.reference = HistogramSketch.load(self.config['monitor']['reference_path'])
+
+    @instrument()
+    def sketch_data(self, model=None, data: pd.DataFrame = None):
+        """
+        Sketch new prepared data chunk by chunk, scoring it with the model.
+
+        Parameters:
+        - model: Trained model with predict_proba(); loaded as configured when None.
+        - data (pd.DataFrame): The new data, when already in memory; read in chunks
+          from monitor.data_path when None.
+        """
+        monitor = self.config['monitor']
+        self.logger.info(f"Sketch {monitor['data_path']}")
+        if model is None:
+            if monitor['use_forest']:
+                model = load_forest(self.config)
+            else:
+                model = load_model(self.config['train']['model_path'])
+
+        target_column = self.config['train']['target']
+        self.sketch = HistogramSketch(self.reference.cuts)
+        if data is None:
+            chunks = iter_dataset(monitor['data_path'], self.config['base']['data_format'],
+                                  monitor['chunksize'])
+        else:
+            chunks = [data]
+        for chunk in chunks:
+            features = chunk.drop(columns=[target_column], errors='ignore')
+            probability = model.predict_proba(features.to_numpy(dtype='float32'))[:, 1]
+            self.sketch.update(drift_frame(features, probability))
+
+    def merge_sketches(self, paths: List[Text]):
+        """
+        Merge sketches saved by scoring runs, without reading their data again.
+
+        Parameters:
+        - paths (list): Sketch files built with the reference bins.
+        """
+        self.logger.info(f'Merge {len(paths)} sketches')
+        self.sketch = reduce(HistogramSketch.merge, [HistogramSketch.load(path) for path in paths])
+
+    @instrument()
+    def save_metrics(self):
+        """
+        Save the drift of every column and its summary in reports.
+        """
+        monitor = self.config['monitor']
+        self.logger.info('Save drift metrics in reports')
+        statistics = drift_statistics(self.reference, self.sketch)
+        statistics.to_csv(monitor['features_file'], index=False)
+
+        score = statistics.set_index('column').loc[SCORE_COLUMN]
+        features = statistics[statistics['column'] != SCORE_COLUMN]
+        drifted = features[features['psi'] >= monitor['psi_threshold']]
+        metrics = {
+            'rows': int(score['rows']),
+            'score_psi': float(score['psi']),
+            'score_ks': float(score['ks']),
+            'max_feature_psi': float(features['psi'].max()),
+            'drifted_features': len(drifted),
+        }
+        if len(drifted):
+            self.logger.warning(f"PSI of {', '.join(drifted['column'])} at or above {monitor['psi_threshold']}")
+        json.dump(obj=metrics, fp=open(monitor['metrics_file'], 'w'), indent=2)
+
+
+if __name__ == '__main__':
+    args_parser = argparse.ArgumentParser()
+    args_parser.add_argument('--config', dest='config', required=True)
+    args_parser.add_argument('--sketches', dest='sketches', nargs='+', default=None,
+                             help='merge sketches saved by scoring runs instead of reading data_path')
+    args = args_parser.parse_args()
+
+    # Create an instance of DriftMonitor
+    drift_monitor = DriftMonitor(config_path=args.config)
+
+    # Load the sketch of the training data
+    drift_monitor.load_reference()
+
+    # Sketch the new data, or merge the sketches of scoring runs
+    if args.sketches:
+        drift_monitor.merge_sketches(args.sketches)
+    else:
+        drift_monitor.sketch_data()
+
+    # Compare with the training data
+    drift_monitor.save_metrics()
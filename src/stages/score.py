@@ -0,0 +1,169 @@
+import argparse
+import numpy as np
+import pandas as pd
+import time
+from typing import Text
+import yaml
+
+from src.report.drift import HistogramSketch
+from src.report.reasons import reason_coder_from_config
+from src.serve.forest import load_forest
+from src.stages.data_prep import DataPrep, INDEX_COLUMN
+from src.stages.monitor import drift_frame
+from src.train.model_io import load_model
+from src.utils.data_io import DatasetWriter, format_from_path, iter_dataset
+from src.utils.logs import get_logger
+
+
+class ScoreModel:
+    """
+    ScoreModel class for scoring new loan applications in fixed-size batches.
+
+    Parameters:
+    - config_path (str): The file path to the configuration file.
+
+    Attributes:
+    - config (dict): Configuration settings loaded from the specified file.
+    - logger: Logger object for recording log messages.
+    - preparer (DataPrep): DataPrep instance holding the saved preprocessing artifact.
+    - model: Trained machine learning model.
+    - sketch (HistogramSketch): Sketch of the scored features and scores, with the bins
+      of the drift reference; None unless score.drift_sketch is set.
+    - reason_coder (ReasonCoder): Top reasons of each application; None unless
+      score.reason_codes is set.
+
+    Methods:
+    - load_artifacts(): Load the preprocessing artifact and the trained model.
+    - prepare_batch(): Prepare a batch of raw applications as model features.
+    - score(): Score an input file batch by batch into an output file.
+    """
+
+    def __init__(self, config_path: Text):
+        """
+        Initialize ScoreModel instance.
+
+        Parameters:
+        - config_path (str): The file path to the configuration file.
+        """
+        with open(config_path) as conf_file:
+            self.config = yaml.safe_load(conf_file)
+
+        self.config_path = config_path
+        self.logger = get_logger('SCORE', log_level=self.config['base']['log_level'])
+
+    def load_artifacts(self):
+        """
+        Load the preprocessing artifact and the trained model.
+        """
+        self.logger.info('Load preprocessing artifact and model')
+        self.preparer = DataPrep(config_path=self.config_path)
+        # Preparation is recorded under the SCORE stage, not in the data_prep metrics
+        self.preparer.logger = self.logger
+        self.preparer.load_artifact(self.config['data_process']['artifact_path'])
+        if self.config['score']['use_forest']:
+            self.model = load_forest(self.config)
+        else:
+            self.model = load_model(self.config['train']['model_path'])
+
+        target = self.config['train']['target']
+        self.feature_columns = [column for column in self.preparer.prepared_columns if column != target]
+        feature_names = getattr(self.model, 'feature_names', None)
+        if feature_names is not None and feature_names != self.feature_columns:
+            raise ValueError('The preprocessing artifact and the model were trained on different columns')
+        self.raw_columns = list(self.preparer.dtypes)
+        # The raw target column is not needed to score, every other raw column is
+        self.optional_columns = [column for column in self.raw_columns
+                                 if column.replace('_', '') == target]
+        self.reason_coder = None
+        if self.config['score']['reason_codes']:
+            self.reason_coder = reason_coder_from_config(self.config, self.model, self.feature_columns)
+        self.sketch = None
+        if self.config['score']['drift_sketch']:
+            self.sketch = HistogramSketch(HistogramSketch.load(self.config['monitor']['reference_path']).cuts)
+
+    def prepare_batch(self, batch: pd.DataFrame) -> np.ndarray:
+        """
+        Prepare a batch of raw applications as model features.
+
+        Parameters:
+        - batch (pd.DataFrame): Raw applications.
+
+        Returns:
+        - np.ndarray: Feature matrix in the column order the model was trained on.
+        """
+        missing = set(self.raw_columns) - set(batch.columns) - set(self.optional_columns)
+        if missing:
+            raise ValueError(f'Input is missing columns {sorted(missing)}')
+
+        self.preparer.raw_data = batch.reindex(columns=self.raw_columns)
+        self.preparer.encoder()
+        self.preparer.loan_grade_prep()
+        self.preparer.default_onfile_prep()
+        self.preparer.subs_char_names()
+        prepared = self.preparer.prepared_data
+        if INDEX_COLUMN in self.feature_columns:
+            # Models trained on CSV data use the row position as a feature; it is 0 here
+            # as in the online server, so an application scores the same on both paths
+            prepared[INDEX_COLUMN] = 0
+        return prepared[self.feature_columns].to_numpy(dtype='float32')
+
+    def score(self, input_path: Text, output_path: Text):
+        """
+        Score an input file batch by batch, appending the scores to an output file.
+
+        Parameters:
+        - input_path (str): CSV, Parquet or Feather file of raw applications.
+        - output_path (str): CSV, Parquet or Feather file for the scores.
+        """
+        self.logger.info(f'Score {input_path}')
+        score_config = self.config['score']
+        id_column = score_config['id_column']
+        batches = iter_dataset(input_path, format_from_path(input_path), score_config['batch_size'])
+
+        rows = 0
+        started = time.perf_counter()
+        with DatasetWriter(output_path, format_from_path(output_path)) as writer:
+            for batch in batches:
+                features = self.prepare_batch(batch)
+                probability = self.model.predict_proba(features)[:, 1]
+                if self.sketch is not None:
+                    self.sketch.update(drift_frame(pd.DataFrame(features, columns=self.feature_columns),
+                                                   probability))
+                scores = pd.DataFrame({
+                    'row': np.arange(rows, rows + len(batch)),
+                    'probability': probability,
+                    'prediction': (probability > score_config['threshold']).astype('int8'),
+                })
+                if self.reason_coder is not None:
+                    declined = scores['prediction'].to_numpy() == 1 if self.config['reasons']['declined_only'] else None
+                    scores = pd.concat([scores, self.reason_coder.reasons_frame(features, rows=declined)], axis=1)
+                if id_column:
+                    scores.insert(0, id_column, batch[id_column].to_numpy())
+                writer.write(scores)
+                rows += len(batch)
+                self.logger.debug(f'Scored {rows} rows')
+
+        elapsed = time.perf_counter() - started
+        self.logger.info(f'Scored {rows} rows in {elapsed:.2f}s ({rows / max(elapsed, 1e-9):,.0f} rows/s)')
+        if self.sketch is not None:
+            # Sketches of separate scoring runs are merged by the drift monitor
+            self.logger.info(f"Save drift sketch to {self.config['score']['drift_sketch']}")
+            self.sketch.save(self.config['score']['drift_sketch'])
+
+
+if __name__ == '__main__':
+    args_parser = argparse.ArgumentParser()
+    args_parser.add_argument('--config', dest='config', required=True)
+    args_parser.add_argument('--input', dest='input', default=None)
+    args_parser.add_argument('--output', dest='output', default=None)
+    args = args_parser.parse_args()
+
+    # Create an instance of ScoreModel
+    scorer = ScoreModel(config_path=args.config)
+
+    # Load the preprocessing artifact and the trained model
+    scorer.load_artifacts()
+
+    # Score the input file in batches
+    scorer.score(input_path=args.input or scorer.config['score']['input_path'],
+                 output_path=args.output or scorer.config['score']['output_path'])
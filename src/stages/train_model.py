@@ -1,10 +1,17 @@
 import argparse
-import joblib
-import pandas as pd
+import json
+import numpy as np
+from pathlib import Path
 from typing import Text
 import yaml
-from src.utils.logs import get_logger
-from src.train.train import train
+from src.report.drift import HistogramSketch
+from src.serve.forest import export_forest, exports_forest, meta_path
+from src.stages.monitor import drift_frame
+from src.train.incremental import continue_training, weighted_f1
+from src.train.model_io import NativeModel, hash_dataframe, load_model, save_model
+from src.utils.data_io import read_dataset
+from src.utils.logs import get_logger, instrument
+from src.train.train import resolve_parallelism, search_report, tournament, train
 
 
 class TrainModel:
@@ -20,12 +27,24 @@ class TrainModel:
     - estimator_name (str): Name of the machine learning estimator.
     - train_df (pd.DataFrame): DataFrame containing the training dataset.
     - model: Trained machine learning model.
+    - best_params (dict): Hyperparameters of the model, selected by the last full search.
+    - validation_f1 (float): Validated weighted F1 score of the last full search.
+    - updates (list): Incremental updates applied since the last full search.
+    - updated (bool): Whether update_model() produced an accepted model.
 
     Methods:
     - get_estimator(): Extract the name of the machine learning estimator from the configuration.
     - load_traindata(): Load the training dataset from the specified file path in the configuration.
     - train_model(): Train a machine learning model using the specified estimator and hyperparameters.
-    - save_model(): Save the trained machine learning model to a specified file path.
+    - run_tournament(): Search every configured estimator at once and keep the best of all.
+    - update_model(): Continue training the saved model on a new partition of data.
+    - save_model(): Save the refitted best booster and its metadata to a specified file path.
+    - save_search_report(): Save the compute spent by the search compared with a full grid search.
+    - save_update_report(): Save the validation scores of the last incremental update.
+    - save_leaderboard(): Save the best candidate and score of each estimator of the tournament.
+    - save_forest(): Export the trained trees as NumPy node tables for xgboost-free prediction.
+    - sketch_traindata(): Sketch the features and scores of the training data.
+    - save_drift_reference(): Save the training data sketch, the reference of the drift monitor.
     """
 
     def __init__(self, config_path: Text):
@@ -39,6 +58,9 @@ class TrainModel:
             self.config = yaml.safe_load(conf_file)
 
         self.logger = get_logger('TRAIN', log_level=self.config['base']['log_level'])
+        self.updates = []
+        self.updated = False
+        self.update_report = None
     
     def get_estimator(self):
         """
@@ -48,36 +70,277 @@ class TrainModel:
         self.estimator_name = self.config['train']['estimator_name']
         self.logger.info(f'Estimator: {self.estimator_name}')
 
+    @instrument(rows='train_df')
     def load_traindata(self):
         """
         Load the training dataset from the specified file path in the configuration.
         """
         self.logger.info('Load train dataset')
-        self.train_df = pd.read_csv(self.config['data_split']['trainset_path'])
+        self.train_df = read_dataset(self.config['data_split']['trainset_path'],
+                                     self.config['base']['data_format'],
+                                     memory_map=self.config['base']['memory_map'])
 
+    @instrument(rows='train_df')
     def train_model(self):
         """
         Train a machine learning model using the specified estimator and hyperparameters.
         """
         self.logger.info('Train model')
+        parallelism = self.config['train']['parallelism']
+        budget = resolve_parallelism(parallelism)
+        self.logger.info(f"CPU budget: {budget['n_cores']} cores as {budget['search_jobs']} "
+                         f"{budget['backend']} search workers x {budget['estimator_threads']} "
+                         f"threads per fit")
+        param_grid = self.config['train']['estimators'][self.estimator_name]['param_grid']
         self.model = train(
             df = self.train_df,
             target_column = self.config['train']['target'],
             estimator_name = self.estimator_name,
-            param_grid = self.config['train']['estimators'][self.estimator_name]['param_grid'],
-            cv = self.config['train']['cv']
+            param_grid = param_grid,
+            cv = self.config['train']['cv'],
+            search = self.config['train']['search'],
+            random_state = self.config['base']['random_state'],
+            parallelism = parallelism,
+            log_level = self.config['base']['log_level']
         )
-        self.model.cv_results_
-        self.logger.info(f'Best params: {self.model.best_params_}')
-        self.logger.info(f'Best score: {self.model.best_score_}')
+        self.best_params = self.model.best_params_
+        self.validation_f1 = float(self.model.best_score_)
+        self.updates = []
+        self.logger.info(f'Best params: {self.best_params}')
+        self.logger.info(f'Best score: {self.validation_f1}')
 
+        self.search_report = search_report(self.model, param_grid,
+                                           cv=self.config['train']['cv'],
+                                           n_samples=len(self.train_df))
+        self.logger.info(f"Search fitted {self.search_report['fits']} of "
+                         f"{self.search_report['full_grid_fits']} full grid fits, "
+                         f"saving {self.search_report['compute_saved']:.1%} of boosting work")
+
+        # Search workers only stay busy while there are fits left to run in parallel
+        busy_workers = min(budget['search_jobs'], self.search_report['fits'])
+        utilisation = busy_workers * budget['estimator_threads'] / budget['n_cores']
+        self.logger.info(f'Effective CPU utilisation: {utilisation:.0%} of {budget["n_cores"]} cores')
+
+    @instrument(rows='train_df')
+    def run_tournament(self):
+        """
+        Grid search every estimator of train.estimators at once, on the same folds and
+        under one CPU and time budget, and keep the best candidate of all of them.
+        """
+        tournament_config = self.config['train']['tournament']
+        param_grids = {name: estimator['param_grid']
+                       for name, estimator in self.config['train']['estimators'].items()}
+        self.logger.info(f"Run tournament of {', '.join(param_grids)} within "
+                         f"{tournament_config['time_budget']} seconds")
+        self.model = tournament(
+            df = self.train_df,
+            target_column = self.config['train']['target'],
+            param_grids = param_grids,
+            cv = self.config['train']['cv'],
+            time_budget = tournament_config['time_budget'],
+            random_state = self.config['base']['random_state'],
+            parallelism = self.config['train']['parallelism'],
+            log_level = self.config['base']['log_level']
+        )
+        self.estimator_name = self.model.best_estimator_name_
+        self.best_params = self.model.best_params_
+        self.validation_f1 = self.model.best_score_
+        self.updates = []
+        self.leaderboard = self.model.leaderboard_
+        self.logger.info(f'Winner: {self.estimator_name} with {self.best_params}')
+        self.logger.info(f'Best score: {self.validation_f1}')
+
+        self.search_report = {'strategy': 'tournament',
+                              'estimator_name': self.estimator_name,
+                              'fits': self.model.fits_,
+                              'full_grid_fits': self.model.total_fits_,
+                              'stopped_early': self.model.fits_ < self.model.total_fits_}
+        if self.search_report['stopped_early']:
+            self.logger.warning(f"Time budget spent after {self.model.fits_} of "
+                                f"{self.model.total_fits_} fits")
+
+    @instrument(rows='new_df')
+    def update_model(self):
+        """
+        Continue training the saved model on a new partition of data, keeping its hyperparameters.
+
+        Part of each class of the new data is held out, raising ValueError when a class has
+        fewer than two rows; the update is only accepted when the weighted F1 of the updated
+        model on it stays within f1_tolerance of the saved model's F1 on the same rows.
+        Otherwise, or when there is no saved model to update, updated stays False and a
+        full retrain is expected.
+        """
+        incremental = self.config['train']['incremental']
+        model_path = self.config['train']['model_path']
+        if not Path(model_path).exists():
+            self.logger.warning(f'No model to update at {model_path}, retrain from scratch')
+            return
+
+        self.logger.info(f"Update model with {incremental['mode']} on {incremental['new_data_path']}")
+        previous = load_model(model_path)
+        if not hasattr(previous, 'get_booster'):
+            self.logger.warning(f"The {previous.meta['estimator_name']} model at {model_path} is not "
+                                f"an XGBoost booster, retrain from scratch")
+            return
+        target_column = self.config['train']['target']
+        self.new_df = read_dataset(incremental['new_data_path'],
+                                   self.config['base']['data_format'],
+                                   memory_map=self.config['base']['memory_map'])
+        if list(self.new_df.columns.drop(target_column)) != previous.feature_names:
+            raise ValueError(f'Columns of {incremental["new_data_path"]} differ from the '
+                             f'features of {model_path}')
+
+        y = self.new_df.loc[:, target_column].to_numpy(dtype='int32')
+        X = self.new_df.drop(target_column, axis=1).to_numpy(dtype='float32')
+        # Hold out validation_size of each class, and at least one row of it, so that both
+        # models are compared on rows of every class
+        classes, counts = np.unique(y, return_counts=True)
+        if len(classes) < 2 or counts.min() < 2:
+            raise ValueError(f"{incremental['new_data_path']} needs at least two rows of each class to "
+                             f"validate an update, got {dict(zip(classes.tolist(), counts.tolist()))}")
+        rng = np.random.default_rng(self.config['base']['random_state'])
+        valid = np.zeros(len(y), dtype=bool)
+        for label, count in zip(classes, counts):
+            n_valid = min(max(1, int(count * incremental['validation_size'])), count - 1)
+            valid[rng.choice(np.flatnonzero(y == label), n_valid, replace=False)] = True
+
+        budget = resolve_parallelism(self.config['train']['parallelism'])
+        booster = continue_training(previous.get_booster(), X[~valid], y[~valid],
+                                    params=previous.meta['best_params'],
+                                    mode=incremental['mode'],
+                                    n_rounds=incremental['n_rounds'],
+                                    threads=budget['n_cores'],
+                                    random_state=self.config['base']['random_state'])
+        model = NativeModel(booster, previous.meta)
+
+        previous_f1 = weighted_f1(previous, X[valid], y[valid])
+        # Models saved before incremental training have no validated score to keep
+        reference_f1 = previous.meta.get('validation_f1', previous_f1)
+        self.update_report = {
+            'mode': incremental['mode'],
+            'rows': int((~valid).sum()),
+            'validation_rows': int(valid.sum()),
+            'boosting_rounds': booster.num_boosted_rounds(),
+            'reference_f1': reference_f1,
+            'previous_f1': previous_f1,
+            'updated_f1': weighted_f1(model, X[valid], y[valid]),
+            'f1_tolerance': incremental['f1_tolerance'],
+        }
+        # Both models are scored on the same held-out rows
+        self.updated = self.update_report['updated_f1'] >= previous_f1 - incremental['f1_tolerance']
+        self.update_report['accepted'] = self.updated
+        self.logger.info(f"Validation F1: {self.update_report['updated_f1']:.4f} updated, "
+                         f"{self.update_report['previous_f1']:.4f} before the update, "
+                         f"{reference_f1:.4f} at the last full search")
+        if not self.updated:
+            self.logger.warning('Validation F1 dropped beyond the tolerance, retrain from scratch')
+            return
+
+        self.model = model
+        self.train_df = self.new_df
+        self.best_params = previous.meta['best_params']
+        self.validation_f1 = reference_f1
+        self.data_hash = previous.meta['data_hash']
+        update = {key: self.update_report[key] for key in ['mode', 'rows', 'boosting_rounds', 'updated_f1']}
+        update['data_hash'] = hash_dataframe(self.new_df)
+        self.updates = previous.meta.get('updates', []) + [update]
+
+    @instrument()
     def save_model(self):
         """
-        Save the trained machine learning model to a specified file path.
+        Save the refitted best booster in XGBoost's binary format, or other estimators with
+        joblib, and its metadata to a specified file path; the search results go to the
+        search report instead.
         """
         self.logger.info('Save model')
         models_path = self.config['train']['model_path']
-        joblib.dump(self.model, models_path)
+        target_column = self.config['train']['target']
+        # An updated model keeps the hash of the data its full search was trained on
+        data_hash = self.data_hash if self.updated else hash_dataframe(self.train_df)
+        save_model(self.model, models_path,
+                   feature_names=self.train_df.columns.drop(target_column),
+                   metadata={'estimator_name': self.estimator_name,
+                             'target': target_column,
+                             'best_params': self.best_params,
+                             'validation_f1': self.validation_f1,
+                             'data_hash': data_hash,
+                             'updates': self.updates})
+
+    @instrument()
+    def save_search_report(self):
+        """
+        Save the compute spent by the search compared with a full grid search.
+        """
+        self.logger.info('Save search report')
+        report = {'strategy': self.config['train']['search']['strategy'],
+                  'best_params': self.best_params,
+                  'best_score': self.validation_f1,
+                  **self.search_report}
+        json.dump(obj=report, fp=open(self.config['train']['search_report'], 'w'), indent=2)
+
+    @instrument()
+    def save_update_report(self):
+        """
+        Save the validation scores of the last incremental update and whether it was accepted.
+        """
+        self.logger.info('Save update report')
+        json.dump(obj=self.update_report, fp=open(self.config['train']['incremental']['report'], 'w'),
+                  indent=2)
+
+    @instrument()
+    def save_leaderboard(self):
+        """
+        Save the best candidate and score of each estimator of the tournament in reports.
+        """
+        self.logger.info('Save leaderboard')
+        self.leaderboard.to_csv(self.config['train']['tournament']['leaderboard'], index=False)
+
+    @instrument()
+    def save_forest(self):
+        """
+        Export the trained trees as NumPy node tables for xgboost-free prediction.
+
+        Models without a forest, see exports_forest(), remove the forest of an earlier
+        model instead, so that use_forest cannot silently predict with it.
+        """
+        forest_path = self.config['train']['forest_path']
+        if not exports_forest(self.config):
+            self.logger.warning(f'No forest exported for a {self.estimator_name} model, '
+                                f'removing any earlier one')
+            for path in [forest_path, meta_path(forest_path)]:
+                Path(path).unlink(missing_ok=True)
+            return
+        self.logger.info('Save forest')
+        export_forest(self.model, forest_path)
+
+    @instrument(rows='train_df')
+    def sketch_traindata(self):
+        """
+        Sketch the features and model scores of the data the model was trained on.
+
+        After an accepted update the new partition is sketched with the bins of the saved
+        reference and merged into it, so the reference covers every partition.
+        """
+        self.logger.info('Sketch train dataset')
+        features = self.train_df.drop(self.config['train']['target'], axis=1)
+        probability = self.model.predict_proba(features.to_numpy(dtype='float32'))[:, 1]
+        frame = drift_frame(features, probability)
+        reference_path = self.config['monitor']['reference_path']
+        if self.updated and Path(reference_path).exists():
+            reference = HistogramSketch.load(reference_path)
+            sketch = HistogramSketch(reference.cuts)
+            sketch.update(frame)
+            self.drift_reference = reference.merge(sketch)
+            return
+        self.drift_reference = HistogramSketch.from_data(frame, n_bins=self.config['monitor']['n_bins'])
+
+    @instrument()
+    def save_drift_reference(self):
+        """
+        Save the training data sketch next to the model, the reference of the drift monitor.
+        """
+        self.logger.info('Save drift reference')
+        self.drift_reference.save(self.config['monitor']['reference_path'])
 
 
 if __name__ == '__main__':
@@ -91,11 +354,33 @@ if __name__ == '__main__':
     # Extract the estimator name
     trainer.get_estimator()
 
-    # Load the training dataset
-    trainer.load_traindata()
+    # Continue training the saved model on new data
+    if trainer.config['train']['incremental']['enabled']:
+        trainer.update_model()
+        if trainer.update_report is not None:
+            trainer.save_update_report()
+
+    # Fall back to a full search when there is no accepted update
+    if not trainer.updated:
+        # Load the training dataset
+        trainer.load_traindata()
+
+        # Train the machine learning model, or the best of every configured estimator
+        if trainer.config['train']['tournament']['enabled']:
+            trainer.run_tournament()
+            trainer.save_leaderboard()
+        else:
+            trainer.train_model()
 
-    # Train the machine learning model
-    trainer.train_model()
+        # Save the search compute report
+        trainer.save_search_report()
 
     # Save the trained model
-    trainer.save_model()
\ No newline at end of file
+    trainer.save_model()
+
+    # Export the trees for xgboost-free prediction
+    trainer.save_forest()
+
+    # Sketch the training data for the drift monitor
+    trainer.sketch_traindata()
+    trainer.save_drift_reference()
@@ -0,0 +1,25 @@
+import json
+import yaml
+from src.bench.benchmark import BENCH_STAGES, Benchmark
+
+def test_benchmark_runs_every_stage_on_a_small_sample(tmp_path):
+    config = yaml.safe_load(open('params.yaml'))
+    config['base']['log_level'] = 'WARNING'
+    config['train']['cv'] = 2
+    config['train']['parallelism'].update(n_cores=1, backend='threading')
+    config['bench'].update(work_dir=str(tmp_path / 'bench'), report=str(tmp_path / 'benchmark.json'),
+                           param_grid={'n_estimators': [10], 'max_depth': [3]})
+    config_path = tmp_path / 'params.yaml'
+    config_path.write_text(yaml.safe_dump(config))
+
+    benchmark = Benchmark(config_path=config_path)
+    benchmark.run([600])
+    benchmark.save_report()
+
+    report = json.loads((tmp_path / 'benchmark.json').read_text())
+    assert [result['stage'] for result in report['results']] == list(BENCH_STAGES)
+    assert all(result['rows'] == 600 and result['seconds'] > 0 and result['peak_rss_mb'] > 0
+               for result in report['results'])
+    # Every output stays inside the run directory
+    run_dir = tmp_path / 'bench' / '600'
+    assert (run_dir / 'model.ubj').exists() and (run_dir / 'metrics.json').exists()
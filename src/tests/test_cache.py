@@ -0,0 +1,68 @@
+import os
+import pytest
+from src.utils.cache import StageCache
+
+@pytest.fixture
+def stage_files(tmp_path):
+    dep, source, out = tmp_path / 'train.csv', tmp_path / 'stage.py', tmp_path / 'out' / 'model.ubj'
+    dep.write_text('a,b\n1,2\n')
+    source.write_text('print(1)\n')
+    out.parent.mkdir()
+    out.write_bytes(b'model')
+    return dep, source, out
+
+def test_key_changes_with_deps_params_and_sources(tmp_path, stage_files):
+    dep, source, _ = stage_files
+    cache = StageCache(tmp_path / 'cache', max_size_mb=1)
+    key = cache.key([dep], {'cv': 3}, [source])
+
+    assert cache.key([dep], {'cv': 3}, [source]) == key
+    assert cache.key([dep], {'cv': 5}, [source]) != key
+    source.write_text('print(2)\n')
+    source_key = cache.key([dep], {'cv': 3}, [source])
+    dep.write_text('a,b\n1,3\n')
+    assert len({key, source_key, cache.key([dep], {'cv': 3}, [source])}) == 3
+
+def test_restore_round_trips_outputs(tmp_path, stage_files):
+    dep, source, out = stage_files
+    cache = StageCache(tmp_path / 'cache', max_size_mb=1)
+    key = cache.key([dep], {}, [source])
+
+    assert not cache.restore('train_model', key, [str(out)])
+    cache.store('train_model', key, [str(out)])
+    out.unlink()
+    out.parent.rmdir()
+    assert cache.restore('train_model', key, [str(out)])
+    assert out.read_bytes() == b'model'
+
+def test_least_recently_used_entries_evicted_over_size_limit(tmp_path, stage_files):
+    _, _, out = stage_files
+    out.write_bytes(b'x' * 400 * 1024)
+    cache = StageCache(tmp_path / 'cache', max_size_mb=1)
+    for i, key in enumerate(['a', 'b']):
+        cache.store('train_model', key, [str(out)])
+        os.utime(tmp_path / 'cache' / f'train_model-{key}', (i, i))
+    # Restoring 'a' makes 'b' the least recently used entry
+    assert cache.restore('train_model', 'a', [str(out)])
+    cache.store('train_model', 'c', [str(out)])
+
+    assert sorted(entry.name for entry in (tmp_path / 'cache').iterdir()) == ['train_model-a', 'train_model-c']
+
+def test_store_with_missing_output_caches_nothing(tmp_path, stage_files):
+    _, _, out = stage_files
+    cache = StageCache(tmp_path / 'cache', max_size_mb=1)
+
+    with pytest.raises(FileNotFoundError, match='forest.npy'):
+        cache.store('train_model', 'a', [str(out), str(out.parent / 'forest.npy')])
+    assert not (tmp_path / 'cache').exists() or not any((tmp_path / 'cache').iterdir())
+
+def test_entry_over_size_limit_survives_its_own_eviction(tmp_path, stage_files, capsys):
+    _, _, out = stage_files
+    cache = StageCache(tmp_path / 'cache', max_size_mb=1)
+    cache.store('train_model', 'a', [str(out)])
+    out.write_bytes(b'x' * 2 * 1024 * 1024)
+    cache.store('train_model', 'b', [str(out)])
+
+    assert [entry.name for entry in (tmp_path / 'cache').iterdir()] == ['train_model-b']
+    assert 'exceeds the cache size limit' in capsys.readouterr().out
+    assert cache.restore('train_model', 'b', [str(out)])
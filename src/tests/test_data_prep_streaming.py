@@ -0,0 +1,101 @@
+import numpy as np
+import pandas as pd
+import pytest
+import yaml
+from src.stages.data_prep import DataPrep
+from src.utils.data_io import read_dataset
+
+@pytest.fixture
+def raw_data():
+    # Later rows introduce new categories, a missing value and a different dtype
+    data = {
+        'person_age': [25, 68, 35, 41, 30, 52, 23],
+        'person_income': [33000, 88000, 25000, 56000, 75500, 41000, 19000],
+        'person_home_ownership': ['OWN', 'RENT', 'OWN', 'RENT', 'MORTGAGE', 'OTHER', 'RENT'],
+        'person_emp_length': [6, 15, 12, 20, 18, np.nan, 1],
+        'loan_intent': ['PERSONAL', 'PERSONAL', 'MEDICAL', 'VENTURE', 'VENTURE', 'EDUCATION', 'MEDICAL'],
+        'loan_grade': ['A', 'B', 'C', 'D', 'E', 'G', 'A'],
+        'loan_amnt': [6000, 1500, 9000, 3200, 18000, 7000, 2500],
+        'loan_int_rate': [16.2, 10.2, 15.8, 14.3, 15.4, 11.1, 9.9],
+        'loan_status': [0, 1, 0, 1, 0, 0, 1],
+        'loan_percent_income': [0.2, 0.05, 0.42, 0.08, 0.2, 0.17, 0.13],
+        'cb_person_default_on_file': ['N', 'N', 'Y', 'N', 'Y', 'N', 'N'],
+        'cb_person_cred_hist_length': [3, 6, 5, 4, 6, 12, 2]
+    }
+    return pd.DataFrame(data)
+
+def write_config(tmp_path, raw_data, chunksize, data_format='csv', compact_dtypes=False):
+    load_path = tmp_path / 'raw_data.csv'
+    raw_data.to_csv(load_path, index=False)
+    config = {
+        'base': {'log_level': 'WARNING', 'data_format': data_format},
+        'data_process': {
+            'load_path': str(load_path),
+            'save_path': str(tmp_path / f'processed_{chunksize}.{data_format}'),
+            'chunksize': chunksize,
+            'artifact_path': str(tmp_path / f'preprocessor_{chunksize}.json'),
+            'compact_dtypes': compact_dtypes
+        },
+        'train': {'target': 'loanstatus'}
+    }
+    config_path = tmp_path / f'params_{chunksize}_{data_format}.yaml'
+    config_path.write_text(yaml.safe_dump(config))
+    return config_path
+
+@pytest.mark.parametrize('chunksize', [1, 2, 3, 100])
+def test_stream_prepdata_matches_in_memory(raw_data, tmp_path, chunksize):
+    prep = DataPrep(config_path=write_config(tmp_path, raw_data, None))
+    prep.load_data()
+    prep.encoder()
+    prep.loan_grade_prep()
+    prep.default_onfile_prep()
+    prep.subs_char_names()
+    prep.save_prepdata()
+
+    streaming_prep = DataPrep(config_path=write_config(tmp_path, raw_data, chunksize))
+    streaming_prep.fit_vocabularies()
+    streaming_prep.stream_prepdata()
+
+    expected = (tmp_path / 'processed_None.csv').read_bytes()
+    assert (tmp_path / f'processed_{chunksize}.csv').read_bytes() == expected
+
+@pytest.mark.parametrize('data_format', ['parquet', 'feather'])
+def test_stream_prepdata_binary_formats(raw_data, tmp_path, data_format):
+    prep = DataPrep(config_path=write_config(tmp_path, raw_data, None, data_format))
+    prep.load_data()
+    prep.encoder()
+    prep.loan_grade_prep()
+    prep.default_onfile_prep()
+    prep.subs_char_names()
+    prep.save_prepdata()
+
+    streaming_prep = DataPrep(config_path=write_config(tmp_path, raw_data, 3, data_format))
+    streaming_prep.fit_vocabularies()
+    streaming_prep.stream_prepdata()
+
+    expected = read_dataset(tmp_path / f'processed_None.{data_format}', data_format)
+    result = read_dataset(tmp_path / f'processed_3.{data_format}', data_format, memory_map=True)
+    pd.testing.assert_frame_equal(result, expected)
+
+def test_stream_prepdata_compact_dtypes(raw_data, tmp_path):
+    prep = DataPrep(config_path=write_config(tmp_path, raw_data, None, 'parquet', compact_dtypes=True))
+    prep.load_data()
+    prep.encoder()
+    prep.loan_grade_prep()
+    prep.default_onfile_prep()
+    prep.apply_schema()
+    prep.subs_char_names()
+    prep.save_prepdata()
+
+    streaming_prep = DataPrep(config_path=write_config(tmp_path, raw_data, 2, 'parquet', compact_dtypes=True))
+    streaming_prep.fit_vocabularies()
+    streaming_prep.stream_prepdata()
+
+    expected = read_dataset(tmp_path / 'processed_None.parquet', 'parquet')
+    result = read_dataset(tmp_path / 'processed_2.parquet', 'parquet')
+    pd.testing.assert_frame_equal(result, expected)
+    assert result['personhomeownershipRENT'].dtype == 'uint8'
+    assert result['loanstatus'].dtype == 'uint8'
+    assert result['loangrade'].dtype == 'int8'
+    assert result['personemplength'].dtype == 'float32'
+    assert prep.memory_report['bytes_per_row_after'] < prep.memory_report['bytes_per_row_before']
@@ -0,0 +1,87 @@
+import numpy as np
+import pandas as pd
+import pytest
+import yaml
+from src.stages.data_split import DataSplit
+from src.utils.data_io import read_dataset, write_dataset
+
+@pytest.fixture
+def dataset():
+    rng = np.random.default_rng(0)
+    return pd.DataFrame({
+        'loanamnt': rng.integers(500, 35000, size=5000),
+        'loanintrate': rng.normal(11, 3, size=5000).astype('float32'),
+        'loanstatus': (rng.random(5000) < 0.2).astype('uint8'),
+    })
+
+def write_config(tmp_path, stratify=False, chunksize=None):
+    config = {
+        'base': {'log_level': 'WARNING', 'data_format': 'parquet', 'memory_map': False, 'random_state': 42},
+        'data_process': {'save_path': str(tmp_path / 'processed.parquet')},
+        'data_split': {
+            'test_size': 0.2,
+            'method': 'hash',
+            'key_columns': None,
+            'stratify': stratify,
+            'chunksize': chunksize,
+            'trainset_path': str(tmp_path / 'train.parquet'),
+            'testset_path': str(tmp_path / 'test.parquet'),
+        },
+        'train': {'target': 'loanstatus'},
+    }
+    config_path = tmp_path / f'params_{stratify}_{chunksize}.yaml'
+    config_path.write_text(yaml.safe_dump(config))
+    return config_path
+
+def split(config_path, dataset):
+    spliter = DataSplit(config_path=config_path)
+    spliter.dataset = dataset
+    spliter.data_split()
+    return spliter.train_dataset, spliter.test_dataset
+
+@pytest.mark.parametrize('stratify', [False, True])
+def test_stream_split_matches_in_memory(dataset, tmp_path, stratify):
+    train, test = split(write_config(tmp_path, stratify), dataset)
+    write_dataset(dataset, tmp_path / 'processed.parquet', 'parquet')
+    DataSplit(config_path=write_config(tmp_path, stratify, chunksize=700)).stream_split()
+
+    pd.testing.assert_frame_equal(read_dataset(tmp_path / 'train.parquet', 'parquet'), train.reset_index(drop=True))
+    pd.testing.assert_frame_equal(read_dataset(tmp_path / 'test.parquet', 'parquet'), test.reset_index(drop=True))
+    if stratify:
+        for label in (0, 1):
+            share = (test['loanstatus'] == label).sum() / (dataset['loanstatus'] == label).sum()
+            assert abs(share - 0.2) < 0.002
+
+@pytest.mark.parametrize('stratify', [False, True])
+def test_hash_split_is_stable_as_rows_are_added(dataset, tmp_path, stratify):
+    config_path = write_config(tmp_path, stratify)
+    spliter = DataSplit(config_path=config_path)
+    spliter.dataset = dataset.iloc[:3000]
+    spliter.data_split()
+    # Later rows arrive and the file is reordered: earlier rows keep their set
+    grown = dataset.sample(frac=1, random_state=1).astype({'loanamnt': 'float32'})
+    grown_spliter = DataSplit(config_path=config_path)
+    grown_spliter.dataset = grown
+    grown_spliter.data_split()
+
+    moved = set(spliter.test_dataset.index) ^ (set(grown_spliter.test_dataset.index) & set(range(3000)))
+    if not stratify:
+        assert not moved
+        return
+    # Stratified cutoffs move with the data: only rows between a class's old and new cutoff move
+    first = dataset.iloc[:3000]
+    buckets = spliter.hash_buckets(first)
+    labels = first['loanstatus'].to_numpy()
+    low = np.minimum(pd.Series(labels).map(spliter.cutoffs), pd.Series(labels).map(grown_spliter.cutoffs))
+    high = np.maximum(pd.Series(labels).map(spliter.cutoffs), pd.Series(labels).map(grown_spliter.cutoffs))
+    between = set(np.flatnonzero((buckets >= low) & (buckets < high)))
+    assert moved == between
+    assert len(moved) < 0.02 * len(first)
+
+def test_hash_split_is_the_same_from_csv(dataset, tmp_path):
+    config_path = write_config(tmp_path)
+    _, test = split(config_path, dataset)
+    dataset.to_csv(tmp_path / 'processed.csv', index=False)
+    _, csv_test = split(config_path, pd.read_csv(tmp_path / 'processed.csv'))
+
+    assert set(test.index) == set(csv_test.index)
@@ -0,0 +1,54 @@
+import numpy as np
+import pandas as pd
+from src.report.drift import HistogramSketch, drift_statistics
+from src.stages.monitor import drift_frame
+
+def population(n, shift=0.0, seed=0):
+    rng = np.random.default_rng(seed)
+    income = rng.normal(50 + shift, 10, n)
+    income[rng.random(n) < 0.05] = np.nan
+    return pd.DataFrame({'income': income, 'owner': rng.integers(0, 2, n).astype('uint8')})
+
+def test_chunk_sketches_merge_into_the_full_sketch(tmp_path):
+    reference = HistogramSketch.from_data(population(5000), n_bins=10)
+    data = population(3000, seed=1)
+    full = HistogramSketch(reference.cuts)
+    full.update(data)
+    chunks = []
+    for i, chunk in enumerate([data.iloc[:1000], data.iloc[1000:2500], data.iloc[2500:]]):
+        sketch = HistogramSketch(reference.cuts)
+        sketch.update(chunk)
+        sketch.save(tmp_path / f'{i}.json')
+        chunks.append(HistogramSketch.load(tmp_path / f'{i}.json'))
+    merged = chunks[0].merge(chunks[1]).merge(chunks[2])
+
+    for column in full.counts:
+        np.testing.assert_array_equal(merged.counts[column], full.counts[column])
+    # Columns with few distinct values get one bin per value, plus the open ends and missing values
+    assert len(reference.counts['owner']) == 2 + 2
+    assert full.counts['income'][-1] == data['income'].isna().sum()
+
+def test_drift_statistics_flag_shifted_columns():
+    reference = HistogramSketch.from_data(population(5000), n_bins=10)
+    stable, shifted = HistogramSketch(reference.cuts), HistogramSketch(reference.cuts)
+    stable.update(population(5000, seed=2))
+    shifted.update(population(5000, shift=10, seed=2))
+
+    assert drift_statistics(reference, stable)['psi'].max() < 0.02
+    statistics = drift_statistics(reference, shifted).set_index('column')
+    assert statistics.loc['income', 'psi'] > 0.25
+    assert statistics.loc['income', 'ks'] > 0.3
+    assert statistics.loc['owner', 'psi'] < 0.02
+
+def test_float64_training_data_has_no_drift_against_its_scored_float32_features():
+    # CSV data keeps float64 values that are not exact in float32, such as ratios on cut points
+    rng = np.random.default_rng(0)
+    features = pd.DataFrame({'loanpercentincome': rng.integers(1, 60, 5000) / 100,
+                             'loanintrate': rng.normal(11, 3, 5000).round(2)})
+    probability = rng.random(5000).astype('float32')
+    reference = HistogramSketch.from_data(drift_frame(features, probability), n_bins=10)
+    # Scoring sketches the float32 matrix the model was fed
+    scored = HistogramSketch(reference.cuts)
+    scored.update(drift_frame(pd.DataFrame(features.to_numpy('float32'), columns=features.columns), probability))
+
+    assert drift_statistics(reference, scored)['psi'].max() < 1e-9
@@ -0,0 +1,29 @@
+import numpy as np
+import pandas as pd
+from src.utils.encoding import OneHotEncoder, map_categories
+
+def test_one_hot_encoder_columns_and_unseen_categories():
+    fit = pd.DataFrame({'age': [25, 68, 35], 'home': ['OWN', 'RENT', np.nan], 'intent': ['EDU', 'MED', 'EDU']},
+                       index=[5, 6, 7])
+    enc = OneHotEncoder(cols=['home', 'intent']).fit(fit)
+
+    # Missing values seen in fit get their own last column, unseen ones encode as zeros
+    new = pd.DataFrame({'age': [41, 30, 52], 'home': [np.nan, 'OTHER', 'RENT'], 'intent': ['MED', np.nan, 'VEN']})
+    expected = pd.DataFrame({
+        'age': [41, 30, 52],
+        'home_OWN': [0, 0, 0],
+        'home_RENT': [0, 0, 1],
+        'home_nan': [1, 0, 0],
+        'intent_EDU': [0, 0, 0],
+        'intent_MED': [1, 0, 0],
+    })
+    pd.testing.assert_frame_equal(enc.transform(new), expected)
+    assert enc.transform(fit).index.tolist() == [5, 6, 7]
+
+def test_map_categories_matches_series_map():
+    mapping = {'A': 1, 'B': 2, 'C': 3}
+    mapped = pd.Series(['B', 'A', 'C'], index=[3, 1, 2])
+    unmapped = pd.Series(['B', 'Z', np.nan, 'A'])
+
+    pd.testing.assert_series_equal(map_categories(mapped, mapping), mapped.map(mapping))
+    pd.testing.assert_series_equal(map_categories(unmapped, mapping), unmapped.map(mapping))
@@ -0,0 +1,32 @@
+import numpy as np
+import pytest
+from xgboost import XGBClassifier
+from src.serve.forest import NumpyForest, export_forest, load_forest
+from src.train.search import QuantizedGridSearch
+
+@pytest.fixture
+def train_data():
+    rng = np.random.default_rng(0)
+    X = rng.normal(size=(600, 6)).astype('float32')
+    y = (X[:, 0] + 0.5 * X[:, 1] + rng.normal(scale=0.8, size=600) > 0).astype('int32')
+    # Missing values follow each split's default branch
+    X[::5, 1] = np.nan
+    return X, y
+
+@pytest.mark.parametrize('model', [
+    XGBClassifier(n_estimators=30, max_depth=5),
+    QuantizedGridSearch(param_grid={'n_estimators': [15], 'max_depth': [3, 6]}, cv=3),
+])
+def test_forest_matches_xgboost(train_data, model, tmp_path):
+    X, y = train_data
+    model.fit(X, y)
+    export_forest(model, tmp_path / 'forest.npy')
+    forest = NumpyForest.load(tmp_path / 'forest.npy', batch_size=128)
+
+    np.testing.assert_allclose(forest.predict_proba(X), model.predict_proba(X), atol=1e-6)
+    np.testing.assert_array_equal(forest.predict(X), model.predict(X))
+
+def test_use_forest_rejected_without_an_exported_forest():
+    config = {'train': {'estimator_name': 'xgb', 'tournament': {'enabled': True}, 'forest_path': 'forest.npy'}}
+    with pytest.raises(ValueError):
+        load_forest(config)
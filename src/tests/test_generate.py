@@ -0,0 +1,15 @@
+import pandas as pd
+from src.bench.generate import DEFAULT_RATE, LOAN_GRADE, generate_loans
+from src.stages.data_prep import ENCODED_COLUMNS, MAPPED_COLUMNS
+
+def test_generated_loans_match_raw_schema():
+    chunks = list(generate_loans(50000, seed=1, chunk_rows=20000))
+    loans = pd.concat(chunks, ignore_index=True)
+
+    assert [len(chunk) for chunk in chunks] == [20000, 20000, 10000]
+    assert set(ENCODED_COLUMNS + list(MAPPED_COLUMNS)) < set(loans.columns)
+    for column, mapping in MAPPED_COLUMNS.items():
+        assert loans[column].isin(list(mapping)).all()
+    assert abs(loans['loan_status'].mean() - DEFAULT_RATE) < 0.01
+    assert abs((loans['loan_grade'] == 'A').mean() - LOAN_GRADE['A']) < 0.01
+    pd.testing.assert_frame_equal(next(generate_loans(100, seed=1)), next(generate_loans(100, seed=1)))
@@ -0,0 +1,14 @@
+from src.bench.importtime import IMPORT_MODULES, measure_import, parse_importtime
+
+def test_parse_importtime_depth():
+    stderr = ('import time: self [us] | cumulative | imported package\n'
+              'import time:       120 |        120 |   json.decoder\n'
+              'import time:       300 |        420 | json\n')
+    imports = parse_importtime(stderr)
+
+    assert [(entry['module'], entry['depth']) for entry in imports] == [('json.decoder', 1), ('json', 0)]
+    assert imports[1]['cumulative_us'] == 420
+
+def test_entry_points_defer_heavy_imports():
+    for module in IMPORT_MODULES.values():
+        assert measure_import(module)['lazy_packages'] == [], module
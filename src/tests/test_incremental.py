@@ -0,0 +1,104 @@
+import json
+import numpy as np
+import pandas as pd
+import pytest
+import subprocess
+import sys
+import xgboost as xgb
+import yaml
+from src.stages.train_model import TrainModel
+from src.train.incremental import UnsupportedUpdate, continue_training
+from src.train.model_io import hash_dataframe, load_model
+
+def booster_and_data():
+    rng = np.random.default_rng(0)
+    X = rng.random((400, 5), dtype='float32')
+    y = (X[:, 0] + 0.2 * rng.random(400) > 0.6).astype('int32')
+    booster = xgb.train({'objective': 'binary:logistic', 'max_depth': 3}, xgb.DMatrix(X, label=y),
+                        num_boost_round=10)
+    return booster, X, y
+
+def test_boost_appends_rounds_and_keeps_previous_model():
+    booster, X, y = booster_and_data()
+    before = booster.inplace_predict(X)
+    updated = continue_training(booster, X, y, params={'max_depth': 3, 'n_estimators': 10},
+                                mode='boost', n_rounds=5)
+
+    assert updated.num_boosted_rounds() == 15
+    assert booster.num_boosted_rounds() == 10
+    np.testing.assert_array_equal(booster.inplace_predict(X), before)
+
+def test_refresh_keeps_trees_and_refits_leaves():
+    booster, X, y = booster_and_data()
+    refreshed = continue_training(booster, X[:200], 1 - y[:200], params={'max_depth': 3},
+                                  mode='refresh', n_rounds=5)
+
+    assert refreshed.num_boosted_rounds() == 10
+    assert not np.allclose(refreshed.inplace_predict(X), booster.inplace_predict(X))
+    with pytest.raises(UnsupportedUpdate):
+        continue_training(booster, X, y, params={}, mode='prune', n_rounds=5)
+
+def loans(rows, seed):
+    rng = np.random.default_rng(seed)
+    X = rng.random((rows, 4), dtype='float32')
+    y = (X[:, 0] + 0.3 * rng.random(rows) > 0.7).astype('uint8')
+    return pd.DataFrame(X, columns=['a', 'b', 'c', 'd']).assign(loanstatus=y)
+
+@pytest.fixture
+def trained_config(tmp_path):
+    loans(600, seed=0).to_parquet(tmp_path / 'train.parquet')
+    loans(300, seed=1).to_parquet(tmp_path / 'new.parquet')
+    config = yaml.safe_load(open('params.yaml'))
+    config['base']['log_level'] = 'WARNING'
+    config['data_split']['trainset_path'] = str(tmp_path / 'train.parquet')
+    train = config['train']
+    train.update(model_path=str(tmp_path / 'model.ubj'), search_report=str(tmp_path / 'search_report.json'),
+                 forest_path=str(tmp_path / 'forest.npy'), cv=2)
+    train['estimators']['xgb']['param_grid'] = {'n_estimators': [10], 'max_depth': [3]}
+    train['parallelism'].update(n_cores=1, backend='threading')
+    train['incremental'].update(new_data_path=str(tmp_path / 'new.parquet'), n_rounds=5,
+                                report=str(tmp_path / 'update_report.json'))
+    config['monitor']['reference_path'] = str(tmp_path / 'drift_reference.json')
+    config['instrument']['enabled'] = False
+    config_path = tmp_path / 'params.yaml'
+    config_path.write_text(yaml.safe_dump(config))
+    # The first run has no model to update and trains from scratch
+    train_stage(config_path, enabled=True)
+    return config_path
+
+def train_stage(config_path, **incremental):
+    config = yaml.safe_load(config_path.read_text())
+    config['train']['incremental'].update(incremental)
+    config_path.write_text(yaml.safe_dump(config))
+    subprocess.run([sys.executable, '-m', 'src.stages.train_model', f'--config={config_path}'],
+                   check=True, stdout=subprocess.DEVNULL)
+
+def test_accepted_update_keeps_the_search_and_records_the_update(trained_config, tmp_path):
+    before = load_model(tmp_path / 'model.ubj')
+    train_stage(trained_config, f1_tolerance=1.0)
+    model = load_model(tmp_path / 'model.ubj')
+
+    assert json.loads((tmp_path / 'update_report.json').read_text())['accepted']
+    assert model.get_booster().num_boosted_rounds() == 15
+    assert model.meta['data_hash'] == before.meta['data_hash']
+    assert model.meta['validation_f1'] == before.meta['validation_f1']
+    [update] = model.meta['updates']
+    assert update['mode'] == 'boost' and update['boosting_rounds'] == 15
+    assert update['data_hash'] == hash_dataframe(pd.read_parquet(tmp_path / 'new.parquet'))
+    assert update['rows'] == 300 - json.loads((tmp_path / 'update_report.json').read_text())['validation_rows']
+
+def test_rejected_update_falls_back_to_a_full_search(trained_config, tmp_path):
+    # No update can improve the weighted F1 by more than one
+    train_stage(trained_config, f1_tolerance=-1.0)
+    model = load_model(tmp_path / 'model.ubj')
+
+    assert not json.loads((tmp_path / 'update_report.json').read_text())['accepted']
+    assert model.get_booster().num_boosted_rounds() == 10 and model.meta['updates'] == []
+    assert model.meta['data_hash'] == hash_dataframe(pd.read_parquet(tmp_path / 'train.parquet'))
+
+def test_update_needs_validation_rows_of_each_class(trained_config, tmp_path):
+    loans(300, seed=1).sort_values('loanstatus').head(40).to_parquet(tmp_path / 'new.parquet')
+    trainer = TrainModel(config_path=trained_config)
+
+    with pytest.raises(ValueError, match='two rows of each class'):
+        trainer.update_model()
@@ -0,0 +1,28 @@
+import json
+from src.utils.logs import get_logger, instrument
+
+class Stage:
+    def __init__(self, settings):
+        self.config = {'instrument': settings}
+        self.logger = get_logger('STAGE', log_level='WARNING')
+
+    @instrument(rows='data')
+    def load(self, n):
+        self.data = list(range(n))
+        return n
+
+def test_instrument_records_events_and_totals(tmp_path):
+    settings = {'enabled': True, 'events': str(tmp_path / 'events.jsonl'), 'dir': str(tmp_path), 'profile': True}
+    stage = Stage(settings)
+    assert stage.load(3) == 3 and stage.load(5) == 5
+
+    events = [json.loads(line) for line in (tmp_path / 'events.jsonl').read_text().splitlines()]
+    assert [(event['method'], event['rows']) for event in events] == [('load', 3), ('load', 5)]
+    totals = json.loads((tmp_path / 'stage.json').read_text())['load']
+    assert totals['calls'] == 2 and totals['rows'] == 8 and totals['peak_rss_mb'] > 0
+    assert (tmp_path / 'stage.load.prof').exists()
+
+def test_instrument_disabled_writes_nothing(tmp_path):
+    stage = Stage({'enabled': False, 'events': str(tmp_path / 'events.jsonl'), 'dir': str(tmp_path)})
+    assert stage.load(2) == 2
+    assert list(tmp_path.iterdir()) == []
@@ -0,0 +1,54 @@
+import numpy as np
+from sklearn.metrics import average_precision_score, confusion_matrix, f1_score, roc_auc_score
+from src.report.metrics import macro_f1, ranking_metrics, threshold_sweep
+
+def scores():
+    rng = np.random.default_rng(0)
+    y = rng.integers(0, 2, size=2000)
+    # Rounded so that many applications share a score
+    probability = np.round(np.clip(0.3 * y + 0.7 * rng.random(2000), 0, 1), 2)
+    return y, probability
+
+def test_ranking_metrics_match_sklearn():
+    y, probability = scores()
+    metrics = ranking_metrics(y, probability)
+
+    assert np.isclose(metrics['roc_auc'], roc_auc_score(y, probability))
+    assert np.isclose(metrics['pr_auc'], average_precision_score(y, probability))
+    assert np.isclose(metrics['gini'], 2 * roc_auc_score(y, probability) - 1)
+
+def test_macro_f1_matches_sklearn():
+    y, probability = scores()
+    for prediction in [(probability > 0.5).astype('int64'), np.zeros_like(y), y]:
+        cm = confusion_matrix(y, prediction, labels=[0, 1])
+        assert np.isclose(macro_f1(cm), f1_score(y, prediction, average='macro'))
+    # A class absent from both actual and predicted classes is left out of the mean
+    assert macro_f1(np.array([[5, 0], [0, 0]])) == 1.0
+
+def test_threshold_sweep_matches_confusion_matrix():
+    y, probability = scores()
+    exposure = np.arange(len(y), dtype='float64')
+    thresholds = np.linspace(0, 1, 21)
+    sweep = threshold_sweep(y, probability, thresholds, exposure=exposure, loss_given_default=0.5)
+
+    for row, threshold in zip(sweep.itertuples(), thresholds):
+        prediction = (probability > threshold).astype('int64')
+        tn, fp, fn, tp = confusion_matrix(y, prediction, labels=[0, 1]).ravel()
+        assert (row.tp, row.fp, row.tn, row.fn) == (tp, fp, tn, fn)
+        assert np.isclose(row.f1, f1_score(y, prediction, zero_division=0))
+        assert np.isclose(row.approval_rate, (prediction == 0).mean())
+        assert np.isclose(row.expected_loss, 0.5 * exposure[(prediction == 0) & (y == 1)].sum())
+
+def test_uint8_target_gives_integer_counts():
+    y, probability = scores()
+    sweep = threshold_sweep(y.astype('uint8'), probability, np.linspace(0, 1, 11))
+    reference = threshold_sweep(y, probability, np.linspace(0, 1, 11))
+
+    assert all(sweep[column].dtype == 'int64' for column in ['tp', 'fp', 'tn', 'fn'])
+    assert sweep.equals(reference)
+    assert ranking_metrics(y.astype('uint8'), probability) == ranking_metrics(y, probability)
+
+def test_ranking_metrics_undefined_for_a_single_class():
+    _, probability = scores()
+    for y in [np.zeros(len(probability), dtype='uint8'), np.ones(len(probability), dtype='uint8')]:
+        assert all(np.isnan(value) for value in ranking_metrics(y, probability).values())
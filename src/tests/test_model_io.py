@@ -0,0 +1,21 @@
+import numpy as np
+import pandas as pd
+from src.train.model_io import hash_dataframe, load_model, model_meta_path, save_model
+from src.train.search import QuantizedGridSearch
+
+def test_saved_booster_predicts_like_search(tmp_path):
+    rng = np.random.default_rng(0)
+    X = rng.normal(size=(300, 4)).astype('float32')
+    y = (X[:, 0] - X[:, 2] + rng.normal(scale=0.5, size=300) > 0).astype('int32')
+    search = QuantizedGridSearch(param_grid={'n_estimators': [10], 'max_depth': [2, 3]}, cv=3).fit(X, y)
+    df = pd.DataFrame(X, columns=list('abcd'))
+
+    path = tmp_path / 'model.ubj'
+    save_model(search, path, feature_names=df.columns,
+               metadata={'best_params': search.best_params_, 'data_hash': hash_dataframe(df)})
+    model = load_model(path)
+
+    assert (tmp_path / 'model.meta.json').exists() and model_meta_path(path).endswith('model.meta.json')
+    assert model.feature_names == list('abcd')
+    assert model.meta['best_params'] == search.best_params_
+    np.testing.assert_array_equal(model.predict_proba(X), search.predict_proba(X))
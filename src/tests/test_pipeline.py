@@ -0,0 +1,55 @@
+import json
+import pandas as pd
+import yaml
+from src.bench.generate import generate_loans
+from src.pipeline import Pipeline
+
+def write_config(tmp_path):
+    raw_path = tmp_path / 'raw_data.csv'
+    next(generate_loans(1500, seed=1)).to_csv(raw_path, index=False)
+    config = yaml.safe_load(open('params.yaml'))
+    config['base']['log_level'] = 'WARNING'
+    config['data_process'].update(load_path=str(raw_path), save_path=str(tmp_path / 'processed.parquet'),
+                                  artifact_path=str(tmp_path / 'preprocessor.json'),
+                                  memory_report=str(tmp_path / 'prep_memory.json'))
+    config['data_split'].update(trainset_path=str(tmp_path / 'train.parquet'),
+                                testset_path=str(tmp_path / 'test.parquet'))
+    train = config['train']
+    train.update(model_path=str(tmp_path / 'model.ubj'), search_report=str(tmp_path / 'search_report.json'),
+                 forest_path=str(tmp_path / 'forest.npy'), cv=2)
+    train['parallelism']['backend'] = 'threading'
+    train['estimators'] = {'hgb': {'param_grid': {'max_iter': [20], 'max_depth': [3]}},
+                           'logreg': {'param_grid': {'model__C': [0.1, 1]}}}
+    train['tournament'].update(enabled=True, leaderboard=str(tmp_path / 'leaderboard.csv'))
+    config['evaluate'].update(metrics_file=str(tmp_path / 'metrics.json'), render_confusion_matrix=False,
+                              confusion_matrix_data=str(tmp_path / 'confusion_matrix_data.csv'))
+    config['evaluate']['threshold_sweep']['metrics_file'] = str(tmp_path / 'threshold_metrics.csv')
+    config['monitor'].update(reference_path=str(tmp_path / 'drift_reference.json'),
+                             data_path=str(tmp_path / 'test.parquet'),
+                             metrics_file=str(tmp_path / 'drift.json'),
+                             features_file=str(tmp_path / 'drift_features.csv'))
+    config['instrument'].update(dir=str(tmp_path / 'performance'),
+                                events=str(tmp_path / 'performance' / 'events.jsonl'))
+    config['cache'].update(enabled=True, dir=str(tmp_path / 'cache'))
+    config_path = tmp_path / 'params.yaml'
+    config_path.write_text(yaml.safe_dump(config))
+    return config_path
+
+def test_pipeline_runs_when_a_tournament_is_won_without_xgboost(tmp_path):
+    config_path = write_config(tmp_path)
+    # A forest left by an earlier xgb model must not outlive it
+    (tmp_path / 'forest.npy').write_bytes(b'stale')
+    (tmp_path / 'forest.json').write_text('{}')
+    Pipeline(config_path=config_path).run()
+
+    meta = json.loads((tmp_path / 'model.meta.json').read_text())
+    assert meta['format'] == 'joblib' and meta['estimator_name'] in ('hgb', 'logreg')
+    assert set(pd.read_csv(tmp_path / 'leaderboard.csv')['estimator']) == {'hgb', 'logreg'}
+    assert not (tmp_path / 'forest.npy').exists() and not (tmp_path / 'forest.json').exists()
+    assert (tmp_path / 'metrics.json').exists() and (tmp_path / 'drift.json').exists()
+
+    # A second run restores every stage from the cache
+    (tmp_path / 'metrics.json').unlink()
+    pipeline = Pipeline(config_path=config_path)
+    pipeline.run()
+    assert pipeline.model is None and (tmp_path / 'metrics.json').exists()
@@ -0,0 +1,63 @@
+import numpy as np
+import pandas as pd
+import pytest
+import xgboost as xgb
+from src.report.reasons import ReasonCoder, reason_coder_from_config
+from src.serve.forest import NumpyForest, export_forest
+from src.stages.data_prep import source_variables
+from src.train.model_io import save_model
+
+def test_source_variables_group_one_hot_columns():
+    columns = ['personage', 'personhomeownershipRENT', 'personhomeownershipOWN', 'loanintentMEDICAL',
+               'loanintrate', 'Unnamed: 0']
+    assert source_variables(columns) == ['personage', 'personhomeownership', 'personhomeownership',
+                                         'loanintent', 'loanintrate', None]
+
+def test_reasons_sum_grouped_contributions():
+    rng = np.random.default_rng(0)
+    X = rng.random((300, 4), dtype='float32')
+    y = (X[:, 0] + X[:, 1] > 1).astype('int32')
+    booster = xgb.train({'objective': 'binary:logistic', 'max_depth': 3}, xgb.DMatrix(X, label=y),
+                        num_boost_round=10)
+    coder = ReasonCoder(booster, ['a', 'b1', 'b2', 'c'], ['a', 'b', 'b', None], top_k=3, batch_size=128)
+
+    features = booster.predict(xgb.DMatrix(X), pred_contribs=True)
+    grouped = np.column_stack([features[:, 0], features[:, 1] + features[:, 2]])
+    np.testing.assert_allclose(coder.contributions(X), grouped, rtol=1e-5, atol=1e-6)
+
+    codes, values = coder.top_reasons(X)
+    assert codes.shape == (300, 3) and (codes[:, 2] == -1).all()
+    expected = np.where(grouped.max(axis=1) > 0, grouped.argmax(axis=1), -1)
+    np.testing.assert_array_equal(codes[:, 0], expected)
+    assert (np.nan_to_num(values[:, 0]) >= np.nan_to_num(values[:, 1])).all()
+
+    frame = coder.reasons_frame(X, rows=X[:, 0] > 0.5)
+    assert list(frame.columns[:2]) == ['reason_1', 'contribution_1']
+    assert frame.loc[X[:, 0] <= 0.5, 'reason_1'].isna().all()
+
+def test_reason_coder_of_a_forest_uses_the_saved_booster(tmp_path):
+    rng = np.random.default_rng(0)
+    X = rng.random((300, 3), dtype='float32')
+    model = xgb.XGBClassifier(n_estimators=5, max_depth=2).fit(X, (X[:, 0] > 0.5).astype('int32'))
+    columns = ['personage', 'personhomeownershipRENT', 'personhomeownershipOWN']
+    config = {'train': {'model_path': str(tmp_path / 'model.ubj')},
+              'reasons': {'top_k': 2, 'batch_size': 100, 'approximate': False}}
+    save_model(model, config['train']['model_path'], feature_names=pd.Index(columns), metadata={})
+    export_forest(model, tmp_path / 'forest.npy')
+
+    coder = reason_coder_from_config(config, NumpyForest.load(tmp_path / 'forest.npy'), columns)
+    assert coder.reasons == ['personage', 'personhomeownership'] and coder.top_k == 2
+    np.testing.assert_allclose(coder.contributions(X),
+                               reason_coder_from_config(config, model, columns).contributions(X))
+
+def test_reason_codes_need_a_booster(tmp_path):
+    from sklearn.linear_model import LogisticRegression
+
+    X = np.random.default_rng(0).random((50, 2), dtype='float32')
+    model = LogisticRegression().fit(X, X[:, 0] > 0.5)
+    config = {'train': {'model_path': str(tmp_path / 'model.ubj')}, 'reasons': {}}
+    save_model(model, config['train']['model_path'], feature_names=pd.Index(['a', 'b']),
+               metadata={'estimator_name': 'logreg'})
+
+    with pytest.raises(ValueError, match='XGBoost'):
+        reason_coder_from_config(config, model, ['a', 'b'])
@@ -0,0 +1,64 @@
+import numpy as np
+import pytest
+from src.train.search import QuantizedGridSearch
+
+@pytest.fixture
+def train_data():
+    rng = np.random.default_rng(0)
+    X = rng.normal(size=(600, 6)).astype('float32')
+    y = (X[:, 0] + 0.5 * X[:, 1] + rng.normal(scale=0.8, size=600) > 0).astype('int32')
+    return X, y
+
+@pytest.fixture
+def param_grid():
+    return {'learning_rate': [0.3], 'n_estimators': [5, 12, 20], 'max_depth': [2, 4], 'subsample': [0.8, 1]}
+
+def test_warm_start_matches_separate_fits(train_data, param_grid):
+    X, y = train_data
+    search = QuantizedGridSearch(param_grid=param_grid, cv=3).fit(X, y)
+    warm_search = QuantizedGridSearch(param_grid=param_grid, cv=3, warm_start=True).fit(X, y)
+
+    for split in range(3):
+        np.testing.assert_array_equal(warm_search.cv_results_[f'split{split}_test_score'],
+                                      search.cv_results_[f'split{split}_test_score'])
+    assert warm_search.best_params_ == search.best_params_
+    np.testing.assert_array_equal(warm_search.predict_proba(X), search.predict_proba(X))
+
+def test_warm_start_trains_largest_tree_count_only(train_data, param_grid):
+    X, y = train_data
+    search = QuantizedGridSearch(param_grid=param_grid, cv=3, warm_start=True).fit(X, y)
+
+    rounds = search.cv_results_['boosting_rounds']
+    assert sorted(set(rounds)) == [0, 20]
+    assert (rounds > 0).sum() == 4
+
+def test_results_store_reuses_completed_fits(train_data, param_grid, tmp_path):
+    X, y = train_data
+    store = tmp_path / 'search_results.jsonl'
+    small_grid = dict(param_grid, max_depth=[2])
+    QuantizedGridSearch(param_grid=small_grid, cv=3, results_store=store).fit(X, y)
+
+    search = QuantizedGridSearch(param_grid=param_grid, cv=3, results_store=store).fit(X, y)
+    reference = QuantizedGridSearch(param_grid=param_grid, cv=3).fit(X, y)
+
+    np.testing.assert_array_equal(search.cv_results_['mean_test_score'],
+                                  reference.cv_results_['mean_test_score'])
+    trained = search.cv_results_['boosting_rounds'] > 0
+    depths = np.array([params['max_depth'] for params in search.cv_results_['params']])
+    assert (depths[trained] == 4).all() and trained.sum() == 6
+    assert len(store.read_text().splitlines()) == 12 * 3
+
+def test_matches_grid_search_cv(train_data, param_grid):
+    from sklearn.metrics import f1_score, make_scorer
+    from sklearn.model_selection import GridSearchCV
+    from xgboost import XGBClassifier
+
+    X, y = train_data
+    search = QuantizedGridSearch(param_grid=param_grid, cv=3).fit(X, y)
+    reference = GridSearchCV(XGBClassifier(n_jobs=1), param_grid=param_grid, cv=3,
+                             scoring=make_scorer(f1_score, average='weighted')).fit(X, y)
+
+    assert search.cv_results_['params'] == reference.cv_results_['params']
+    np.testing.assert_allclose(search.cv_results_['mean_test_score'], reference.cv_results_['mean_test_score'])
+    assert search.best_params_ == reference.best_params_
+    np.testing.assert_allclose(search.predict_proba(X), reference.predict_proba(X), rtol=1e-6)
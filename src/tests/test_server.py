@@ -0,0 +1,105 @@
+from http.client import HTTPConnection
+import json
+import numpy as np
+import pandas as pd
+import pytest
+import threading
+import yaml
+from src.bench.generate import generate_loans
+from src.serve.server import ScoreServer
+from src.stages.data_prep import DataPrep
+from src.stages.score import ScoreModel
+from src.train.model_io import save_model
+
+@pytest.fixture
+def served_config(tmp_path):
+    from xgboost import XGBClassifier
+
+    raw_path = tmp_path / 'applications.csv'
+    next(generate_loans(400, seed=1)).to_csv(raw_path, index=False)
+    config = yaml.safe_load(open('params.yaml'))
+    config['base'].update(log_level='WARNING', data_format='csv')
+    config['instrument']['enabled'] = False
+    config['data_process'].update(load_path=str(raw_path), chunksize=None,
+                                  artifact_path=str(tmp_path / 'preprocessor.json'))
+    config['train']['model_path'] = str(tmp_path / 'model.ubj')
+    config['score'].update(use_forest=False, drift_sketch=None, reason_codes=False, batch_size=150)
+    config['serve'].update(port=0)
+    config_path = tmp_path / 'params.yaml'
+    config_path.write_text(yaml.safe_dump(config))
+
+    preparer = DataPrep(config_path=config_path)
+    preparer.load_data()
+    preparer.encoder()
+    preparer.loan_grade_prep()
+    preparer.default_onfile_prep()
+    preparer.subs_char_names()
+    preparer.save_artifact()
+    prepared = preparer.get_prepdata()
+    X = prepared.drop(columns='loanstatus')
+    model = XGBClassifier(n_estimators=10, max_depth=3).fit(X.to_numpy('float32'), prepared['loanstatus'])
+    save_model(model, config['train']['model_path'], feature_names=X.columns, metadata={})
+    return config_path, raw_path
+
+def test_online_scores_match_batch_scores(served_config, tmp_path):
+    config_path, raw_path = served_config
+    scorer = ScoreModel(config_path=config_path)
+    scorer.load_artifacts()
+    scorer.score(str(raw_path), str(tmp_path / 'scores.parquet'))
+    batch = pd.read_parquet(tmp_path / 'scores.parquet')['probability'].to_numpy()
+
+    server = ScoreServer(config_path=config_path)
+    server.load_artifacts()
+    server.batcher.start()
+    raw = pd.read_csv(raw_path)
+    records = raw.astype(object).where(raw.notna(), None).to_dict('records')
+    online = [server.batcher.score(server.encoder.encode(record), 0.0) for record in records]
+
+    np.testing.assert_allclose(online, batch, rtol=1e-6)
+
+def test_scoring_records_preparation_under_score_stage(served_config, tmp_path):
+    config_path, raw_path = served_config
+    config = yaml.safe_load(config_path.read_text())
+    config['instrument'].update(enabled=True, dir=str(tmp_path / 'performance'),
+                                events=str(tmp_path / 'performance' / 'events.jsonl'))
+    config_path.write_text(yaml.safe_dump(config))
+    scorer = ScoreModel(config_path=config_path)
+    scorer.load_artifacts()
+    scorer.score(str(raw_path), str(tmp_path / 'scores.parquet'))
+
+    assert not (tmp_path / 'performance' / 'data_prep.json').exists()
+    assert 'encoder' in json.loads((tmp_path / 'performance' / 'score.json').read_text())
+
+def post_score(server, body):
+    http_server = server.make_server()
+    threading.Thread(target=http_server.serve_forever, daemon=True).start()
+    try:
+        connection = HTTPConnection('127.0.0.1', http_server.server_port, timeout=10)
+        connection.request('POST', '/score', body=body)
+        response = connection.getresponse()
+        return response.status, json.loads(response.read())
+    finally:
+        http_server.shutdown()
+        http_server.server_close()
+
+def test_non_object_body_is_rejected(served_config):
+    config_path, _ = served_config
+    server = ScoreServer(config_path=config_path)
+    server.load_artifacts()
+    status, body = post_score(server, json.dumps([1, 2]))
+
+    assert status == 400 and 'JSON object' in body['error']
+
+class FailingModel:
+    def predict_proba(self, X):
+        raise RuntimeError('booster is gone')
+
+def test_model_error_is_a_server_error(served_config):
+    config_path, raw_path = served_config
+    server = ScoreServer(config_path=config_path)
+    server.load_artifacts()
+    server.batcher.model = FailingModel()
+    record = pd.read_csv(raw_path).iloc[0]
+    status, body = post_score(server, json.dumps(record.where(record.notna(), None).to_dict()))
+
+    assert status == 500 and 'booster is gone' in body['error']
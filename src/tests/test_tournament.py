@@ -0,0 +1,48 @@
+import numpy as np
+import pandas as pd
+import pytest
+from src.train.model_io import load_model, save_model
+from src.train.train import get_supported_estimator
+from src.train.tournament import Tournament
+
+@pytest.fixture
+def train_data():
+    rng = np.random.default_rng(0)
+    X = rng.normal(size=(400, 4)).astype('float32')
+    y = (X[:, 0] - X[:, 2] + rng.normal(scale=0.5, size=400) > 0).astype('int32')
+    return X, y
+
+@pytest.fixture
+def competitors():
+    estimators = get_supported_estimator()
+    return ({name: estimators[name]() for name in ['hgb', 'logreg']},
+            {'hgb': {'max_iter': [10, 20], 'max_depth': [2]}, 'logreg': {'model__C': [0.1, 1]}})
+
+def test_tournament_ranks_estimators_on_shared_folds(train_data, competitors):
+    X, y = train_data
+    estimators, param_grids = competitors
+    tournament = Tournament(estimators, param_grids, cv=3, n_jobs=2, backend='threading').fit(X, y)
+
+    assert tournament.fits_ == tournament.total_fits_ == 12
+    assert set(tournament.leaderboard_['estimator']) == {'hgb', 'logreg'}
+    assert tournament.best_estimator_name_ == tournament.leaderboard_['estimator'].iloc[0]
+    assert tournament.best_score_ == max(tournament.cv_results_['mean_test_score'])
+    assert tournament.predict_proba(X).shape == (400, 2)
+
+def test_spent_time_budget_leaves_nothing_to_rank(train_data, competitors):
+    X, y = train_data
+    estimators, param_grids = competitors
+    with pytest.raises(RuntimeError):
+        Tournament(estimators, param_grids, cv=3, time_budget=1e-9).fit(X, y)
+
+def test_non_xgboost_winner_saved_with_joblib(train_data, competitors, tmp_path):
+    X, y = train_data
+    estimators, param_grids = competitors
+    tournament = Tournament({'logreg': estimators['logreg']}, {'logreg': param_grids['logreg']}, cv=3).fit(X, y)
+
+    path = tmp_path / 'model.ubj'
+    save_model(tournament, path, feature_names=pd.Index(list('abcd')), metadata={'estimator_name': 'logreg'})
+    model = load_model(path)
+
+    assert model.meta['format'] == 'joblib' and not hasattr(model, 'get_booster')
+    np.testing.assert_array_equal(model.predict_proba(X), tournament.predict_proba(X))
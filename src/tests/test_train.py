@@ -0,0 +1,91 @@
+import numpy as np
+import pytest
+from types import SimpleNamespace
+from sklearn.metrics import f1_score, make_scorer
+from src.train.train import UnsupportedSearch, get_search, resolve_parallelism, search_report
+
+@pytest.fixture
+def train_data():
+    rng = np.random.default_rng(0)
+    X = rng.normal(size=(300, 4)).astype('float32')
+    y = (X[:, 0] - X[:, 1] + rng.normal(scale=0.5, size=300) > 0).astype('int32')
+    return X, y
+
+def halving(resource, min_resources=None):
+    return {'strategy': 'halving', 'halving': {'resource': resource, 'factor': 3, 'min_resources': min_resources}}
+
+def test_halving_on_samples_keeps_the_grid():
+    from xgboost import XGBClassifier
+
+    grid = {'max_depth': [2, 4], 'n_estimators': [10, 30]}
+    search = get_search(XGBClassifier(), grid, cv=3, scoring='f1', search=halving('n_samples'))
+
+    assert type(search).__name__ == 'HalvingGridSearchCV'
+    assert search.param_grid == grid and search.min_resources == 'exhaust'
+
+def test_halving_on_rounds_takes_the_resource_out_of_the_grid():
+    from xgboost import XGBClassifier
+
+    grid = {'max_depth': [2, 3, 4], 'n_estimators': [10, 30]}
+    search = get_search(XGBClassifier(), grid, cv=3, scoring='f1', search=halving('n_estimators'))
+
+    assert search.param_grid == {'max_depth': [2, 3, 4]}
+    assert (search.resource, search.min_resources, search.max_resources) == ('n_estimators', 10, 30)
+
+def test_random_search_samples_n_iter_candidates():
+    from xgboost import XGBClassifier
+
+    search = get_search(XGBClassifier(), {'max_depth': [2, 3, 4]}, cv=3, scoring='f1',
+                        search={'strategy': 'random', 'n_iter': 2}, random_state=0)
+
+    assert type(search).__name__ == 'RandomizedSearchCV' and search.n_iter == 2
+
+def test_unknown_strategy_is_unsupported():
+    with pytest.raises(UnsupportedSearch, match='bayes'):
+        get_search(None, {}, cv=3, scoring='f1', search={'strategy': 'bayes'})
+
+def test_search_report_counts_sample_work_by_hand():
+    # Three candidates on 100 samples, the best one again on 300, with 100 default rounds
+    clf = SimpleNamespace(estimator=None, resource='n_samples',
+                          cv_results_={'params': [{'max_depth': 2}, {'max_depth': 3}, {'max_depth': 4}, {'max_depth': 4}],
+                                       'n_resources': [100, 100, 100, 300]})
+    report = search_report(clf, {'max_depth': [2, 3, 4]}, cv=3, n_samples=300)
+
+    assert report['boosting_work'] == 3 * (100 + 100 + 100 + 300) * 100
+    assert report['full_grid_boosting_work'] == 3 * 3 * 300 * 100
+    assert report['fits'] == 12 and report['full_grid_fits'] == 9
+    assert report['compute_saved'] == pytest.approx(1 - 6 / 9)
+
+def test_search_report_counts_round_work_of_halving_search(train_data):
+    from xgboost import XGBClassifier
+
+    X, y = train_data
+    grid = {'max_depth': [2, 3, 4], 'n_estimators': [10, 30]}
+    clf = get_search(XGBClassifier(), grid, cv=3, scoring=make_scorer(f1_score, average='weighted'),
+                     search=halving('n_estimators'), random_state=0).fit(X, y)
+    report = search_report(clf, grid, cv=3, n_samples=len(y))
+
+    # Three candidates with 10 rounds, then the best one with 30, all on every sample
+    assert report['candidates'] == 4
+    assert report['boosting_work'] == 3 * 300 * (3 * 10 + 30)
+    assert report['full_grid_boosting_work'] == 3 * 300 * (3 * 10 + 3 * 30)
+    assert report['compute_saved'] == pytest.approx(0.5)
+
+def test_all_available_cores_used_without_a_budget(monkeypatch):
+    monkeypatch.setattr('os.sched_getaffinity', lambda pid: {0, 1, 2, 3, 4, 5}, raising=False)
+    budget = resolve_parallelism({'n_cores': None, 'estimator_threads': 2, 'backend': None})
+
+    assert budget == {'n_cores': 6, 'search_jobs': 3, 'estimator_threads': 2, 'backend': 'loky'}
+
+def test_threads_per_fit_clamped_to_the_budget():
+    budget = resolve_parallelism({'n_cores': 4, 'estimator_threads': 16, 'backend': 'threading'})
+
+    assert budget['estimator_threads'] == 4 and budget['search_jobs'] == 1
+
+@pytest.mark.parametrize('n_cores', [1, 2, 3, 7, 8])
+@pytest.mark.parametrize('estimator_threads', [None, 1, 2, 3, 5, 9])
+def test_parallel_threads_never_exceed_the_budget(n_cores, estimator_threads):
+    budget = resolve_parallelism({'n_cores': n_cores, 'estimator_threads': estimator_threads})
+
+    assert budget['search_jobs'] >= 1 and budget['estimator_threads'] >= 1
+    assert budget['search_jobs'] * budget['estimator_threads'] <= n_cores
@@ -0,0 +1,80 @@
+"""Provides continued training of a saved booster on a new partition of data."""
+
+import numpy as np
+from typing import Dict, Text
+import warnings
+
+UPDATE_MODES = ['boost', 'refresh']
+
+
+class UnsupportedUpdate(Exception):
+    """
+    Exception raised for unsupported incremental update modes.
+
+    Attributes:
+    - mode (str): The name of the unsupported mode.
+    """
+    def __init__(self, mode):
+        """
+        Initialize UnsupportedUpdate instance.
+
+        Args:
+        - mode (str): The name of the unsupported mode.
+        """
+        self.msg = f'Unsupported update mode {mode}, expected one of {UPDATE_MODES}'
+        super().__init__(self.msg)
+
+
+def continue_training(booster, X: np.ndarray, y: np.ndarray, params: Dict, mode: Text,
+                      n_rounds: int, threads: int = 1, random_state: int = None):
+    """
+    Update a trained booster on new data, keeping its hyperparameters.
+
+    Args:
+    - booster (xgb.Booster): The trained booster; it is left unchanged.
+    - X (np.ndarray): New training features.
+    - y (np.ndarray): New training labels.
+    - params (Dict): Hyperparameters named as in XGBClassifier; n_estimators is ignored.
+    - mode (str): boost appends n_rounds trees fitted to the new data; refresh keeps the
+      trees and refits their leaf values and statistics on the new data.
+    - n_rounds (int): Boosting rounds added in boost mode.
+    - threads (int): Threads used by the fit.
+    - random_state (int): Seed of the booster.
+
+    Returns:
+    - xgb.Booster: A new booster.
+    """
+    import xgboost as xgb
+    from src.train.search import native_params
+
+    params = native_params({name: value for name, value in params.items() if name != 'n_estimators'},
+                           threads, random_state)
+    dtrain = xgb.DMatrix(X, label=y)
+    if mode == 'boost':
+        return xgb.train(params, dtrain, num_boost_round=n_rounds, xgb_model=booster)
+    if mode == 'refresh':
+        # The refresh updater walks the existing trees once each instead of adding trees
+        params.update(process_type='update', updater='refresh', refresh_leaf=True)
+        with warnings.catch_warnings():
+            # The saved tree_method is ignored in favour of the refresh updater, as intended
+            warnings.filterwarnings('ignore', message='.*updater.*')
+            return xgb.train(params, dtrain, num_boost_round=booster.num_boosted_rounds(),
+                             xgb_model=booster)
+    raise UnsupportedUpdate(mode)
+
+
+def weighted_f1(model, X: np.ndarray, y: np.ndarray) -> float:
+    """
+    Weighted F1 score of a model at the 0.5 threshold, the score ranking search candidates.
+
+    Args:
+    - model: Model with predict().
+    - X (np.ndarray): Validation features.
+    - y (np.ndarray): Validation labels.
+
+    Returns:
+    - float: The weighted F1 score.
+    """
+    from sklearn.metrics import f1_score
+
+    return float(f1_score(y, model.predict(X), average='weighted'))
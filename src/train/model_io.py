@@ -0,0 +1,181 @@
+"""Provides functions to save and load the trained model as a native XGBoost booster, or pickled
+with joblib for the other estimators."""
+
+import hashlib
+import json
+import numpy as np
+import pandas as pd
+from pathlib import Path
+from typing import TYPE_CHECKING, Dict, List, Text
+
+from src.serve.forest import get_booster
+
+if TYPE_CHECKING:
+    import xgboost as xgb
+
+
+def model_meta_path(path: Text) -> Text:
+    """Path of the metadata file written next to a saved model.
+    Args:
+        path {Text}: model file path
+    Returns:
+        the model path with a .meta.json suffix
+    """
+    return str(Path(path).with_suffix('.meta.json'))
+
+
+def hash_dataframe(df: pd.DataFrame) -> Text:
+    """Hash the content, column names and order of a DataFrame.
+    Args:
+        df {pd.DataFrame}: dataset to hash
+    Returns:
+        hex sha256 digest
+    """
+    digest = hashlib.sha256(json.dumps(list(map(str, df.columns))).encode())
+    digest.update(pd.util.hash_pandas_object(df, index=False).to_numpy().tobytes())
+    return digest.hexdigest()
+
+
+def save_model(model, path: Text, feature_names: List[Text], metadata: Dict) -> None:
+    """Save the refitted best booster of a search in XGBoost's binary format, or the refitted
+    best estimator with joblib when it is not an XGBoost model.
+    Args:
+        model: fitted search object, XGBClassifier, Booster or other fitted estimator
+        path {Text}: model file path, .ubj for the binary format
+        feature_names {List[Text]}: training columns, in the order the model expects them
+        metadata {Dict}: extra fields for the metadata file, e.g. params and data hash
+    """
+    estimator = getattr(model, 'best_estimator_', model)
+    if hasattr(estimator, 'get_booster') or type(estimator).__module__.startswith('xgboost'):
+        import xgboost as xgb
+
+        get_booster(estimator).save_model(path)
+        meta = {'format': 'xgboost', 'xgboost_version': xgb.__version__}
+    else:
+        import joblib
+        import sklearn
+
+        # Kept under model_path whatever its suffix, the format is read from the metadata
+        joblib.dump(estimator, path)
+        meta = {'format': 'joblib', 'sklearn_version': sklearn.__version__}
+    meta = {**meta, 'feature_names': list(feature_names), **metadata}
+    Path(model_meta_path(path)).write_text(json.dumps(meta, indent=2))
+
+
+def load_model(path: Text):
+    """Load a model saved by save_model().
+    Args:
+        path {Text}: model file path
+    Returns:
+        NativeModel wrapping the booster and its metadata, or PickledModel for other estimators
+    """
+    meta = json.loads(Path(model_meta_path(path)).read_text())
+    # Models saved before other estimators were supported are all boosters
+    if meta.get('format', 'xgboost') == 'joblib':
+        import joblib
+
+        return PickledModel(joblib.load(path), meta)
+
+    # xgboost is only imported by the code paths that load a booster
+    import xgboost as xgb
+
+    booster = xgb.Booster()
+    booster.load_model(path)
+    return NativeModel(booster, meta)
+
+
+class NativeModel:
+    """
+    NativeModel class for predicting with a booster loaded from its native format.
+
+    Parameters:
+    - booster (xgb.Booster): The trained booster.
+    - meta (dict): Metadata saved with the booster, including 'feature_names'.
+
+    Methods:
+    - get_booster(): The wrapped booster, as in XGBClassifier.
+    - predict_proba(): Predict class probabilities.
+    - predict(): Predict classes.
+    """
+
+    def __init__(self, booster: 'xgb.Booster', meta: Dict):
+        self.booster = booster
+        self.meta = meta
+        self.feature_names = meta['feature_names']
+
+    def get_booster(self) -> 'xgb.Booster':
+        """
+        The wrapped booster, as in XGBClassifier.
+
+        Returns:
+        - xgb.Booster: The booster.
+        """
+        return self.booster
+
+    def predict_proba(self, X: np.ndarray) -> np.ndarray:
+        """
+        Predict class probabilities.
+
+        Args:
+        - X (np.ndarray): Features, in the order of feature_names.
+
+        Returns:
+        - np.ndarray: Probabilities of both classes, one row per sample.
+        """
+        positive = self.booster.inplace_predict(np.asarray(X, dtype='float32'))
+        return np.column_stack([1 - positive, positive])
+
+    def predict(self, X: np.ndarray) -> np.ndarray:
+        """
+        Predict classes.
+
+        Args:
+        - X (np.ndarray): Features, in the order of feature_names.
+
+        Returns:
+        - np.ndarray: Predicted class of each sample.
+        """
+        return (self.predict_proba(X)[:, 1] > 0.5).astype('int64')
+
+
+class PickledModel:
+    """
+    PickledModel class for predicting with an estimator saved with joblib.
+
+    Parameters:
+    - estimator: The fitted estimator, with predict_proba().
+    - meta (dict): Metadata saved with the estimator, including 'feature_names'.
+
+    Methods:
+    - predict_proba(): Predict class probabilities.
+    - predict(): Predict classes.
+    """
+
+    def __init__(self, estimator, meta: Dict):
+        self.estimator = estimator
+        self.meta = meta
+        self.feature_names = meta['feature_names']
+
+    def predict_proba(self, X: np.ndarray) -> np.ndarray:
+        """
+        Predict class probabilities.
+
+        Args:
+        - X (np.ndarray): Features, in the order of feature_names.
+
+        Returns:
+        - np.ndarray: Probabilities of both classes, one row per sample.
+        """
+        return self.estimator.predict_proba(np.asarray(X, dtype='float32'))
+
+    def predict(self, X: np.ndarray) -> np.ndarray:
+        """
+        Predict classes.
+
+        Args:
+        - X (np.ndarray): Features, in the order of feature_names.
+
+        Returns:
+        - np.ndarray: Predicted class of each sample.
+        """
+        return (self.predict_proba(X)[:, 1] > 0.5).astype('int64')
@@ -0,0 +1,338 @@
+import hashlib
+import json
+import numpy as np
+from joblib import Parallel, delayed
+import os
+from pathlib import Path
+from sklearn.metrics import f1_score
+from sklearn.model_selection import ParameterGrid, StratifiedKFold
+import threading
+import time
+from typing import Dict, List, Text, Union
+import xgboost as xgb
+
+from src.utils.logs import get_logger
+
+
+def native_params(params: Dict, threads: int, random_state=None) -> Dict:
+    """
+    Translate XGBClassifier hyperparameters into xgboost.train parameters.
+
+    Args:
+    - params (Dict): Hyperparameters named as in XGBClassifier, without n_estimators.
+    - threads (int): Threads used by each fit.
+    - random_state (int): Seed of the booster, 0 when None as in XGBClassifier.
+
+    Returns:
+    - Dict: Parameters for xgboost.train.
+    """
+    return {
+        'objective': 'binary:logistic',
+        'tree_method': 'hist',
+        'nthread': threads,
+        'seed': random_state or 0,
+        **params,
+    }
+
+
+def params_key(params: Dict) -> Text:
+    """
+    Canonical text form of a candidate's hyperparameters.
+
+    Args:
+    - params (Dict): Hyperparameters.
+
+    Returns:
+    - str: JSON with sorted keys.
+    """
+    return json.dumps(params, sort_keys=True)
+
+
+class ResultsStore:
+    """
+    Append-only JSON lines store of (params, fold) search results.
+
+    Each line is written and flushed to disk as soon as its fit completes, so an
+    interrupted search keeps every finished fit. Results are keyed by a hash of the
+    training data, fold count and seed, so they are only reused for the same folds.
+
+    Parameters:
+    - path (str): The JSON lines file path.
+
+    Methods:
+    - data_hash(): Hash the training data and everything else that defines the folds.
+    - load(): Load the stored results of a data hash.
+    - append(): Append a result to the store.
+    """
+
+    def __init__(self, path: Text):
+        self.path = Path(path)
+        self.lock = threading.Lock()
+
+    @staticmethod
+    def data_hash(X: np.ndarray, y: np.ndarray, cv: int, seed) -> Text:
+        """
+        Hash the training data, fold count and seed.
+
+        Args:
+        - X (np.ndarray): Training features.
+        - y (np.ndarray): Training labels.
+        - cv (int): The number of cross-validation folds.
+        - seed (int): Seed of the boosters.
+
+        Returns:
+        - str: Hex sha256 digest.
+        """
+        digest = hashlib.sha256()
+        for array in (X, y):
+            array = np.ascontiguousarray(array)
+            digest.update(f'{array.dtype}{array.shape}'.encode())
+            digest.update(memoryview(array).cast('B'))
+        digest.update(f'cv={cv};seed={seed}'.encode())
+        return digest.hexdigest()
+
+    def load(self, data_hash: Text) -> Dict:
+        """
+        Load the stored results of a data hash.
+
+        Args:
+        - data_hash (str): Hash returned by data_hash().
+
+        Returns:
+        - Dict: Results keyed by (params_key(), fold).
+        """
+        results = {}
+        if not self.path.exists():
+            return results
+        with open(self.path) as file:
+            for line in file:
+                try:
+                    record = json.loads(line)
+                except json.JSONDecodeError:
+                    # A line cut short by an interrupted write
+                    continue
+                if record['data_hash'] == data_hash:
+                    results[(params_key(record['params']), record['fold'])] = record
+        return results
+
+    def append(self, record: Dict):
+        """
+        Append a result to the store and flush it to disk.
+
+        Args:
+        - record (Dict): Result with data_hash, params, fold, score and fit_time.
+        """
+        with self.lock:
+            self.path.parent.mkdir(parents=True, exist_ok=True)
+            with open(self.path, 'a') as file:
+                file.write(json.dumps(record) + '\n')
+                file.flush()
+                os.fsync(file.fileno())
+
+
+class QuantizedGridSearch:
+    """
+    Grid search for XGBoost that quantizes each cross-validation fold once.
+
+    The training part of every fold is turned into a QuantileDMatrix before the search
+    starts and shared, read-only, by all parameter combinations; the full training set
+    is quantized once for the final refit. Folds and scoring match GridSearchCV with an
+    integer cv and a weighted f1 scorer, so results are comparable.
+
+    With warm_start, candidates that differ only in n_estimators are trained once with
+    the largest tree count and the smaller counts are scored on the first trees of that
+    booster. Boosting is sequential, so the scores equal those of separate fits.
+
+    With results_store, every (params, fold) result is appended to a ResultsStore as
+    soon as it is computed, and results already stored for the same training data are
+    reused instead of refitted, so interrupted or extended searches only fit what is new.
+
+    Parameters:
+    - param_grid (Dict): The grid of XGBClassifier hyperparameters.
+    - cv (int): The number of cross-validation folds.
+    - n_jobs (int): Number of fits run in parallel threads.
+    - estimator_threads (int): Threads used by each fit.
+    - random_state (int): Seed of the boosters.
+    - warm_start (bool): Score smaller tree counts by truncating the largest booster.
+    - results_store (str): Path of the JSON lines results store; None disables it.
+    - log_level (str or int): Logging level.
+
+    Attributes:
+    - cv_results_ (Dict): Scores of every candidate, as in GridSearchCV, and the
+      'boosting_rounds' each candidate trained per fold in this run.
+    - best_index_ (int): Index of the best candidate in cv_results_.
+    - best_params_ (Dict): Hyperparameters of the best candidate.
+    - best_score_ (float): Mean cross-validated score of the best candidate.
+    - best_estimator_ (xgb.Booster): Booster refitted on the full training set.
+
+    Methods:
+    - fit(): Run the search and refit the best candidate.
+    - predict_proba(): Predict class probabilities with the refitted booster.
+    - predict(): Predict classes with the refitted booster.
+    """
+
+    def __init__(self, param_grid: Dict, cv: int, n_jobs: int = 1,
+                 estimator_threads: int = 1, random_state=None, warm_start: bool = False,
+                 results_store: Text = None, log_level: Union[Text, int] = 'INFO'):
+        self.param_grid = param_grid
+        self.cv = cv
+        self.n_jobs = n_jobs
+        self.estimator_threads = estimator_threads
+        self.random_state = random_state
+        self.warm_start = warm_start
+        self.results_store = results_store
+        self.log_level = log_level
+
+    def _train(self, params: Dict, dtrain: xgb.QuantileDMatrix) -> xgb.Booster:
+        params = dict(params)
+        num_boost_round = params.pop('n_estimators', 100)
+        return xgb.train(native_params(params, self.estimator_threads, self.random_state),
+                         dtrain, num_boost_round=num_boost_round)
+
+    def _groups(self, candidates: List[Dict]) -> List[List[int]]:
+        # Candidates trained by one booster: all of them, or those differing only in n_estimators
+        if not self.warm_start:
+            return [[index] for index in range(len(candidates))]
+        groups = {}
+        for index, params in enumerate(candidates):
+            key = repr(sorted((name, value) for name, value in params.items() if name != 'n_estimators'))
+            groups.setdefault(key, []).append(index)
+        return list(groups.values())
+
+    def _score(self, candidates: List[Dict], group: List[int], fold: Dict) -> List[Dict]:
+        rounds = [candidates[index].get('n_estimators', 100) for index in group]
+        largest = group[rounds.index(max(rounds))]
+        started = time.perf_counter()
+        booster = self._train(candidates[largest], fold['dtrain'])
+        fit_time = time.perf_counter() - started
+
+        results = []
+        for index, n_rounds in zip(group, rounds):
+            probability = booster.inplace_predict(fold['X_valid'], iteration_range=(0, n_rounds))
+            prediction = (probability > 0.5).astype('int32')
+            result = {'index': index,
+                      'fold': fold['index'],
+                      'score': f1_score(fold['y_valid'], prediction, average='weighted'),
+                      'fit_time': fit_time,
+                      'boosting_rounds': n_rounds if index == largest else 0}
+            if self.store is not None:
+                self.store.append({'data_hash': self.data_hash_, 'params': candidates[index],
+                                   'fold': fold['index'], 'score': result['score'],
+                                   'fit_time': fit_time})
+            results.append(result)
+        return results
+
+    def _stored_results(self, candidates: List[Dict]) -> List[Dict]:
+        # Stored results of this grid, as if computed in this run without boosting work
+        stored = self.store.load(self.data_hash_) if self.store is not None else {}
+        results = []
+        for index, params in enumerate(candidates):
+            for fold in range(self.cv):
+                record = stored.get((params_key(params), fold))
+                if record is not None:
+                    results.append({'index': index, 'fold': fold, 'score': record['score'],
+                                    'fit_time': record['fit_time'], 'boosting_rounds': 0})
+        return results
+
+    def fit(self, X: np.ndarray, y: np.ndarray):
+        """
+        Run the search and refit the best candidate on the full training set.
+
+        Args:
+        - X (np.ndarray): Training features.
+        - y (np.ndarray): Training labels.
+
+        Returns:
+        - QuantizedGridSearch: The fitted search.
+        """
+        self.store = ResultsStore(self.results_store) if self.results_store else None
+        self.data_hash_ = ResultsStore.data_hash(X, y, self.cv, self.random_state or 0)
+        candidates = list(ParameterGrid(self.param_grid))
+        stored = self._stored_results(candidates)
+        done = {(result['index'], result['fold']) for result in stored}
+
+        # Each task trains one booster for the candidates of a group still missing on a fold
+        tasks = []
+        for fold in range(self.cv):
+            for group in self._groups(candidates):
+                pending = [index for index in group if (index, fold) not in done]
+                if pending:
+                    tasks.append((pending, fold))
+        get_logger('SEARCH', log_level=self.log_level).info(
+            f'Fitting {self.cv} quantized folds for each of {len(candidates)} candidates, '
+            f'totalling {len(tasks)} fits; {len(stored)} results reused from the store')
+
+        folds = {}
+        needed = {fold for _, fold in tasks}
+        splits = StratifiedKFold(n_splits=self.cv).split(X, y)
+        for fold, (train_index, valid_index) in enumerate(splits):
+            if fold in needed:
+                folds[fold] = {
+                    'index': fold,
+                    'dtrain': xgb.QuantileDMatrix(X[train_index], y[train_index],
+                                                  nthread=self.estimator_threads),
+                    'X_valid': X[valid_index],
+                    'y_valid': y[valid_index],
+                }
+
+        # Threads share the quantized folds without copying them into worker processes
+        results = Parallel(n_jobs=self.n_jobs, backend='threading')(
+            delayed(self._score)(candidates, pending, folds[fold]) for pending, fold in tasks
+        )
+        folds.clear()
+        self._set_results(candidates, stored + [result for task in results for result in task])
+        self.store = None
+
+        dtrain = xgb.QuantileDMatrix(X, y, nthread=self.estimator_threads)
+        self.best_estimator_ = self._train(self.best_params_, dtrain)
+        return self
+
+    def _set_results(self, candidates: List[Dict], results: List[Dict]):
+        shape = (len(candidates), self.cv)
+        scores, fit_times, rounds = np.zeros(shape), np.zeros(shape), np.zeros(shape, dtype='int64')
+        for result in results:
+            position = (result['index'], result['fold'])
+            scores[position] = result['score']
+            fit_times[position] = result['fit_time']
+            rounds[position] = result['boosting_rounds']
+        mean_scores = scores.mean(axis=1)
+        ranks = (-mean_scores).argsort(kind='stable').argsort() + 1
+
+        self.cv_results_ = {
+            'params': candidates,
+            'mean_fit_time': fit_times.mean(axis=1),
+            'mean_test_score': mean_scores,
+            'std_test_score': scores.std(axis=1),
+            'rank_test_score': ranks,
+            'boosting_rounds': rounds.max(axis=1),
+        }
+        for split in range(self.cv):
+            self.cv_results_[f'split{split}_test_score'] = scores[:, split]
+        self.best_index_ = int(mean_scores.argmax())
+        self.best_params_ = candidates[self.best_index_]
+        self.best_score_ = float(mean_scores[self.best_index_])
+
+    def predict_proba(self, X: np.ndarray) -> np.ndarray:
+        """
+        Predict class probabilities with the refitted booster.
+
+        Args:
+        - X (np.ndarray): Features.
+
+        Returns:
+        - np.ndarray: Probabilities of both classes, one row per sample.
+        """
+        positive = self.best_estimator_.inplace_predict(np.asarray(X, dtype='float32'))
+        return np.column_stack([1 - positive, positive])
+
+    def predict(self, X: np.ndarray) -> np.ndarray:
+        """
+        Predict classes with the refitted booster.
+
+        Args:
+        - X (np.ndarray): Features.
+
+        Returns:
+        - np.ndarray: Predicted class of each sample.
+        """
+        return (self.predict_proba(X)[:, 1] > 0.5).astype('int64')
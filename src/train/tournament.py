@@ -0,0 +1,206 @@
+"""Provides a grid search of several estimators on shared folds under one CPU and time budget."""
+
+import numpy as np
+import pandas as pd
+import time
+from typing import Dict, List, Text, Union
+
+from src.utils.logs import get_logger
+
+
+def fit_and_score(estimator, params: Dict, X: np.ndarray, y: np.ndarray, train_index: np.ndarray,
+                  valid_index: np.ndarray, threads: int, deadline: float) -> Dict:
+    """
+    Fit a candidate on the training part of a fold and score it on the validation part.
+
+    Args:
+    - estimator: Unfitted estimator, cloned before fitting.
+    - params (Dict): Hyperparameters of the candidate.
+    - X (np.ndarray): Training features, shared by all fits.
+    - y (np.ndarray): Training labels, shared by all fits.
+    - train_index (np.ndarray): Rows the candidate is fitted on.
+    - valid_index (np.ndarray): Rows the candidate is scored on.
+    - threads (int): Threads of the native thread pools (OpenMP, BLAS) during the fit.
+    - deadline (float): Wall-clock time after which the fit is skipped.
+
+    Returns:
+    - Dict: The weighted F1 'score' and 'fit_time', None when skipped for the deadline.
+    """
+    if time.time() > deadline:
+        return None
+    from sklearn.base import clone
+    from sklearn.metrics import f1_score
+    from threadpoolctl import threadpool_limits
+
+    started = time.perf_counter()
+    with threadpool_limits(limits=threads):
+        model = clone(estimator).set_params(**params).fit(X[train_index], y[train_index])
+        prediction = model.predict(X[valid_index])
+    return {'score': f1_score(y[valid_index], prediction, average='weighted'),
+            'fit_time': time.perf_counter() - started}
+
+
+class Tournament:
+    """
+    Grid search over several estimators at once, on the same folds and under one time budget.
+
+    The stratified fold indices, those of GridSearchCV with an integer cv, are computed
+    once and every (estimator, candidate, fold) fit runs in one pool of workers sharing
+    the CPU budget. Fits are interleaved across estimators, so that when the time budget
+    runs out every estimator has had its share; candidates missing a fold are dropped.
+    The best candidate of all estimators is refitted on the full training set.
+
+    Parameters:
+    - estimators (Dict): Unfitted estimator of each estimator name.
+    - param_grids (Dict): Grid of hyperparameters of each estimator name.
+    - cv (int): The number of cross-validation folds.
+    - n_jobs (int): Number of fits run in parallel.
+    - estimator_threads (int): Threads used by each fit.
+    - backend (str): joblib backend of the workers, loky or threading.
+    - time_budget (float): Seconds after which no new cross-validation fit starts; None
+      runs every fit. The refit of the winner comes on top.
+    - log_level (str or int): Logging level.
+
+    Attributes:
+    - leaderboard_ (pd.DataFrame): Best candidate of each estimator, by decreasing score.
+    - cv_results_ (Dict): Scores of every candidate, as in GridSearchCV, with their 'estimator'.
+    - best_estimator_name_ (str): Name of the winning estimator.
+    - best_params_ (Dict): Hyperparameters of the winning candidate.
+    - best_score_ (float): Mean cross-validated score of the winning candidate.
+    - best_estimator_: The winning candidate refitted on the full training set.
+    - fits_ (int): Cross-validation fits completed within the time budget.
+    - total_fits_ (int): Cross-validation fits of the full tournament.
+
+    Methods:
+    - fit(): Run the tournament and refit the winner.
+    - predict_proba(): Predict class probabilities with the refitted winner.
+    - predict(): Predict classes with the refitted winner.
+    """
+
+    def __init__(self, estimators: Dict, param_grids: Dict, cv: int, n_jobs: int = 1,
+                 estimator_threads: int = 1, backend: str = 'loky', time_budget: float = None,
+                 log_level: Union[Text, int] = 'INFO'):
+        self.estimators = estimators
+        self.param_grids = param_grids
+        self.cv = cv
+        self.n_jobs = n_jobs
+        self.estimator_threads = estimator_threads
+        self.backend = backend
+        self.time_budget = time_budget
+        self.log_level = log_level
+
+    def _tasks(self, candidates: Dict[str, List[Dict]]) -> List[tuple]:
+        # Round robin over estimators, candidate by candidate, each with all its folds
+        tasks = []
+        for rank in range(max(len(grid) for grid in candidates.values())):
+            for name, grid in candidates.items():
+                if rank < len(grid):
+                    tasks.extend((name, rank, fold) for fold in range(self.cv))
+        return tasks
+
+    def fit(self, X: np.ndarray, y: np.ndarray):
+        """
+        Run the tournament and refit the winning candidate on the full training set.
+
+        Args:
+        - X (np.ndarray): Training features.
+        - y (np.ndarray): Training labels.
+
+        Returns:
+        - Tournament: The fitted tournament.
+        """
+        from joblib import Parallel, delayed
+        from sklearn.base import clone
+        from sklearn.model_selection import ParameterGrid, StratifiedKFold
+        from threadpoolctl import threadpool_limits
+
+        candidates = {name: list(ParameterGrid(self.param_grids[name])) for name in self.estimators}
+        # Fold indices are computed once and shared by every estimator
+        folds = list(StratifiedKFold(n_splits=self.cv).split(X, y))
+        tasks = self._tasks(candidates)
+        self.total_fits_ = len(tasks)
+        get_logger('TOURNAMENT', log_level=self.log_level).info(
+            f'Fitting {self.cv} folds for each of {sum(map(len, candidates.values()))} candidates '
+            f'of {len(candidates)} estimators, totalling {len(tasks)} fits')
+
+        deadline = time.time() + self.time_budget if self.time_budget else float('inf')
+        results = Parallel(n_jobs=self.n_jobs, backend=self.backend)(
+            delayed(fit_and_score)(self.estimators[name], candidates[name][rank], X, y,
+                                   *folds[fold], self.estimator_threads, deadline)
+            for name, rank, fold in tasks
+        )
+        self.fits_ = sum(result is not None for result in results)
+        self._set_results(candidates, tasks, results)
+
+        # The refit is not cut by the time budget and has every core to itself
+        threads = self.n_jobs * self.estimator_threads
+        estimator = clone(self.estimators[self.best_estimator_name_]).set_params(**self.best_params_)
+        if 'n_jobs' in estimator.get_params():
+            estimator.set_params(n_jobs=threads)
+        with threadpool_limits(limits=threads):
+            self.best_estimator_ = estimator.fit(X, y)
+        return self
+
+    def _set_results(self, candidates: Dict[str, List[Dict]], tasks: List[tuple], results: List[Dict]):
+        scores = {name: np.full((len(grid), self.cv), np.nan) for name, grid in candidates.items()}
+        fit_times = {name: np.full((len(grid), self.cv), np.nan) for name, grid in candidates.items()}
+        for (name, rank, fold), result in zip(tasks, results):
+            if result is not None:
+                scores[name][rank, fold] = result['score']
+                fit_times[name][rank, fold] = result['fit_time']
+
+        rows = []
+        self.cv_results_ = {'estimator': [], 'params': [], 'mean_test_score': [], 'std_test_score': [],
+                            'mean_fit_time': []}
+        for name, grid in candidates.items():
+            # Candidates missing a fold were cut by the time budget and are not ranked
+            complete = ~np.isnan(scores[name]).any(axis=1)
+            mean_scores = np.where(complete, scores[name].mean(axis=1), np.nan)
+            done = (~np.isnan(fit_times[name])).sum(axis=1)
+            mean_fit_times = np.where(done > 0, np.nansum(fit_times[name], axis=1) / np.maximum(done, 1), np.nan)
+            self.cv_results_['estimator'] += [name] * len(grid)
+            self.cv_results_['params'] += grid
+            self.cv_results_['mean_test_score'] += list(mean_scores)
+            self.cv_results_['std_test_score'] += list(scores[name].std(axis=1))
+            self.cv_results_['mean_fit_time'] += list(mean_fit_times)
+            best = int(np.nanargmax(mean_scores)) if complete.any() else None
+            rows.append({'estimator': name,
+                         'best_score': mean_scores[best] if best is not None else np.nan,
+                         'std_score': scores[name][best].std() if best is not None else np.nan,
+                         'best_params': grid[best] if best is not None else None,
+                         'candidates': len(grid),
+                         'candidates_completed': int(complete.sum()),
+                         'fit_seconds': float(np.nansum(fit_times[name]))})
+
+        self.leaderboard_ = (pd.DataFrame(rows).sort_values('best_score', ascending=False, na_position='last')
+                             .reset_index(drop=True))
+        winner = self.leaderboard_.iloc[0]
+        if winner['best_params'] is None:
+            raise RuntimeError('No candidate completed its cross-validation within the time budget')
+        self.best_estimator_name_ = winner['estimator']
+        self.best_params_ = winner['best_params']
+        self.best_score_ = float(winner['best_score'])
+
+    def predict_proba(self, X: np.ndarray) -> np.ndarray:
+        """
+        Predict class probabilities with the refitted winner.
+
+        Args:
+        - X (np.ndarray): Features.
+
+        Returns:
+        - np.ndarray: Probabilities of both classes, one row per sample.
+        """
+        return self.best_estimator_.predict_proba(X)
+
+    def predict(self, X: np.ndarray) -> np.ndarray:
+        """
+        Predict classes with the refitted winner.
+
+        Args:
+        - X (np.ndarray): Features.
+
+        Returns:
+        - np.ndarray: Predicted class of each sample.
+        """
+        return self.best_estimator_.predict(X)
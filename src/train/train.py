@@ -1,9 +1,6 @@
+import os
 import pandas as pd
-from sklearn.model_selection import GridSearchCV
-from sklearn.svm import SVC
-from sklearn.metrics import f1_score, make_scorer
-from typing import Dict, Text
-from xgboost import XGBClassifier
+from typing import Dict, Text, Union
 
 
 class UnsupportedClassifier(Exception):
@@ -24,6 +21,41 @@ class UnsupportedClassifier(Exception):
         super().__init__(self.msg)
 
 
+class UnsupportedSearch(Exception):
+    """
+    Exception raised for unsupported hyperparameter search strategies.
+
+    Attributes:
+    - strategy (str): The name of the unsupported strategy.
+    """
+    def __init__(self, strategy):
+        """
+        Initialize UnsupportedSearch instance.
+
+        Args:
+        - strategy (str): The name of the unsupported strategy.
+        """
+        self.msg = f'Unsupported search strategy {strategy}'
+        super().__init__(self.msg)
+
+
+def logistic_baseline():
+    """
+    Returns a logistic regression baseline on median-imputed, standardized features.
+
+    Returns:
+    - sklearn.pipeline.Pipeline: The unfitted baseline; its grid keys are prefixed with model__.
+    """
+    from sklearn.impute import SimpleImputer
+    from sklearn.linear_model import LogisticRegression
+    from sklearn.pipeline import Pipeline
+    from sklearn.preprocessing import StandardScaler
+
+    return Pipeline([('impute', SimpleImputer(strategy='median')),
+                     ('scale', StandardScaler()),
+                     ('model', LogisticRegression(max_iter=1000))])
+
+
 def get_supported_estimator() -> Dict:
     """
     Returns a dictionary of supported classifiers.
@@ -31,27 +63,173 @@ def get_supported_estimator() -> Dict:
     Returns:
     - Dict: Dictionary containing supported classifiers.
     """
+    # Estimator libraries are imported when a model is trained, not when the module loads
+    from sklearn.ensemble import HistGradientBoostingClassifier
+    from xgboost import XGBClassifier
 
     return {
         'xgb': XGBClassifier,
+        'hgb': HistGradientBoostingClassifier,
+        'logreg': logistic_baseline,
+    }
+
+
+def available_cores() -> int:
+    """
+    Returns the number of cores this process may run on.
+
+    Returns:
+    - int: Number of usable cores.
+    """
+    if hasattr(os, 'sched_getaffinity'):
+        return len(os.sched_getaffinity(0))
+    return os.cpu_count() or 1
+
+
+def resolve_parallelism(parallelism: Dict) -> Dict:
+    """
+    Split the CPU budget between parallel search fits and threads inside each fit.
+
+    Args:
+    - parallelism (Dict): The parallelism configuration with 'n_cores' (null for all
+      available cores), 'estimator_threads' and 'backend' (loky or threading).
+
+    Returns:
+    - Dict: The core budget, search workers, threads per fit and backend, chosen so that
+      search workers times threads per fit does not exceed the budget.
+    """
+    n_cores = parallelism.get('n_cores') or available_cores()
+    estimator_threads = max(1, min(parallelism.get('estimator_threads') or 1, n_cores))
+    return {
+        'n_cores': n_cores,
+        'search_jobs': max(1, n_cores // estimator_threads),
+        'estimator_threads': estimator_threads,
+        'backend': parallelism.get('backend') or 'loky',
+    }
+
+
+def get_search(estimator, param_grid: Dict, cv: int, scoring, search: Dict,
+               random_state=None, n_jobs: int = None):
+    """
+    Create the hyperparameter search object for the configured strategy.
+
+    Args:
+    - estimator: The estimator to tune.
+    - param_grid (Dict): The grid of hyperparameters.
+    - cv (int): The number of cross-validation folds.
+    - scoring: The scorer used to rank candidates.
+    - search (Dict): The search configuration; 'strategy' is grid, halving or random.
+    - random_state (int): Seed for candidate sampling and subsampling.
+    - n_jobs (int): Number of fits run in parallel.
+
+    Returns:
+    - search object: A GridSearchCV, HalvingGridSearchCV or RandomizedSearchCV instance.
+    """
+    from sklearn.model_selection import GridSearchCV, RandomizedSearchCV
+
+    strategy = search.get('strategy', 'grid')
+    if strategy == 'grid':
+        return GridSearchCV(estimator=estimator, param_grid=param_grid, cv=cv,
+                            verbose=1, scoring=scoring, n_jobs=n_jobs)
+
+    if strategy == 'random':
+        return RandomizedSearchCV(estimator=estimator, param_distributions=param_grid,
+                                  n_iter=search['n_iter'], cv=cv, verbose=1,
+                                  scoring=scoring, random_state=random_state,
+                                  n_jobs=n_jobs)
+
+    if strategy == 'halving':
+        from sklearn.experimental import enable_halving_search_cv  # noqa: F401
+        from sklearn.model_selection import HalvingGridSearchCV
+
+        halving = search['halving']
+        resource = halving['resource']
+        kwargs = {'min_resources': halving.get('min_resources') or 'exhaust'}
+        if resource != 'n_samples':
+            # The resource axis is searched by halving, not by the grid
+            values = param_grid[resource]
+            param_grid = {name: grid for name, grid in param_grid.items() if name != resource}
+            kwargs = {'min_resources': halving.get('min_resources') or min(values),
+                      'max_resources': max(values)}
+        return HalvingGridSearchCV(estimator=estimator, param_grid=param_grid, cv=cv,
+                                   factor=halving['factor'], resource=resource,
+                                   verbose=1, scoring=scoring, n_jobs=n_jobs,
+                                   random_state=random_state, **kwargs)
+
+    raise UnsupportedSearch(strategy)
+
+
+def search_report(clf, param_grid: Dict, cv: int, n_samples: int) -> Dict:
+    """
+    Compare the compute spent by a fitted search with an exhaustive grid search.
+
+    Compute is measured in boosting work, the sum over fits of training samples
+    times boosting rounds, so that halving on either resource is comparable. Searches
+    that share boosting rounds between candidates report the rounds each candidate
+    actually trained in cv_results_['boosting_rounds'].
+
+    Args:
+    - clf: The fitted search object.
+    - param_grid (Dict): The full grid of hyperparameters.
+    - cv (int): The number of cross-validation folds.
+    - n_samples (int): The number of training samples.
+
+    Returns:
+    - Dict: Candidates, fits and boosting work of the search and of the full grid.
+    """
+    from sklearn.model_selection import ParameterGrid
+
+    estimator = getattr(clf, 'estimator', None)
+    default_rounds = (estimator.get_params().get('n_estimators') if estimator else None) or 100
+    results = clf.cv_results_
+    resources = results.get('n_resources', [n_samples] * len(results['params']))
+    resource = getattr(clf, 'resource', 'n_samples')
+    rounds = results.get('boosting_rounds',
+                         [params.get('n_estimators', default_rounds) for params in results['params']])
+
+    work = 0
+    for n_rounds, n_resources in zip(rounds, resources):
+        samples = n_resources if resource == 'n_samples' else n_samples
+        work += cv * samples * n_rounds
+
+    full_grid = list(ParameterGrid(param_grid))
+    full_work = sum(cv * n_samples * params.get('n_estimators', default_rounds)
+                    for params in full_grid)
+    return {
+        'candidates': len(results['params']),
+        'fits': cv * sum(1 for n_rounds in rounds if n_rounds),
+        'boosting_work': int(work),
+        'full_grid_candidates': len(full_grid),
+        'full_grid_fits': cv * len(full_grid),
+        'full_grid_boosting_work': int(full_work),
+        'compute_saved': 1 - work / full_work,
     }
 
 
 def train(df: pd.DataFrame, target_column: Text,
-          estimator_name: Text, param_grid: Dict,  cv: int):
+          estimator_name: Text, param_grid: Dict,  cv: int,
+          search: Dict = None, random_state: int = None, parallelism: Dict = None,
+          log_level: Union[Text, int] = 'INFO'):
     """
-        Train a machine learning model using GridSearchCV.
+        Train a machine learning model using a hyperparameter search.
 
         Args:
         - df (pd.DataFrame): The dataset.
         - target_column (str): The name of the target column.
         - estimator_name (str): The name of the estimator to be used.
-        - param_grid (Dict): The grid of hyperparameters for GridSearchCV.
+        - param_grid (Dict): The grid of hyperparameters to search.
         - cv (int): The number of cross-validation folds.
+        - search (Dict): The search configuration, see get_search(); defaults to a grid search.
+        - random_state (int): Seed for candidate sampling and subsampling.
+        - parallelism (Dict): The CPU budget, see resolve_parallelism(); defaults to serial fits.
+        - log_level (str or int): Logging level of the quantized grid search.
 
         Returns:
         - trained model: The trained machine learning model.
         """
+    import joblib
+    from sklearn.metrics import f1_score, make_scorer
+
     # Get supported estimators
     estimators = get_supported_estimator()
 
@@ -59,20 +237,87 @@ def train(df: pd.DataFrame, target_column: Text,
     if estimator_name not in estimators.keys():
         raise UnsupportedClassifier(estimator_name)
     
-    # Create a GridSearchCV instance with f1_score as the scoring metric
+    # Split the CPU budget between parallel fits and threads inside each fit
+    budget = resolve_parallelism(parallelism or {'n_cores': 1})
     estimator = estimators[estimator_name]()
-    f1_scorer = make_scorer(f1_score, average='weighted')
-    clf = GridSearchCV(estimator=estimator,
-                       param_grid=param_grid,
-                       cv=cv,
-                       verbose=1,
-                       scoring=f1_scorer)
+    if 'n_jobs' in estimator.get_params():
+        estimator.set_params(n_jobs=budget['estimator_threads'])
+
+    search = search or {'strategy': 'grid'}
+    if search.get('quantized') or search.get('warm_start') or search.get('results_store'):
+        # Native XGBoost grid search on folds quantized once and shared by all candidates
+        if estimator_name != 'xgb' or search['strategy'] != 'grid':
+            raise UnsupportedSearch(f"quantized {search['strategy']} for {estimator_name}")
+        from src.train.search import QuantizedGridSearch
+        clf = QuantizedGridSearch(param_grid=param_grid, cv=cv,
+                                  n_jobs=budget['search_jobs'],
+                                  estimator_threads=budget['estimator_threads'],
+                                  warm_start=search.get('warm_start', False),
+                                  results_store=search.get('results_store'),
+                                  log_level=log_level)
+    else:
+        # Create the search instance with f1_score as the scoring metric
+        f1_scorer = make_scorer(f1_score, average='weighted')
+        clf = get_search(estimator=estimator,
+                         param_grid=param_grid,
+                         cv=cv,
+                         scoring=f1_scorer,
+                         search=search,
+                         random_state=random_state,
+                         n_jobs=budget['search_jobs'])
     
     # Get X and Y from the dataset
-    y_train = df.loc[:, target_column].values.astype('int32')
-    X_train = df.drop(target_column, axis=1).values.astype('float32')
-    
-    # Fit the model using GridSearchCV
-    clf.fit(X_train, y_train)
+    # A single conversion to the float32 matrix the estimators work on
+    y_train = df.loc[:, target_column].to_numpy(dtype='int32')
+    X_train = df.drop(target_column, axis=1).to_numpy(dtype='float32')
+
+    # Fit the model using the search
+    with joblib.parallel_backend(budget['backend']):
+        clf.fit(X_train, y_train)
+
+    return clf
+
+
+def tournament(df: pd.DataFrame, target_column: Text, param_grids: Dict, cv: int,
+               time_budget: float = None, random_state: int = None, parallelism: Dict = None,
+               log_level: Union[Text, int] = 'INFO'):
+    """
+        Run the grid searches of several estimators as one tournament, see Tournament.
+
+        Args:
+        - df (pd.DataFrame): The dataset.
+        - target_column (str): The name of the target column.
+        - param_grids (Dict): The grid of hyperparameters of each competing estimator.
+        - cv (int): The number of cross-validation folds.
+        - time_budget (float): Seconds after which no new cross-validation fit starts.
+        - random_state (int): Seed of the estimators that take one.
+        - parallelism (Dict): The CPU budget, see resolve_parallelism(); defaults to serial fits.
+        - log_level (str or int): Logging level of the tournament.
+
+        Returns:
+        - Tournament: The fitted tournament, predicting with the refitted winner.
+        """
+    from src.train.tournament import Tournament
+
+    supported = get_supported_estimator()
+    budget = resolve_parallelism(parallelism or {'n_cores': 1})
+    estimators = {}
+    for estimator_name in param_grids:
+        if estimator_name not in supported:
+            raise UnsupportedClassifier(estimator_name)
+        estimator = supported[estimator_name]()
+        if 'n_jobs' in estimator.get_params():
+            estimator.set_params(n_jobs=budget['estimator_threads'])
+        if 'random_state' in estimator.get_params():
+            estimator.set_params(random_state=random_state)
+        estimators[estimator_name] = estimator
+
+    clf = Tournament(estimators=estimators, param_grids=param_grids, cv=cv,
+                     n_jobs=budget['search_jobs'],
+                     estimator_threads=budget['estimator_threads'],
+                     backend=budget['backend'], time_budget=time_budget, log_level=log_level)
 
-    return clf
\ No newline at end of file
+    # A single conversion to the float32 matrix the estimators work on
+    y_train = df.loc[:, target_column].to_numpy(dtype='int32')
+    X_train = df.drop(target_column, axis=1).to_numpy(dtype='float32')
+    return clf.fit(X_train, y_train)
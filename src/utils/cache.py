@@ -0,0 +1,156 @@
+"""Provides a local content-addressed cache for stage outputs."""
+
+import hashlib
+import json
+import os
+from pathlib import Path
+import shutil
+from typing import Dict, List, Text
+import yaml
+
+from src.utils.logs import get_logger
+
+MANIFEST = 'manifest.json'
+
+
+def hash_file(path: Text, block_size: int = 1 << 20) -> Text:
+    """Hash file content.
+    Args:
+        path {Text}: file path
+        block_size {int}: bytes read at a time
+    Returns:
+        hex sha256 digest of the file content
+    """
+    digest = hashlib.sha256()
+    with open(path, 'rb') as file:
+        for block in iter(lambda: file.read(block_size), b''):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+class StageCache:
+    """
+    StageCache class for skipping stages whose inputs, params and sources did not change.
+
+    Each entry is a directory named after the stage and its key, holding a copy of the
+    stage outputs and a manifest of their original paths. When the cache grows over its
+    size limit the least recently used entries are evicted.
+
+    Parameters:
+    - cache_dir (str): Directory holding the cache entries.
+    - max_size_mb (float): Size limit of the whole cache in megabytes.
+    - log_level (str or int): Logging level.
+
+    Methods:
+    - key(): Compute the key of a stage run.
+    - restore(): Copy cached outputs back to their paths, if present.
+    - store(): Save the outputs of a stage run.
+    - evict(): Remove least recently used entries until the cache fits its size limit.
+    """
+
+    def __init__(self, cache_dir: Text, max_size_mb: float, log_level='INFO'):
+        """
+        Initialize StageCache instance.
+
+        Parameters:
+        - cache_dir (str): Directory holding the cache entries.
+        - max_size_mb (float): Size limit of the whole cache in megabytes.
+        - log_level (str or int): Logging level.
+        """
+        self.cache_dir = Path(cache_dir)
+        self.max_size = max_size_mb * 1024 * 1024
+        self.logger = get_logger('STAGE_CACHE', log_level=log_level)
+
+    def key(self, deps: List[Text], params: Dict, sources: List[Text]) -> Text:
+        """
+        Compute the key of a stage run.
+
+        Parameters:
+        - deps (list): Paths of the stage input data files.
+        - params (dict): Params the stage depends on.
+        - sources (list): Paths of the source files implementing the stage.
+
+        Returns:
+        - str: Hex digest identifying the stage run.
+        """
+        digest = hashlib.sha256()
+        for path in list(deps) + list(sources):
+            digest.update(f'{path}:{hash_file(path)}\n'.encode())
+        digest.update(yaml.safe_dump(params, sort_keys=True).encode())
+        return digest.hexdigest()
+
+    def restore(self, stage: Text, key: Text, outs: List[Text]) -> bool:
+        """
+        Copy cached outputs back to their paths.
+
+        Parameters:
+        - stage (str): Stage name.
+        - key (str): Key returned by key().
+        - outs (list): Paths of the stage outputs.
+
+        Returns:
+        - bool: True on a cache hit.
+        """
+        entry = self.cache_dir / f'{stage}-{key}'
+        manifest = entry / MANIFEST
+        if not manifest.exists() or json.loads(manifest.read_text()) != list(outs):
+            self.logger.info(f'Cache miss for stage {stage} ({key[:12]})')
+            return False
+
+        for i, out in enumerate(outs):
+            Path(out).parent.mkdir(parents=True, exist_ok=True)
+            shutil.copy2(entry / f'{i}_{Path(out).name}', out)
+        os.utime(entry)
+        self.logger.info(f'Cache hit for stage {stage} ({key[:12]}), restored {len(outs)} outputs')
+        return True
+
+    def store(self, stage: Text, key: Text, outs: List[Text]):
+        """
+        Save the outputs of a stage run, then evict entries over the size limit.
+
+        Raises FileNotFoundError, caching nothing, when an output is missing.
+
+        Parameters:
+        - stage (str): Stage name.
+        - key (str): Key returned by key().
+        - outs (list): Paths of the stage outputs.
+        """
+        missing = [out for out in outs if not Path(out).exists()]
+        if missing:
+            raise FileNotFoundError(f"Stage {stage} did not write its outputs {', '.join(map(str, missing))}")
+
+        entry = self.cache_dir / f'{stage}-{key}'
+        staging = self.cache_dir / f'.{stage}-{key}.tmp'
+        shutil.rmtree(staging, ignore_errors=True)
+        staging.mkdir(parents=True)
+        for i, out in enumerate(outs):
+            shutil.copy2(out, staging / f'{i}_{Path(out).name}')
+        (staging / MANIFEST).write_text(json.dumps(list(outs)))
+        shutil.rmtree(entry, ignore_errors=True)
+        staging.rename(entry)
+        self.logger.info(f'Cached outputs of stage {stage} ({key[:12]})')
+        self.evict(keep=entry)
+
+    def evict(self, keep: Path = None):
+        """
+        Remove least recently used entries until the cache fits its size limit.
+
+        Parameters:
+        - keep (Path): Entry never evicted, the one just stored; when it alone is over
+          the size limit it is kept with a warning and every other entry is evicted.
+        """
+        entries = [entry for entry in self.cache_dir.iterdir()
+                   if entry.is_dir() and not entry.name.startswith('.')]
+        sizes = {entry: sum(file.stat().st_size for file in entry.iterdir()) for entry in entries}
+        total = sum(sizes.values())
+        if keep is not None and sizes.get(keep, 0) > self.max_size:
+            self.logger.warning(f'Cache entry {keep.name} alone exceeds the cache size limit '
+                                f'of {self.max_size / 1024 / 1024:g} MB')
+        for entry in sorted(entries, key=lambda entry: entry.stat().st_mtime):
+            if total <= self.max_size:
+                break
+            if entry == keep:
+                continue
+            shutil.rmtree(entry)
+            total -= sizes[entry]
+            self.logger.info(f'Evicted cache entry {entry.name}')
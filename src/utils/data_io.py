@@ -0,0 +1,158 @@
+"""Provides functions to read and write the pipeline datasets in CSV, Parquet or Feather format."""
+
+import pandas as pd
+from pathlib import Path
+from typing import Iterator, Text
+
+SUPPORTED_FORMATS = ('csv', 'parquet', 'feather')
+
+
+class UnsupportedFormat(Exception):
+    """
+    Exception raised for unsupported dataset formats.
+
+    Attributes:
+    - data_format (str): The name of the unsupported format.
+    """
+    def __init__(self, data_format):
+        """
+        Initialize UnsupportedFormat instance.
+
+        Args:
+        - data_format (str): The name of the unsupported format.
+        """
+        self.msg = f'Unsupported data format {data_format}, expected one of {SUPPORTED_FORMATS}'
+        super().__init__(self.msg)
+
+
+def check_format(data_format: Text) -> None:
+    """Raise UnsupportedFormat if data_format is not supported.
+    Args:
+        data_format {Text}: dataset format name
+    """
+    if data_format not in SUPPORTED_FORMATS:
+        raise UnsupportedFormat(data_format)
+
+
+def format_from_path(path: Text) -> Text:
+    """Infer the dataset format from the file extension.
+    Args:
+        path {Text}: dataset file path
+    Returns:
+        one of SUPPORTED_FORMATS
+    """
+    data_format = Path(path).suffix.lstrip('.').lower()
+    check_format(data_format)
+    return data_format
+
+
+def read_dataset(path: Text, data_format: Text, memory_map: bool = False) -> pd.DataFrame:
+    """Read a dataset.
+    Args:
+        path {Text}: dataset file path
+        data_format {Text}: one of SUPPORTED_FORMATS
+        memory_map {bool}: memory-map binary files instead of reading them into a buffer
+    Returns:
+        pd.DataFrame with the dtypes stored in the file (inferred for CSV)
+    """
+    check_format(data_format)
+    if data_format == 'csv':
+        return pd.read_csv(path)
+    if data_format == 'parquet':
+        return pd.read_parquet(path, memory_map=memory_map)
+
+    from pyarrow import feather
+    return feather.read_table(path, memory_map=memory_map).to_pandas()
+
+
+def iter_dataset(path: Text, data_format: Text, batch_size: int) -> Iterator[pd.DataFrame]:
+    """Read a dataset in batches, holding at most one batch in memory.
+    Args:
+        path {Text}: dataset file path
+        data_format {Text}: one of SUPPORTED_FORMATS
+        batch_size {int}: maximum rows per batch
+    Returns:
+        iterator of pd.DataFrame batches
+    """
+    check_format(data_format)
+    if data_format == 'csv':
+        yield from pd.read_csv(path, chunksize=batch_size)
+        return
+
+    if data_format == 'parquet':
+        import pyarrow.parquet as pq
+        batches = pq.ParquetFile(path).iter_batches(batch_size=batch_size)
+    else:
+        from pyarrow import feather
+        # Memory-mapped, so only the converted batch is materialized
+        batches = feather.read_table(path, memory_map=True).to_batches(max_chunksize=batch_size)
+    for batch in batches:
+        yield batch.to_pandas()
+
+
+def write_dataset(df: pd.DataFrame, path: Text, data_format: Text, index: bool = False) -> None:
+    """Write a dataset.
+    Args:
+        df {pd.DataFrame}: dataset to write
+        path {Text}: dataset file path
+        data_format {Text}: one of SUPPORTED_FORMATS
+        index {bool}: write the index as a leading column; only honoured for CSV
+    """
+    with DatasetWriter(path, data_format, index=index) as writer:
+        writer.write(df)
+
+
+class DatasetWriter:
+    """
+    Incremental dataset writer, appending one DataFrame chunk at a time.
+
+    All chunks must share the columns and dtypes of the first one. Feather files are
+    written uncompressed so that they can be memory-mapped on read.
+
+    Parameters:
+    - path (str): The dataset file path.
+    - data_format (str): One of SUPPORTED_FORMATS.
+    - index (bool): Write the index as a leading column; only honoured for CSV.
+    """
+
+    def __init__(self, path: Text, data_format: Text, index: bool = False):
+        check_format(data_format)
+        self.path = path
+        self.data_format = data_format
+        self.index = index
+        self.schema = None
+        self.writer = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+    def write(self, df: pd.DataFrame) -> None:
+        """Append a chunk to the dataset.
+        Args:
+            df {pd.DataFrame}: chunk to append
+        """
+        if self.data_format == 'csv':
+            df.to_csv(self.path, mode='a' if self.schema else 'w',
+                      header=self.schema is None, index=self.index)
+            self.schema = list(df.columns)
+            return
+
+        import pyarrow as pa
+        table = pa.Table.from_pandas(df, schema=self.schema, preserve_index=False)
+        if self.writer is None:
+            self.schema = table.schema
+            if self.data_format == 'parquet':
+                import pyarrow.parquet as pq
+                self.writer = pq.ParquetWriter(self.path, self.schema)
+            else:
+                self.writer = pa.ipc.new_file(self.path, self.schema)
+        self.writer.write_table(table)
+
+    def close(self) -> None:
+        """Finalize the file footer for binary formats."""
+        if self.writer is not None:
+            self.writer.close()
+            self.writer = None
@@ -0,0 +1,110 @@
+"""Provides vectorized categorical encoders built on pandas categoricals."""
+
+import numpy as np
+import pandas as pd
+from typing import Dict, List, Text
+
+
+def map_categories(values: pd.Series, mapping: Dict) -> pd.Series:
+    """Map categories to values through categorical codes, like Series.map with a dict.
+    Args:
+        values {pd.Series}: categories to map
+        mapping {Dict}: value of each known category
+    Returns:
+        pd.Series of mapped values; unknown and missing categories become NaN, in which
+        case the result is float64 as with Series.map
+    """
+    codes = pd.Categorical(values, categories=list(mapping)).codes
+    lookup = np.asarray(list(mapping.values()))
+    if (codes < 0).any():
+        mapped = np.where(codes >= 0, lookup.astype('float64')[codes], np.nan)
+    else:
+        mapped = lookup[codes]
+    return pd.Series(mapped, index=values.index, name=values.name)
+
+
+class OneHotEncoder:
+    """
+    One-hot encoder with fixed vocabularies, producing indicator columns from categorical codes.
+
+    Each encoded column is replaced, in place, by one int64 indicator column per category,
+    named column_category, in order of first appearance, with missing values last as
+    column_nan when they were seen. Unseen categories, and missing values when none were
+    seen, encode as all zeros. This matches category_encoders' OneHotEncoder with
+    use_cat_names=True and its default handling of unknown and missing values.
+
+    Parameters:
+    - cols (List[str]): The columns to encode.
+    - vocabularies (Dict): Categories of each column, in order of first appearance;
+      None learns them in fit().
+
+    Methods:
+    - fit(): Learn the vocabularies from a DataFrame.
+    - transform(): Replace the encoded columns with their indicator columns.
+    - fit_transform(): Fit, then transform the same DataFrame.
+    """
+
+    def __init__(self, cols: List[Text], vocabularies: Dict = None):
+        self.cols = cols
+        self.categories = {}
+        if vocabularies is not None:
+            self._set_vocabularies(vocabularies)
+
+    def _set_vocabularies(self, vocabularies: Dict):
+        for column in self.cols:
+            values = pd.Index(vocabularies[column], dtype=object)
+            known = values[values.notna()]
+            self.categories[column] = (known, values.hasnans)
+
+    def fit(self, df: pd.DataFrame) -> 'OneHotEncoder':
+        """
+        Learn the vocabularies from a DataFrame.
+
+        Args:
+        - df (pd.DataFrame): Data holding the columns to encode.
+
+        Returns:
+        - OneHotEncoder: The fitted encoder.
+        """
+        self._set_vocabularies({column: df[column].unique() for column in self.cols})
+        return self
+
+    def transform(self, df: pd.DataFrame) -> pd.DataFrame:
+        """
+        Replace the encoded columns with their indicator columns.
+
+        Args:
+        - df (pd.DataFrame): Data holding the columns to encode.
+
+        Returns:
+        - pd.DataFrame: The data with indicator columns, keeping the index and column order.
+        """
+        columns = {}
+        for column in df.columns:
+            if column not in self.categories:
+                columns[column] = df[column]
+                continue
+            known, has_nan = self.categories[column]
+            width = len(known) + has_nan
+            codes = pd.Categorical(df[column], categories=known).codes.astype('int64')
+            # Unseen categories point past the last indicator, to an all-zero row
+            codes[codes < 0] = width
+            if has_nan:
+                codes[df[column].isna().to_numpy()] = len(known)
+            indicators = np.eye(width + 1, width, dtype='int64')[codes]
+            names = [f'{column}_{value}' for value in known] + [f'{column}_nan'] * has_nan
+            for i, name in enumerate(names):
+                columns[name] = indicators[:, i]
+        return pd.DataFrame(columns, index=df.index)
+
+    def fit_transform(self, df: pd.DataFrame) -> pd.DataFrame:
+        """
+        Fit, then transform the same DataFrame.
+
+        Args:
+        - df (pd.DataFrame): Data holding the columns to encode.
+
+        Returns:
+        - pd.DataFrame: The data with indicator columns.
+        """
+        return self.fit(df).transform(df)
@@ -1,8 +1,14 @@
-"""Provides functions to create loggers."""
+"""Provides functions to create loggers and to instrument stage methods."""
 
+import cProfile
+import functools
+import json
 import logging
-from typing import Text, Union
+from pathlib import Path
+import resource
+from typing import Callable, Dict, Text, Union
 import sys
+import time
 
 
 def get_console_handler() -> logging.StreamHandler:
@@ -37,4 +43,80 @@ def get_logger(name: Text = __name__, log_level: Union[Text, int] = logging.DEBU
     logger.addHandler(get_console_handler())
     logger.propagate = False
 
-    return logger
\ No newline at end of file
+    return logger
+
+def instrument(rows: Text = None) -> Callable:
+    """Decorator recording the resources used by a stage method.
+    The decorated method's instance needs `config` and `logger` attributes. When the
+    config's instrument section is enabled, each call appends a JSON line with wall time,
+    CPU time, peak RSS and row count to the events file and updates the stage's totals
+    in <dir>/<logger name>.json; with profile, a cProfile dump of the call is written
+    to <dir>/<logger name>.<method>.prof.
+    Args:
+        rows {Text}: attribute holding the data the method works on, counted after the call
+    Returns:
+        decorator
+    """
+    def decorator(method: Callable) -> Callable:
+        @functools.wraps(method)
+        def wrapper(self, *args, **kwargs):
+            settings = self.config.get('instrument') or {}
+            if not settings.get('enabled'):
+                return method(self, *args, **kwargs)
+
+            profiler = cProfile.Profile() if settings.get('profile') else None
+            started = time.time()
+            wall, cpu = time.perf_counter(), time.process_time()
+            if profiler is not None:
+                profiler.enable()
+            try:
+                return method(self, *args, **kwargs)
+            finally:
+                if profiler is not None:
+                    profiler.disable()
+                data = getattr(self, rows, None) if rows else None
+                event = {
+                    'stage': self.logger.name,
+                    'method': method.__name__,
+                    'started': started,
+                    'wall_seconds': time.perf_counter() - wall,
+                    'cpu_seconds': time.process_time() - cpu,
+                    # Peak of the whole process so far, in MB
+                    'peak_rss_mb': resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024,
+                    'rows': len(data) if data is not None else None,
+                }
+                record_event(self, event, settings, profiler)
+        return wrapper
+    return decorator
+
+
+def record_event(stage, event: Dict, settings: Dict, profiler: cProfile.Profile = None) -> None:
+    """Write an instrumentation event and the updated totals of its stage.
+    Args:
+        stage: instance whose method was instrumented
+        event {Dict}: the event recorded by instrument()
+        settings {Dict}: the config's instrument section
+        profiler {cProfile.Profile}: profile of the call, if any
+    """
+    stage.logger.debug(json.dumps(event))
+    directory = Path(settings['dir'])
+    directory.mkdir(parents=True, exist_ok=True)
+    with open(settings['events'], 'a') as events_file:
+        events_file.write(json.dumps(event) + '\n')
+
+    # Totals of this stage run, one entry per method
+    if not hasattr(stage, 'performance'):
+        stage.performance = {}
+    totals = stage.performance.setdefault(event['method'], {
+        'calls': 0, 'wall_seconds': 0.0, 'cpu_seconds': 0.0, 'peak_rss_mb': 0.0, 'rows': None})
+    totals['calls'] += 1
+    totals['wall_seconds'] += event['wall_seconds']
+    totals['cpu_seconds'] += event['cpu_seconds']
+    totals['peak_rss_mb'] = max(totals['peak_rss_mb'], event['peak_rss_mb'])
+    if event['rows'] is not None:
+        totals['rows'] = (totals['rows'] or 0) + event['rows']
+    name = event['stage'].lower()
+    with open(directory / f'{name}.json', 'w') as totals_file:
+        json.dump(stage.performance, totals_file, indent=2)
+    if profiler is not None:
+        profiler.dump_stats(directory / f"{name}.{event['method']}.prof")